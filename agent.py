@@ -1,43 +1,82 @@
 import os
 import re
 import math
-import json
-from dotenv import load_dotenv
-from groq import Groq
+import contextvars
+from contextlib import nullcontext
+import threading
+import weakref
+from functools import lru_cache
+import time
+from typing import TYPE_CHECKING
+from typing import Callable
+from typing import Iterator
+from concurrent.futures import FIRST_COMPLETED
+from concurrent.futures import Future
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import wait
 from datetime import datetime
-from colorama import Fore
-from colorama import Style
 from tool import Tool
-from tool import validate_arguments
+from utils.completions import acompletions_create
 from utils.completions import build_prompt_structure
-from utils.completions import ChatHistory
+from utils.completions import CompletionCache
+from utils.completions import TokenBudgetChatHistory
 from utils.completions import completions_create
+from utils.completions import estimate_tokens
 from utils.completions import update_chat_history
-from utils.extraction import extract_tag_content
+from utils.extraction import decode_tool_call
+from utils.extraction import IncrementalTagParser
+from utils.extraction import parse_completion
+from utils.extraction import unique_call_id
+from utils.fast_path import FastPathRouter
+from utils.sessions import Session
+from utils.tracing import Tracer
+from utils.tracing import set_attribute
 
+if TYPE_CHECKING:
+    import asyncio
 
-# cargamos las variables de entorno, ahi debera estar nuestra API de Groq
-load_dotenv()
+    from groq import AsyncGroq
+    from groq import Groq
 
-fecha_actual = datetime.now()
 
-# Formatear la fecha como desees
-fecha_formateada = fecha_actual.strftime("%Y-%m-%d")  # Formato: Año-Mes-Día
+def crear_cliente(asincrono: bool = False) -> "Groq | AsyncGroq":
+    # groq es una importación pesada: se carga, junto con las variables de entorno donde
+    # está nuestra API de Groq, solo cuando se crea el primer cliente
+    from dotenv import load_dotenv
+
+    load_dotenv()
+    if asincrono:
+        from groq import AsyncGroq
+
+        return AsyncGroq()
+    from groq import Groq
+
+    return Groq()
+
+
+def fecha_formateada() -> str:
+    # La fecha se calcula en cada pregunta y va fuera del prompt de sistema, que así
+    # no cambia entre días y aprovecha la caché de prefijos del proveedor
+    return datetime.now().strftime("%Y-%m-%d")  # Formato: Año-Mes-Día
+
 
 MODEL = "llama-3.3-70b-versatile"
-GROQ_CLIENT = Groq()
+
+# Cada cuánto se comprueba si ha empezado una llamada que espera un hilo libre
+TOOL_START_POLL = 0.05
 
 BASE_SYSTEM_PROMPT = ""   
 
-# Define the System Prompt as a constant
-REACT_SYSTEM_PROMPT = f"""
+# Define the System Prompt as a constant. It must stay byte-stable (no dates or other
+# per-request values) so that providers can cache it as a common prompt prefix.
+REACT_SYSTEM_PROMPT = """
 You are a function calling AI model. You operate by running a loop with the following steps: Thought, Action, Observation.
 You are provided with function signatures within <tools></tools> XML tags.
 You may call one or more functions to assist with the user query. Don't make assumptions about what values to plug into functions. Pay special attention to the properties 'types'. You should use those types as in a Python dict.
 
 For each function call return a JSON object with the function name and arguments within <tool_call></tool_call> XML tags as follows:
 
-<tool_call> {{"name": "<function-name>", "arguments": "<args-dict>", "id": "<monotonically-increasing-id>"}} </tool_call>
+<tool_call> {"name": "<function-name>", "arguments": "<args-dict>", "id": "<monotonically-increasing-id>"} </tool_call>
 
 Here are the available tools / actions:
 
@@ -46,11 +85,11 @@ Example session:
 
 <question>What is the current price of Solana?</question>
 <thought>I need to get the current price of solana</thought>
-<tool_call>{{"name": "get_actual_data", "arguments": {{"moneda": "solana"}}, "id": 0}}</tool_call>
+<tool_call>{"name": "get_actual_data", "arguments": {"moneda": "solana"}, "id": 0}</tool_call>
 
 You will be called again with this:
 
-<observation>{{0: {{"Precio": "$96,065.33"}}}}</observation>
+<observation>{0: {"Precio": "$96,065.33"}}</observation>
 
 You then output:
 
@@ -60,29 +99,115 @@ Example session 2:
 
 <question>What was the price of Ethereum on January 12, 2024?</question>
 <thought>I need to get the historical data for ethereum on January 12, 2024</thought>
-<tool_call>{{"name": "get_historic_data", "arguments": {{"moneda": "ethereum", "fecha": "Jan 12, 2024"}}, "id": 0}}</tool_call>
+<tool_call>{"name": "get_historic_data", "arguments": {"moneda": "ethereum", "fecha": "Jan 12, 2024"}, "id": 0}</tool_call>
 
 ALWAYS in the tool call, you need to put the data in this format, if the date is January 12, 2024, you put Jan 12, 2024.
 
-If the user requests data from a week ago, subtract the necessary days from this date: {fecha_formateada}. 
+If the user requests data from a week ago, subtract the necessary days from the current date given within <current_date></current_date> tags before the question. 
 Once adjusted, format it exactly as before. For example, if the current date is 09-02-2025, and they ask for data from a week ago, provide data for 02-02-2025 (Feb 02, 2025). 
 If they ask for data from a month ago and the date is 09-02-2025, provide 09-01-2025 (Jan 09, 2025). 
 Always ensure the date follows the same format.
 
 You will be called again with this:
 
-<observation>{{0: {{"Apertura": "$189.76", "Alza": "$203.15", "Baja": "$188.48", "MarketCap": "$93,740,476,812"}}}}</observation>
+<observation>{0: {"Apertura": "$189.76", "Alza": "$203.15", "Baja": "$188.48", "MarketCap": "$93,740,476,812"}}</observation>
 
 You then output:
 
 <response>The stock opened at $189.76, reached a high of $203.15, a low of $188.48, and has a market cap of $93.74 billion.</response>
 
+Example session 3:
+
+<question>How did the price of Bitcoin move between January 12 and January 19, 2024?</question>
+<thought>I need the historical data of bitcoin for every day between January 12 and January 19, 2024, so I fetch the whole range at once</thought>
+<tool_call>{"name": "get_historic_range", "arguments": {"moneda": "bitcoin", "fecha_inicio": "Jan 12, 2024", "fecha_fin": "Jan 19, 2024"}, "id": 0}</tool_call>
+
+You will be called again with the rows of the whole range, one list per column, from the oldest day to the most recent.
+
 Additional constraints:
 
+- When the user asks about several days or a period, call get_historic_range once for the whole period instead of calling get_historic_data for each day.
+
 - If the user asks you something unrelated to any of the tools above, answer freely enclosing your answer with <response></response> tags.
 """
 
 
+@lru_cache(maxsize=32)
+def render_system_prompt(system_prompt: str, tool_signatures: str) -> str:
+    """
+    Renders the ReAct system prompt for a set of tools. Cached, so agents sharing the same
+    tools render it only once.
+
+    Args:
+        system_prompt (str): The base system prompt.
+        tool_signatures (str): The concatenated signatures of the tools.
+
+    Returns:
+        str: The full system prompt.
+    """
+    return system_prompt + "\n" + REACT_SYSTEM_PROMPT % tool_signatures
+
+
+class ToolCallClock:
+    """
+    Records when a submitted tool call starts running, so that its timeout does not include
+    the time it spent waiting for a worker of the shared pool or for its tool's concurrency
+    limit. A call that waited too long is abandoned and does not start at all.
+    """
+
+    def __init__(self) -> None:
+        self.submitted_at = time.monotonic()
+        self.started_at: float | None = None
+        self.abandoned = False
+        self._lock = threading.Lock()
+
+    def start(self) -> bool:
+        """Marks the call as running. Returns False if it was abandoned while waiting."""
+        with self._lock:
+            if self.abandoned:
+                return False
+            self.started_at = time.monotonic()
+            return True
+
+    def abandon(self) -> bool:
+        """Gives up on a call that has not started. Returns False if it already started."""
+        with self._lock:
+            if self.started_at is not None:
+                return False
+            self.abandoned = True
+            return True
+
+
+async def aacquire(lock: threading.Lock) -> None:
+    """
+    Acquires a thread lock without blocking the event loop.
+
+    If the waiting task is cancelled, the thread that keeps waiting releases the lock as
+    soon as it gets it, so that a caller giving up never leaves it held.
+    """
+    import asyncio
+
+    state = {"acquired": False, "abandoned": False}
+    handoff = threading.Lock()
+
+    def acquire() -> None:
+        lock.acquire()
+        with handoff:
+            if state["abandoned"]:
+                lock.release()
+            else:
+                state["acquired"] = True
+
+    try:
+        await asyncio.to_thread(acquire)
+    except asyncio.CancelledError:
+        with handoff:
+            state["abandoned"] = True
+            if state["acquired"]:
+                lock.release()
+        raise
+
+
 class ReactAgent:
     """
     A class that represents an agent using the ReAct logic that interacts with tools to process
@@ -90,10 +215,25 @@ class ReactAgent:
     collect tool signatures, and process multiple tool calls in a given round of interaction.
 
     Attributes:
-        client (Groq): The Groq client used to handle model-based completions.
+        client (Groq): The Groq client used to handle model-based completions, created on first use if not given.
+        async_client (AsyncGroq): The async Groq client used by `arun`, created on first use if not given.
         model (str): The name of the model used for generating responses. Default is "llama-3.1-70b-versatile".
         tools (list[Tool]): A list of Tool instances available for execution.
         tools_dict (dict): A dictionary mapping tool names to their corresponding Tool instances.
+        tool_timeout (float): Seconds a single tool call may run before its result is replaced by an error,
+            counted from when it starts running, not while it waits for a worker or for its tool's limit.
+        tool_queue_timeout (float): Seconds a tool call may wait for a worker or for its tool's limit
+            before it is reported as an error without running, e.g. while earlier calls that timed
+            out still hold the workers. Defaults to `tool_timeout`.
+        tool_limits (dict): Semaphores bounding the number of simultaneous calls per tool name.
+        executor (ThreadPoolExecutor): Thread pool that runs the tool calls of a round concurrently.
+        history_max_tokens (int): Token budget of the chat history of a single question; older observations
+            are compacted beyond it. Sessions carry their own budget.
+        completion_cache (CompletionCache | None): Cache of completions; identical requests skip the LLM.
+        tracer (Tracer): Records a span for each run, ReAct round, LLM call and tool execution.
+            Its exporters decide where they go; with none, nothing is printed or written.
+        router (FastPathRouter | None): Answers simple price and history questions with direct
+            tool calls, before (and instead of) the ReAct loop.
     """
 
     def __init__(
@@ -101,12 +241,60 @@ class ReactAgent:
         tools: Tool | list[Tool],
         model: str = "llama-3.1-70b-versatile",
         system_prompt: str = BASE_SYSTEM_PROMPT,
+        max_workers: int = 8,
+        tool_timeout: float = 60.0,
+        tool_queue_timeout: float | None = None,
+        tool_concurrency: dict[str, int] | None = None,
+        client: "Groq | None" = None,
+        async_client: "AsyncGroq | None" = None,
+        history_max_tokens: int = 8000,
+        completion_cache: CompletionCache | None = None,
+        tracer: Tracer | None = None,
+        router: FastPathRouter | None = None,
     ) -> None:
-        self.client = Groq()
+        self._client = client
+        self.async_client = async_client
+        self.history_max_tokens = history_max_tokens
+        self.completion_cache = completion_cache
+        self.tracer = tracer or Tracer()
+        self.router = router
         self.model = model
         self.system_prompt = system_prompt
         self.tools = tools if isinstance(tools, list) else [tools]
         self.tools_dict = {tool.name: tool for tool in self.tools}
+        self.tool_timeout = tool_timeout
+        self.tool_queue_timeout = tool_timeout if tool_queue_timeout is None else tool_queue_timeout
+        self.tool_concurrency = dict(tool_concurrency or {})
+        self.tool_limits = {
+            name: threading.BoundedSemaphore(limit)
+            for name, limit in self.tool_concurrency.items()
+        }
+        # asyncio semaphores are bound to an event loop, so they are kept per loop
+        self._async_tool_limits = weakref.WeakKeyDictionary()
+        self.executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="tool-call"
+        )
+
+    @property
+    def client(self) -> "Groq":
+        if self._client is None:
+            self._client = crear_cliente()
+        return self._client
+
+    @client.setter
+    def client(self, client: "Groq") -> None:
+        self._client = client
+
+    @property
+    def full_system_prompt(self) -> str:
+        """
+        The system prompt sent to the model: the base prompt followed, when the agent has
+        tools, by the ReAct instructions with the tool signatures. It is rendered once per
+        tool set and reused by every run.
+        """
+        if not self.tools:
+            return self.system_prompt
+        return render_system_prompt(self.system_prompt, self.add_tool_signatures())
 
     def add_tool_signatures(self) -> str:
         """
@@ -117,42 +305,305 @@ class ReactAgent:
         """
         return "".join([tool.fn_signature for tool in self.tools])
 
-    def process_tool_calls(self, tool_calls_content: list) -> dict:
+    def prepare_tool_call(self, tool_call: dict) -> tuple[Tool, dict]:
+        """
+        Looks up the tool of a decoded tool call and validates its arguments.
+
+        Args:
+            tool_call (dict): The decoded tool call with 'name', 'arguments' and 'id' keys.
+
+        Returns:
+            tuple[Tool, dict]: The tool to run and its validated arguments.
+        """
+        tool = self.tools_dict[tool_call["name"]]
+
+        # Validate the tool call with the validator compiled when the tool was created
+        validated_tool_call = tool.validate(tool_call)
+        set_attribute("tool_call", validated_tool_call)
+        return tool, validated_tool_call["arguments"]
+
+    def execute_tool_call(
+        self,
+        tool_call: dict,
+        session: Session | None = None,
+        on_start: Callable[[], bool] | None = None,
+    ):
+        """
+        Validates the arguments of a single tool call and runs the tool, honouring the
+        concurrency limit configured for it. Within a session, a call already made with the
+        same arguments is answered from the session's memo instead.
+
+        Args:
+            tool_call (dict): The decoded tool call with 'name', 'arguments' and 'id' keys.
+            session (Session | None): The conversation the call belongs to, if any.
+            on_start (Callable | None): Called right before the tool runs, once its concurrency
+                limit has been acquired. If it returns False the tool is not run.
+
+        Returns:
+            The result of the tool, or a dict with an 'error' key if the call failed.
+        """
+        with self.tracer.span("tool.execute", tool=tool_call["name"], id=tool_call["id"]) as span:
+            try:
+                tool, arguments = self.prepare_tool_call(tool_call)
+                found, result = session.recall(tool.name, arguments) if session else (False, None)
+                span.set_attribute("memo.hit", found)
+                if not found:
+                    limit = self.tool_limits.get(tool.name)
+                    with limit if limit is not None else nullcontext():
+                        if on_start is None or on_start():
+                            result = tool.run(**arguments)
+                        else:
+                            # La ronda ya la dio por perdida mientras esperaba: no se ejecuta
+                            result = {"error": "Timeout: the tool call was abandoned before it started"}
+                    if session is not None:
+                        session.remember(tool.name, arguments, result)
+            except Exception as e:
+                result = {"error": f"{type(e).__name__}: {e}"}
+                span.status = "error"
+            span.set_attribute("result", result)
+            return result
+
+    def process_tool_calls(self, tool_calls_content: list, session: Session | None = None) -> dict:
         """
         Processes each tool call, validates arguments, executes the tools, and collects results.
+        The calls of a round are independent, so they run concurrently on the agent's thread pool;
+        a call that exceeds `tool_timeout` is reported as an error instead of stalling the round.
+
+        Args:
+            tool_calls_content (list): List of tool calls, either decoded dicts or strings in JSON format.
+            session (Session | None): The conversation the calls belong to, if any.
+
+        Returns:
+            dict: A dictionary where the keys are tool call IDs and values are the results from the tools.
+        """
+        futures = {}
+        for index, tool_call in enumerate(tool_calls_content):
+            if isinstance(tool_call, str):
+                tool_call = decode_tool_call(tool_call, index)
+            futures[unique_call_id(tool_call, futures)] = self.submit_tool_call(tool_call, session)
+        return self.collect_tool_results(futures)
+
+    def submit_tool_call(self, tool_call: dict, session: Session | None = None) -> Future:
+        """
+        Schedules a decoded tool call on the agent's thread pool, in a copy of the current
+        context so that its span is nested in the span of the round.
+
+        Args:
+            tool_call (dict): The decoded tool call with 'name', 'arguments' and 'id' keys.
+            session (Session | None): The conversation the call belongs to, if any.
+
+        Returns:
+            Future: The future that will hold the result of the tool. Its `clock`
+                (ToolCallClock) records when the tool starts running.
+        """
+        context = contextvars.copy_context()
+        clock = ToolCallClock()
+        future = self.executor.submit(
+            context.run, self.execute_tool_call, tool_call, session, clock.start
+        )
+        future.clock = clock
+        return future
+
+    def submit_streamed_tool_call(
+        self, content: str, futures: dict, errors: list, session: Session | None = None
+    ) -> None:
+        """
+        Decodes a tool call received while streaming and schedules it, recording the error
+        instead if it is malformed.
+
+        Args:
+            content (str): The content of the <tool_call> tag.
+            futures (dict): The futures of the round, keyed by tool call ID.
+            errors (list): The parse errors of the round.
+            session (Session | None): The conversation the call belongs to, if any.
+        """
+        try:
+            tool_call = decode_tool_call(content, len(futures))
+        except ValueError as e:
+            errors.append(f"Invalid tool call {content!r}: {e}")
+            return
+        futures[unique_call_id(tool_call, futures)] = self.submit_tool_call(tool_call, session)
+
+    @staticmethod
+    def parse_error_observations(errors: list[str]) -> dict:
+        """
+        Turns the tool calls that could not be decoded into observations, so that the model
+        can correct them in the next round.
 
         Args:
-            tool_calls_content (list): List of strings, each representing a tool call in JSON format.
+            errors (list[str]): The parse errors of the round.
+
+        Returns:
+            dict: A dictionary mapping a synthetic ID to an error result for each malformed call.
+        """
+        return {f"invalid_{index}": {"error": error} for index, error in enumerate(errors)}
+
+    def collect_tool_results(self, futures: dict) -> dict:
+        """
+        Waits for the submitted tool calls of a round, replacing those that run for longer
+        than `tool_timeout` with an error. Calls still waiting for a worker of the shared pool
+        (or for their tool's limit) are given `tool_queue_timeout` to start; after that they are
+        abandoned and reported as an error too, so hung calls holding the workers cannot stall
+        later rounds.
+
+        Args:
+            futures (dict): A dictionary mapping tool call IDs to the futures of their results.
 
         Returns:
             dict: A dictionary where the keys are tool call IDs and values are the results from the tools.
         """
         observations = {}
-        for tool_call_str in tool_calls_content:
-            tool_call = json.loads(tool_call_str)
-            tool_name = tool_call["name"]
-            tool = self.tools_dict[tool_name]
+        pending = dict(futures)
+        while pending:
+            now = time.monotonic()
+            deadlines = []
+            for call_id, future in list(pending.items()):
+                started_at = future.clock.started_at
+                queued_until = future.clock.submitted_at + self.tool_queue_timeout
+                if future.done():
+                    observations[call_id] = future.result()
+                elif started_at is not None and now >= started_at + self.tool_timeout:
+                    observations[call_id] = {
+                        "error": f"Timeout: the tool did not answer within {self.tool_timeout} seconds"
+                    }
+                elif started_at is None and now >= queued_until and future.clock.abandon():
+                    future.cancel()
+                    observations[call_id] = {
+                        "error": f"Timeout: no worker was available within {self.tool_queue_timeout} seconds"
+                    }
+                else:
+                    # Sin hora de inicio todavía espera un hilo: se vuelve a mirar en un momento
+                    if future.clock.started_at is None:
+                        deadlines.append(min(now + TOOL_START_POLL, queued_until))
+                    else:
+                        deadlines.append(started_at + self.tool_timeout)
+                    continue
+                del pending[call_id]
+            if pending:
+                wait(pending.values(), timeout=max(0.0, min(deadlines) - now), return_when=FIRST_COMPLETED)
+
+        # Store the results using the tool call IDs, in the order of the calls
+        return {call_id: observations[call_id] for call_id in futures}
+
+    def start_chat_history(self, user_msg: str, session: Session | None = None) -> TokenBudgetChatHistory:
+        """
+        Builds the initial chat history of an interaction: the system prompt followed by the
+        user's question. Within a session, the question is appended to the history of the
+        previous turns instead.
+
+        Args:
+            user_msg (str): The user's input message.
+            session (Session | None): The conversation the question belongs to, if any.
 
-            print(Fore.GREEN + f"\nUsing Tool: {tool_name}")
+        Returns:
+            TokenBudgetChatHistory: The chat history the ReAct loop starts from, with the system
+                prompt and the question pinned.
+        """
+        user_prompt = build_prompt_structure(
+            prompt=f"<current_date>{fecha_formateada()}</current_date>\n<question>{user_msg}</question>",
+            role="user",
+        )
+        if session is not None:
+            if not session.history:
+                session.history.append(build_prompt_structure(prompt=self.full_system_prompt, role="system"))
+            session.history.append(user_prompt)
+            # La pregunta en curso no se compacta aunque se descarten los turnos anteriores
+            session.history.anchor = len(session.history) - 1
+            return session.history
+        return TokenBudgetChatHistory(
+            [
+                build_prompt_structure(
+                    prompt=self.full_system_prompt,
+                    role="system",
+                ),
+                user_prompt,
+            ],
+            max_tokens=self.history_max_tokens,
+            pinned=2,
+        )
 
-            # Validate and execute the tool call
-            validated_tool_call = validate_arguments(
-                tool_call, json.loads(tool.fn_signature)
+    def fast_path(self, user_msg: str, session: Session | None = None) -> str | None:
+        """
+        Tries to answer the question through the router, without calling the model.
+
+        Args:
+            user_msg (str): The user's input message.
+            session (Session | None): The conversation the question belongs to, if any.
+
+        Returns:
+            str | None: The answer, or None if the question needs the ReAct loop.
+        """
+        if self.router is None:
+            return None
+        with self.tracer.span("agent.fast_path") as span:
+            answer = self.router.answer(
+                user_msg, lambda tool_call: self.execute_tool_call(tool_call, session), self.tools_dict
             )
-            print(Fore.GREEN + f"\nTool call dict: \n{validated_tool_call}")
+            span.set_attribute("hit", answer is not None)
+            return answer
+
+    @staticmethod
+    def end_turn(chat_history: TokenBudgetChatHistory, answer: str, session: Session | None) -> None:
+        """
+        Records the answer of a question in its session, so that the next turns see it.
+        Without a session the history is discarded and nothing is done.
+        """
+        if session is None:
+            return
+        update_chat_history(chat_history, f"<response>{answer}</response>", "assistant")
+        session.turns += 1
+        session.touch()
+
+    def complete(self, chat_history: TokenBudgetChatHistory) -> str:
+        """
+        Asks the model for the next completion of the conversation, inside an 'llm.call' span
+        that records the prompt and completion token counts.
 
-            result = tool.run(**validated_tool_call["arguments"])
-            print(Fore.GREEN + f"\nTool result: \n{result}")
+        Args:
+            chat_history (TokenBudgetChatHistory): The conversation so far.
 
-            # Store the result using the tool call ID
-            observations[validated_tool_call["id"]] = result
+        Returns:
+            str: The completion.
+        """
+        with self.tracer.span("llm.call", model=self.model, stream=False) as span:
+            span.set_attribute("llm.prompt_tokens", chat_history.tokens())
+            completion = completions_create(
+                self.client, chat_history, self.model, cache=self.completion_cache
+            )
+            span.attributes.setdefault("llm.completion_tokens", estimate_tokens(completion))
+            return completion
 
-        return observations
+    def complete_stream(self, chat_history: TokenBudgetChatHistory) -> Iterator[str]:
+        """
+        Streaming counterpart of `complete`: yields the chunks of the completion as they arrive.
+        """
+        with self.tracer.span("llm.call", model=self.model, stream=True) as span:
+            span.set_attribute("llm.prompt_tokens", chat_history.tokens())
+            chunks = []
+            for chunk in completions_create(
+                self.client, chat_history, self.model, stream=True, cache=self.completion_cache
+            ):
+                chunks.append(chunk)
+                yield chunk
+            span.attributes.setdefault("llm.completion_tokens", estimate_tokens("".join(chunks)))
+
+    async def acomplete(self, chat_history: TokenBudgetChatHistory) -> str:
+        """
+        Async counterpart of `complete`.
+        """
+        with self.tracer.span("llm.call", model=self.model, stream=False) as span:
+            span.set_attribute("llm.prompt_tokens", chat_history.tokens())
+            completion = await acompletions_create(
+                self.async_client, chat_history, self.model, cache=self.completion_cache
+            )
+            span.attributes.setdefault("llm.completion_tokens", estimate_tokens(completion))
+            return completion
 
     def run(
         self,
         user_msg: str,
         max_rounds: int = 10,
+        session: Session | None = None,
     ) -> str:
         """
         Executes a user interaction session, where the agent processes user input, generates responses,
@@ -162,48 +613,277 @@ class ReactAgent:
         Args:
             user_msg (str): The user's input message to start the interaction.
             max_rounds (int, optional): Maximum number of interaction rounds the agent should perform. Default is 10.
+            session (Session | None, optional): A conversation to continue. Its history gives context to
+                the question and its memo answers repeated tool calls. Default is None.
 
         Returns:
             str: The final response generated by the agent after processing user input and any tool calls.
         """
-        user_prompt = build_prompt_structure(
-            prompt=user_msg, role="user", tag="question"
-        )
+        with (
+            session.lock if session else nullcontext(),
+            self.tracer.span("agent.run", question=user_msg, mode="sync"),
+        ):
+            chat_history = self.start_chat_history(user_msg, session)
+            answer = self.fast_path(user_msg, session)
+            if answer is None:
+                answer = self.react_loop(chat_history, max_rounds, session)
+            self.end_turn(chat_history, answer, session)
+            return answer
+
+    def react_loop(
+        self, chat_history: TokenBudgetChatHistory, max_rounds: int, session: Session | None
+    ) -> str:
+        """
+        Runs the ReAct rounds of `run` on a chat history that ends with the user's question.
+        """
         if self.tools:
-            self.system_prompt += (
-                "\n" + REACT_SYSTEM_PROMPT % self.add_tool_signatures()
-            )
+            # Run the ReAct loop for max_rounds
+            for round_number in range(max_rounds):
+                with self.tracer.span("agent.round", round=round_number) as span:
 
-        chat_history = ChatHistory(
-            [
-                build_prompt_structure(
-                    prompt=self.system_prompt,
-                    role="system",
-                ),
-                user_prompt,
-            ]
-        )
+                    completion = self.complete(chat_history)
+
+                    parsed = parse_completion(str(completion))
+                    if parsed.response is not None:
+                        return parsed.response
+
+                    update_chat_history(chat_history, completion, "assistant")
+
+                    span.set_attribute("thought", parsed.thought)
+
+                    if parsed.tool_calls or parsed.errors:
+                        observations = self.process_tool_calls(parsed.tool_calls, session)
+                        observations.update(self.parse_error_observations(parsed.errors))
+                        span.set_attribute("observations", observations)
+                        update_chat_history(chat_history, f"<observation>{observations}</observation>", "user")
+
+        return self.complete(chat_history)
+
+    def stream(
+        self,
+        user_msg: str,
+        max_rounds: int = 10,
+        session: Session | None = None,
+    ) -> Iterator[str]:
+        """
+        Streaming counterpart of `run`. Each completion is parsed while it is generated: every
+        `<tool_call>` starts executing as soon as its closing tag arrives, and the content of
+        the `<response>` is yielded to the caller chunk by chunk.
+
+        Args:
+            user_msg (str): The user's input message to start the interaction.
+            max_rounds (int, optional): Maximum number of interaction rounds the agent should perform. Default is 10.
+            session (Session | None, optional): A conversation to continue, as in `run`. Default is None.
 
+        Yields:
+            str: Consecutive chunks of the final response.
+        """
+        with (
+            session.lock if session else nullcontext(),
+            self.tracer.span("agent.run", question=user_msg, mode="stream"),
+        ):
+            chat_history = self.start_chat_history(user_msg, session)
+            answer = self.fast_path(user_msg, session)
+            if answer is not None:
+                yield answer
+            else:
+                answer = []
+                for chunk in self.stream_loop(chat_history, max_rounds, session):
+                    answer.append(chunk)
+                    yield chunk
+                answer = "".join(answer)
+            self.end_turn(chat_history, answer, session)
+
+    def stream_loop(
+        self, chat_history: TokenBudgetChatHistory, max_rounds: int, session: Session | None
+    ) -> Iterator[str]:
+        """
+        Runs the ReAct rounds of `stream` on a chat history that ends with the user's question.
+        """
         if self.tools:
             # Run the ReAct loop for max_rounds
-            for _ in range(max_rounds):
+            for round_number in range(max_rounds):
+                with self.tracer.span("agent.round", round=round_number) as span:
+
+                    parser = IncrementalTagParser()
+                    futures = {}
+                    errors = []
+                    chunks = []
+                    response_found = False
+                    for chunk in self.complete_stream(chat_history):
+                        chunks.append(chunk)
+                        for event in parser.feed(chunk):
+                            if event.tag == "response":
+                                response_found = True
+                                if not event.closed:
+                                    yield event.text
+                            elif event.tag == "thought" and event.closed:
+                                span.set_attribute("thought", event.text)
+                            elif event.tag == "tool_call" and event.closed:
+                                self.submit_streamed_tool_call(event.text, futures, errors, session)
+                    for event in parser.close():
+                        if event.tag == "response":
+                            response_found = True
+                            # Lo que se retuvo por si era el cierre de la etiqueta también es respuesta
+                            if not event.closed:
+                                yield event.text
+                        elif event.tag == "tool_call" and event.closed:
+                            self.submit_streamed_tool_call(event.text, futures, errors, session)
+
+                    if response_found:
+                        return
+
+                    update_chat_history(chat_history, "".join(chunks), "assistant")
+
+                    if futures or errors:
+                        observations = self.collect_tool_results(futures)
+                        observations.update(self.parse_error_observations(errors))
+                        span.set_attribute("observations", observations)
+                        update_chat_history(chat_history, f"<observation>{observations}</observation>", "user")
+
+        yield from self.complete_stream(chat_history)
+
+    def async_tool_limit(self, tool_name: str) -> "asyncio.Semaphore | None":
+        """
+        Returns the semaphore bounding the simultaneous async calls of a tool in the running
+        event loop, or None if the tool has no concurrency limit.
+        """
+        import asyncio
+
+        if tool_name not in self.tool_concurrency:
+            return None
+        limits = self._async_tool_limits.setdefault(asyncio.get_running_loop(), {})
+        if tool_name not in limits:
+            limits[tool_name] = asyncio.Semaphore(self.tool_concurrency[tool_name])
+        return limits[tool_name]
+
+    async def aexecute_tool_call(self, tool_call: dict, session: Session | None = None):
+        """
+        Async counterpart of `execute_tool_call`. Sync tools are offloaded to a worker thread
+        so that the event loop keeps serving other conversations. A tool that runs for longer
+        than `tool_timeout` is reported as an error.
+
+        Args:
+            tool_call (dict): The decoded tool call with 'name', 'arguments' and 'id' keys.
+            session (Session | None): The conversation the call belongs to, if any.
+
+        Returns:
+            The result of the tool, or a dict with an 'error' key if the call failed.
+        """
+        import asyncio
+
+        with self.tracer.span("tool.execute", tool=tool_call["name"], id=tool_call["id"]) as span:
+            try:
+                tool, arguments = self.prepare_tool_call(tool_call)
+                found, result = session.recall(tool.name, arguments) if session else (False, None)
+                span.set_attribute("memo.hit", found)
+                if not found:
+                    limit = self.async_tool_limit(tool.name)
+                    async with limit if limit is not None else nullcontext():
+                        # Como en el camino síncrono, la espera del límite no cuenta para el timeout
+                        result = await asyncio.wait_for(tool.arun(**arguments), self.tool_timeout)
+                    if session is not None:
+                        session.remember(tool.name, arguments, result)
+            except asyncio.TimeoutError:
+                result = {"error": f"Timeout: the tool did not answer within {self.tool_timeout} seconds"}
+            except Exception as e:
+                result = {"error": f"{type(e).__name__}: {e}"}
+                span.status = "error"
+            span.set_attribute("result", result)
+            return result
+
+    async def aprocess_tool_calls(self, tool_calls_content: list, session: Session | None = None) -> dict:
+        """
+        Async counterpart of `process_tool_calls`: runs the tool calls of a round concurrently
+        on the event loop, each bounded by `tool_timeout` once it starts running.
+
+        Args:
+            tool_calls_content (list): List of tool calls, either decoded dicts or strings in JSON format.
+            session (Session | None): The conversation the calls belong to, if any.
+
+        Returns:
+            dict: A dictionary where the keys are tool call IDs and values are the results from the tools.
+        """
+        import asyncio
+
+        tool_calls = []
+        for index, tool_call in enumerate(tool_calls_content):
+            if isinstance(tool_call, str):
+                tool_call = decode_tool_call(tool_call, index)
+            unique_call_id(tool_call, {call["id"] for call in tool_calls})
+            tool_calls.append(tool_call)
+
+        results = await asyncio.gather(
+            *(self.aexecute_tool_call(tool_call, session) for tool_call in tool_calls)
+        )
+        return {tool_call["id"]: result for tool_call, result in zip(tool_calls, results)}
+
+    async def arun(
+        self,
+        user_msg: str,
+        max_rounds: int = 10,
+        session: Session | None = None,
+    ) -> str:
+        """
+        Async counterpart of `run`. LLM calls use the async Groq client and tools run without
+        blocking the event loop, so one process can drive many conversations concurrently.
+
+        Args:
+            user_msg (str): The user's input message to start the interaction.
+            max_rounds (int, optional): Maximum number of interaction rounds the agent should perform. Default is 10.
+            session (Session | None, optional): A conversation to continue, as in `run`. Default is None.
 
-                completion = completions_create(self.client, chat_history, self.model)
+        Returns:
+            str: The final response generated by the agent after processing user input and any tool calls.
+        """
+        import asyncio
+
+        if self.async_client is None:
+            self.async_client = crear_cliente(asincrono=True)
+
+        if session is not None:
+            # El lock de la sesión es de hilos: se espera fuera del bucle de eventos
+            await aacquire(session.lock)
+        try:
+            with self.tracer.span("agent.run", question=user_msg, mode="async"):
+                chat_history = self.start_chat_history(user_msg, session)
+                answer = None
+                if self.router is not None and self.router.classify(user_msg) is not None:
+                    # Las herramientas del atajo son síncronas: se ejecutan en un hilo aparte
+                    answer = await asyncio.to_thread(self.fast_path, user_msg, session)
+                if answer is None:
+                    answer = await self.areact_loop(chat_history, max_rounds, session)
+                self.end_turn(chat_history, answer, session)
+                return answer
+        finally:
+            if session is not None:
+                session.lock.release()
+
+    async def areact_loop(
+        self, chat_history: TokenBudgetChatHistory, max_rounds: int, session: Session | None
+    ) -> str:
+        """
+        Async counterpart of `react_loop`.
+        """
+        if self.tools:
+            # Run the ReAct loop for max_rounds
+            for round_number in range(max_rounds):
+                with self.tracer.span("agent.round", round=round_number) as span:
 
-                response = extract_tag_content(str(completion), "response")
-                if response.found:
-                    return response.content[0]
+                    completion = await self.acomplete(chat_history)
 
-                thought = extract_tag_content(str(completion), "thought")
-                tool_calls = extract_tag_content(str(completion), "tool_call")
+                    parsed = parse_completion(str(completion))
+                    if parsed.response is not None:
+                        return parsed.response
 
-                update_chat_history(chat_history, completion, "assistant")
+                    update_chat_history(chat_history, completion, "assistant")
 
-                print(Fore.MAGENTA + f"\nThought: {thought.content[0]}")
+                    span.set_attribute("thought", parsed.thought)
 
-                if tool_calls.found:
-                    observations = self.process_tool_calls(tool_calls.content)
-                    print(Fore.BLUE + f"\nObservations: {observations}")
-                    update_chat_history(chat_history, f"{observations}", "user")
+                    if parsed.tool_calls or parsed.errors:
+                        observations = await self.aprocess_tool_calls(parsed.tool_calls, session)
+                        observations.update(self.parse_error_observations(parsed.errors))
+                        span.set_attribute("observations", observations)
+                        update_chat_history(chat_history, f"<observation>{observations}</observation>", "user")
 
-        return completions_create(self.client, chat_history, self.model)
\ No newline at end of file
+        return await self.acomplete(chat_history)
@@ -0,0 +1,155 @@
+"""
+Batch mode: runs many questions through one shared `ReactAgent`, so that the Groq client,
+the caches and the browser pool are created once and reused by every question.
+
+Questions are read as JSON lines, either objects with a "question" key (and an optional
+"id") or plain JSON strings. A malformed line is reported as an error result of its own and
+the rest of the batch goes on. Each answer is written as a JSON line with the statistics of
+its run, taken from the agent's trace:
+
+    {"id": 0, "question": "...", "answer": "...", "error": null,
+     "stats": {"duration_ms": 812.4, "rounds": 2, "llm_calls": 2, "tool_calls": 3, ...}}
+"""
+import json
+from concurrent.futures import FIRST_COMPLETED
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import as_completed
+from concurrent.futures import wait
+from typing import Iterable
+from typing import Iterator
+from typing import TextIO
+
+from agent import ReactAgent
+from utils.tracing import InMemoryExporter
+from utils.tracing import Span
+
+
+def read_questions(lines: Iterable[str]) -> Iterator[dict]:
+    """
+    Parses the questions of a JSONL input, skipping blank lines.
+
+    Args:
+        lines (Iterable[str]): The lines of the input, e.g. an open file or `sys.stdin`.
+
+    Yields:
+        dict: The question with its 'id' (the line number if it has none) and 'question' keys.
+            A line that is not a valid question has a None 'question' and an 'error' instead.
+    """
+    for number, line in enumerate(lines):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            item = json.loads(line)
+        except ValueError as e:
+            yield {"id": number, "question": None, "error": f"Line {number + 1} is not valid JSON: {e}"}
+            continue
+        if isinstance(item, str):
+            item = {"question": item}
+        if not isinstance(item, dict) or not isinstance(item.get("question"), str):
+            yield {"id": number, "question": None, "error": f"Line {number + 1} has no 'question': {line}"}
+            continue
+        yield {"id": item.get("id", number), "question": item["question"]}
+
+
+def question_stats(spans: list[Span]) -> dict:
+    """
+    Summarises the spans of one question.
+
+    Args:
+        spans (list[Span]): The finished spans of the question's trace.
+
+    Returns:
+        dict: Duration, number of rounds, LLM and tool calls, token counts, cache hits (including
+            results reused from a session's memo) and failed tool calls.
+    """
+    llm_calls = [span for span in spans if span.name == "llm.call"]
+    tool_calls = [span for span in spans if span.name == "tool.execute"]
+    root = next((span for span in spans if span.parent_id is None), None)
+    return {
+        "duration_ms": round(root.duration_ms, 1) if root is not None else None,
+        "rounds": sum(1 for span in spans if span.name == "agent.round"),
+        "llm_calls": len(llm_calls),
+        "llm_ms": round(sum(span.duration_ms for span in llm_calls), 1),
+        "prompt_tokens": sum(span.attributes.get("llm.prompt_tokens", 0) for span in llm_calls),
+        "completion_tokens": sum(span.attributes.get("llm.completion_tokens", 0) for span in llm_calls),
+        "llm_cache_hits": sum(1 for span in llm_calls if span.attributes.get("cache.hit")),
+        "tool_calls": len(tool_calls),
+        "tool_ms": round(sum(span.duration_ms for span in tool_calls), 1),
+        "tool_cache_hits": sum(
+            1 for span in tool_calls
+            if span.attributes.get("cache.hit") or span.attributes.get("store.hit")
+            or span.attributes.get("memo.hit")
+        ),
+        "tool_errors": sum(1 for span in tool_calls if span.status == "error"),
+    }
+
+
+def run_batch(
+    agent: ReactAgent,
+    questions: Iterable[dict],
+    concurrency: int = 4,
+    max_rounds: int = 10,
+) -> Iterator[dict]:
+    """
+    Answers the questions concurrently with a shared agent.
+
+    A question that fails, or a malformed input line, is reported with its 'error' instead of
+    stopping the batch, so a rate-limited or broken question only costs its own answer. At most
+    `concurrency * 2` questions are read ahead of the answers, so results are written as they
+    finish and a long input is never held in memory.
+
+    Args:
+        agent (ReactAgent): The agent shared by all the questions.
+        questions (Iterable[dict]): Questions with 'id' and 'question' keys.
+        concurrency (int): Number of questions answered at the same time.
+        max_rounds (int): Maximum number of ReAct rounds per question.
+
+    Yields:
+        dict: The result of each question, in the order in which they finish.
+    """
+    exporter = InMemoryExporter()
+    agent.tracer.add_exporter(exporter)
+
+    def answer(item: dict) -> dict:
+        result = {"id": item["id"], "question": item["question"], "answer": None, "error": item.get("error")}
+        if result["error"] is not None:
+            result["stats"] = question_stats([])
+            return result
+        try:
+            with agent.tracer.span("batch.question", id=item["id"]) as span:
+                result["answer"] = agent.run(item["question"], max_rounds=max_rounds)
+        except Exception as e:
+            result["error"] = f"{type(e).__name__}: {e}"
+        result["stats"] = question_stats(exporter.pop_trace(span.trace_id))
+        return result
+
+    try:
+        with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="batch") as pool:
+            # Solo se leen preguntas a medida que hay hueco: la entrada puede no tener fin
+            pending = set()
+            for item in questions:
+                pending.add(pool.submit(answer, item))
+                if len(pending) >= concurrency * 2:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        yield future.result()
+            for future in as_completed(pending):
+                yield future.result()
+    finally:
+        agent.tracer.exporters.remove(exporter)
+
+
+def write_results(results: Iterable[dict], output: TextIO) -> int:
+    """
+    Writes each result as a JSON line as soon as it is available.
+
+    Returns:
+        int: The number of results written.
+    """
+    count = 0
+    for result in results:
+        output.write(json.dumps(result, ensure_ascii=False, default=str) + "\n")
+        output.flush()
+        count += 1
+    return count
@@ -0,0 +1,147 @@
+"""
+Fakes used by the benchmarks: a scriptable Groq client that replays recorded completions and
+tools with configurable latency, so the full ReAct loop runs without network access.
+"""
+import asyncio
+import threading
+import time
+from types import SimpleNamespace
+
+from tool import Tool
+from tool import tool
+from utils.completions import estimate_tokens
+
+# Completions replayed for every conversation, one per round. The last one must be a response.
+DEFAULT_SCRIPT = [
+    '<thought>I need the current prices of the coins to compare them</thought>\n'
+    '<tool_call>{"name": "get_actual_data", "arguments": {"moneda": "bitcoin"}, "id": 0}</tool_call>\n'
+    '<tool_call>{"name": "get_actual_data", "arguments": {"moneda": "ethereum"}, "id": 1}</tool_call>\n'
+    '<tool_call>{"name": "get_actual_data", "arguments": {"moneda": "solana"}, "id": 2}</tool_call>',
+    '<thought>I need the historical data of bitcoin for the last week</thought>\n'
+    '<tool_call>{"name": "get_historic_range", "arguments": {"moneda": "bitcoin", '
+    '"fecha_inicio": "Jan 12, 2024", "fecha_fin": "Jan 19, 2024"}, "id": 3}</tool_call>',
+    "<response>Bitcoin trades at $96,065.33, Ethereum at $2,704.12 and Solana at $196.40. "
+    "Over the last week Bitcoin moved between $41,000 and $43,000.</response>",
+]
+
+
+class ScriptedGroqClient:
+    """
+    A stand-in for `Groq` and `AsyncGroq` that replays a script of completions.
+
+    The completion returned for a request is chosen by the number of assistant messages
+    already in the conversation, so concurrent conversations replay the script independently.
+    Every call is recorded in `calls` with its conversation, timing and token estimates.
+
+    Attributes:
+        script (list[str]): The completions, one per round.
+        latency (float): Seconds each call takes.
+        chunk_size (int): Characters per chunk when streaming.
+        calls (list[dict]): The recorded calls.
+    """
+
+    def __init__(self, script: list[str] | None = None, latency: float = 0.0, chunk_size: int = 8):
+        self.script = script or DEFAULT_SCRIPT
+        self.latency = latency
+        self.chunk_size = chunk_size
+        self.calls: list[dict] = []
+        self._lock = threading.Lock()
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self._create))
+
+    def _completion_for(self, messages: list) -> str:
+        rounds = sum(1 for msg in messages if msg["role"] == "assistant")
+        return self.script[min(rounds, len(self.script) - 1)]
+
+    def _record(self, messages: list, completion: str, start: float) -> None:
+        with self._lock:
+            self.calls.append({
+                "conversation": messages[1]["content"] if len(messages) > 1 else "",
+                "start": start,
+                "end": time.perf_counter(),
+                "prompt_tokens": sum(estimate_tokens(msg["content"]) for msg in messages),
+                "completion_tokens": estimate_tokens(completion),
+            })
+
+    @staticmethod
+    def _message(completion: str):
+        return SimpleNamespace(
+            choices=[SimpleNamespace(message=SimpleNamespace(content=completion))]
+        )
+
+    def _chunks(self, completion: str):
+        for i in range(0, len(completion), self.chunk_size):
+            yield SimpleNamespace(
+                choices=[SimpleNamespace(delta=SimpleNamespace(content=completion[i:i + self.chunk_size]))]
+            )
+
+    def _create(self, messages: list, model: str, stream: bool = False):
+        start = time.perf_counter()
+        completion = self._completion_for(messages)
+        time.sleep(self.latency)
+        self._record(messages, completion, start)
+        return self._chunks(completion) if stream else self._message(completion)
+
+    def as_async(self) -> "AsyncScriptedGroqClient":
+        """Returns an async view of this client that shares its script and records."""
+        return AsyncScriptedGroqClient(self)
+
+
+class AsyncScriptedGroqClient:
+    """The `AsyncGroq` counterpart of `ScriptedGroqClient`."""
+
+    def __init__(self, client: ScriptedGroqClient):
+        self.client = client
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self._create))
+
+    async def _create(self, messages: list, model: str):
+        start = time.perf_counter()
+        completion = self.client._completion_for(messages)
+        await asyncio.sleep(self.client.latency)
+        self.client._record(messages, completion, start)
+        return self.client._message(completion)
+
+
+class ToolTimings:
+    """Thread-safe record of the durations of the fake tool executions."""
+
+    def __init__(self) -> None:
+        self.durations: list[float] = []
+        self._lock = threading.Lock()
+
+    def add(self, seconds: float) -> None:
+        with self._lock:
+            self.durations.append(seconds)
+
+
+def make_fake_tools(latency: float = 0.05, timings: ToolTimings | None = None) -> list[Tool]:
+    """
+    Builds tools with the same names and signatures as the ones of main.py that sleep for
+    `latency` seconds and return canned data.
+
+    Args:
+        latency (float): Seconds each tool call takes.
+        timings (ToolTimings | None): Where to record the duration of each call.
+
+    Returns:
+        list[Tool]: The fake tools.
+    """
+
+    def simulate(result: dict) -> dict:
+        start = time.perf_counter()
+        time.sleep(latency)
+        if timings is not None:
+            timings.add(time.perf_counter() - start)
+        return result
+
+    def get_actual_data(moneda: str) -> dict:
+        return simulate({"Precio": "$96,065.33"})
+
+    def get_historic_data(moneda: str, fecha: str) -> dict:
+        return simulate(
+            {"Apertura": "$189.76", "Alza": "$203.15", "Baja": "$188.48", "MarketCap": "$93,740,476,812"}
+        )
+
+    def get_historic_range(moneda: str, fecha_inicio: str, fecha_fin: str) -> dict:
+        return simulate({"Fecha": ["2024-01-12", "2024-01-13"], "Cierre": ["$42,000.00", "$41,500.00"]})
+
+    return [tool(fn) for fn in (get_actual_data, get_historic_data, get_historic_range)]
@@ -0,0 +1,73 @@
+"""
+Import-time budget check for the CLI entry point.
+
+Imports a module in fresh interpreters, measures how long the import takes and verifies that
+none of the heavy dependencies (Groq client, Selenium, webdriver_manager, NumPy, requests)
+were loaded by it: those must only be imported on first use of the tool or client that needs
+them. Exits with status 1 if the median import time exceeds the budget or a heavy module was
+imported, so it can run in CI. Run from the repository root:
+
+    python -m bench.import_time --budget-ms 150
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+# Raíz del repositorio, desde la que se importa el módulo medido
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Presupuesto por defecto de la mediana del tiempo de importación
+BUDGET_MS = 150.0
+
+# Dependencias que no deben cargarse al importar el módulo
+HEAVY_MODULES = ("groq", "selenium", "webdriver_manager", "numpy", "requests", "dotenv")
+
+PROBE = """
+import json, sys, time
+before = set(sys.modules)
+start = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - start
+print(json.dumps({{"ms": elapsed * 1000, "modules": sorted(set(sys.modules) - before)}}))
+"""
+
+
+def measure(module: str) -> dict:
+    """Imports `module` in a fresh interpreter and returns its import time and new modules."""
+    output = subprocess.run(
+        [sys.executable, "-c", PROBE.format(module=module)],
+        capture_output=True, text=True, check=True, cwd=ROOT,
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def heavy_modules(runs: list[dict]) -> list[str]:
+    """Returns the packages of `HEAVY_MODULES` loaded by any of the measured imports."""
+    return sorted({
+        name.split(".")[0] for run in runs for name in run["modules"]
+        if name.split(".")[0] in HEAVY_MODULES
+    })
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--module", default="main", help="module to import")
+    parser.add_argument("--budget-ms", type=float, default=BUDGET_MS, help="maximum median import time")
+    parser.add_argument("--runs", type=int, default=5, help="fresh interpreters to measure")
+    args = parser.parse_args()
+
+    runs = [measure(args.module) for _ in range(args.runs)]
+    median_ms = statistics.median(run["ms"] for run in runs)
+    heavy = heavy_modules(runs)
+
+    print(f"import {args.module}: median {median_ms:.1f} ms over {args.runs} runs (budget {args.budget_ms:.0f} ms)")
+    if heavy:
+        print(f"heavy modules imported eagerly: {', '.join(heavy)}")
+    return 0 if median_ms <= args.budget_ms and not heavy else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
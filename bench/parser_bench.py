@@ -0,0 +1,58 @@
+"""
+Micro-benchmark of the completion parser over a corpus of recorded completions.
+
+Compares the previous approach (three `extract_tag_content` calls plus `json.loads` per tool
+call) with the single-pass `parse_completion`. Run from the repository root:
+
+    python -m bench.parser_bench [--corpus bench/completions.jsonl] [--repeat 2000]
+"""
+import argparse
+import json
+import timeit
+
+from utils.extraction import extract_tag_content
+from utils.extraction import parse_completion
+
+
+def load_corpus(path: str) -> list[str]:
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line)["completion"] for line in f if line.strip()]
+
+
+def parse_with_extract_tag_content(text: str):
+    response = extract_tag_content(text, "response")
+    if response.found:
+        return response.content[0]
+    extract_tag_content(text, "thought")
+    tool_calls = extract_tag_content(text, "tool_call")
+    decoded = []
+    for tool_call in tool_calls.content:
+        try:
+            decoded.append(json.loads(tool_call))
+        except ValueError:
+            pass
+    return decoded
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--corpus", default="bench/completions.jsonl")
+    parser.add_argument("--repeat", type=int, default=2000)
+    args = parser.parse_args()
+
+    corpus = load_corpus(args.corpus)
+    results = {}
+    for name, fn in (
+        ("extract_tag_content", parse_with_extract_tag_content),
+        ("parse_completion", parse_completion),
+    ):
+        seconds = min(
+            timeit.repeat(lambda: [fn(text) for text in corpus], number=args.repeat, repeat=3)
+        )
+        results[name] = seconds / (args.repeat * len(corpus)) * 1e6
+
+    print(json.dumps({"completions": len(corpus), "us_per_completion": results}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
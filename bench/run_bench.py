@@ -0,0 +1,160 @@
+"""
+End-to-end benchmark of the ReAct loop with a fake LLM and fake tools.
+
+Replays a script of recorded completions through `ReactAgent` at several concurrency levels
+and reports per-round latency, parse time, tool time, tokens per round and throughput. The
+results are written as JSON so that runs on different commits can be compared. Run from the
+repository root:
+
+    python -m bench.run_bench --concurrency 1,4,16 --conversations 32 --output bench_output.json
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import statistics
+import subprocess
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from agent import ReactAgent
+from bench.fakes import DEFAULT_SCRIPT
+from bench.fakes import ScriptedGroqClient
+from bench.fakes import ToolTimings
+from bench.fakes import make_fake_tools
+from utils.extraction import parse_completion
+
+
+def percentiles(values: list[float]) -> dict:
+    """Summarises a list of measurements in milliseconds."""
+    if not values:
+        return {"count": 0}
+    ordered = sorted(values)
+    pick = lambda q: ordered[min(len(ordered) - 1, int(q * len(ordered)))] * 1000  # noqa: E731
+    return {
+        "count": len(ordered),
+        "mean_ms": statistics.fmean(ordered) * 1000,
+        "p50_ms": pick(0.50),
+        "p95_ms": pick(0.95),
+        "max_ms": ordered[-1] * 1000,
+    }
+
+
+def round_latencies(calls: list[dict]) -> list[float]:
+    """
+    Latency of each round of each conversation: from the start of an LLM call to the start
+    of the next one (which includes running the tools), or to the end of the last call.
+    """
+    by_conversation: dict[str, list[dict]] = {}
+    for call in calls:
+        by_conversation.setdefault(call["conversation"], []).append(call)
+    latencies = []
+    for conversation_calls in by_conversation.values():
+        conversation_calls.sort(key=lambda call: call["start"])
+        for current, following in zip(conversation_calls, conversation_calls[1:]):
+            latencies.append(following["start"] - current["start"])
+        latencies.append(conversation_calls[-1]["end"] - conversation_calls[-1]["start"])
+    return latencies
+
+
+def parse_time(script: list[str], repeat: int = 1000) -> dict:
+    """Average time to parse each completion of the script."""
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for completion in script:
+            parse_completion(completion)
+    elapsed = time.perf_counter() - start
+    return {"mean_us": elapsed / (repeat * len(script)) * 1e6}
+
+
+def run_level(args, concurrency: int) -> dict:
+    """Runs `args.conversations` conversations with the given concurrency and collects metrics."""
+    client = ScriptedGroqClient(latency=args.llm_latency)
+    timings = ToolTimings()
+    agent = ReactAgent(
+        tools=make_fake_tools(args.tool_latency, timings),
+        client=client,
+        async_client=client.as_async(),
+        max_workers=max(8, concurrency * 4),
+    )
+    questions = [f"benchmark question {i}" for i in range(args.conversations)]
+
+    start = time.perf_counter()
+    # La salida por consola del agente no forma parte de lo que se mide
+    with contextlib.redirect_stdout(io.StringIO()):
+        if args.mode == "async":
+
+            async def main():
+                semaphore = asyncio.Semaphore(concurrency)
+
+                async def ask(question):
+                    async with semaphore:
+                        return await agent.arun(question)
+
+                return await asyncio.gather(*(ask(q) for q in questions))
+
+            asyncio.run(main())
+        else:
+            with ThreadPoolExecutor(max_workers=concurrency) as pool:
+                list(pool.map(agent.run, questions))
+    elapsed = time.perf_counter() - start
+    agent.executor.shutdown(wait=True)
+
+    rounds = len(client.calls)
+    return {
+        "concurrency": concurrency,
+        "conversations": args.conversations,
+        "elapsed_s": elapsed,
+        "throughput_conversations_per_s": args.conversations / elapsed,
+        "rounds": rounds,
+        "round_latency": percentiles(round_latencies(client.calls)),
+        "tool_time": percentiles(timings.durations),
+        "prompt_tokens_per_round": statistics.fmean(c["prompt_tokens"] for c in client.calls) if rounds else 0,
+        "completion_tokens_per_round": statistics.fmean(c["completion_tokens"] for c in client.calls) if rounds else 0,
+    }
+
+
+def git_commit() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except Exception:
+        return None
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--concurrency", default="1,4,16", help="Comma separated concurrency levels")
+    parser.add_argument("--conversations", type=int, default=32)
+    parser.add_argument("--llm-latency", type=float, default=0.05, help="Seconds per fake LLM call")
+    parser.add_argument("--tool-latency", type=float, default=0.05, help="Seconds per fake tool call")
+    parser.add_argument("--mode", choices=("sync", "async"), default="sync")
+    parser.add_argument("--output", default="bench_output.json")
+    args = parser.parse_args()
+
+    results = {
+        "commit": git_commit(),
+        "timestamp": time.time(),
+        "mode": args.mode,
+        "llm_latency_s": args.llm_latency,
+        "tool_latency_s": args.tool_latency,
+        "parse_time": parse_time(DEFAULT_SCRIPT),
+        "levels": [run_level(args, int(c)) for c in args.concurrency.split(",")],
+    }
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2)
+
+    for level in results["levels"]:
+        print(
+            f"concurrency={level['concurrency']:>3}  "
+            f"throughput={level['throughput_conversations_per_s']:8.2f} conv/s  "
+            f"round p50={level['round_latency']['p50_ms']:7.1f} ms  "
+            f"tokens/round={level['prompt_tokens_per_round']:7.0f}"
+        )
+    print(f"Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,84 +1,153 @@
 from tool import tool
 from agent import ReactAgent
-from selenium import webdriver
-from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from webdriver_manager.chrome import ChromeDriverManager
+from agent import fecha_formateada
+from functools import lru_cache
+from utils.cache import TTLCache
+from utils.completions import CompletionCache
+from utils.data_sources import FallbackDataSource
+from utils.data_sources import HttpDataSource
+from utils.data_sources import SeleniumDataSource
+from utils.driver_pool import DriverPool
+from utils.fast_path import FastPathRouter
+from utils.historic_store import HistoricStore
+from utils.historic_store import normalize_date
+from utils.prefetch import Prefetcher
+from utils.resilience import CircuitBreaker
+from utils.resilience import LatencyTracker
+from utils.resilience import ResilientDataSource
+from utils.resilience import ResilientTool
+from utils.resilience import breaker_stats
+from utils.sessions import Session
+from utils.sessions import SessionStore
+from utils.tracing import ConsoleExporter
+from utils.tracing import JsonLinesExporter
+from utils.tracing import OTLPJsonExporter
+from utils.tracing import Tracer
+from utils.tracing import set_attribute
+from datetime import date
+from datetime import timedelta
 import math
+import os
+import threading
+
+
+@lru_cache(maxsize=1)
+def chromedriver_path() -> str:
+    # La descarga/verificación del driver se hace una única vez por proceso
+    from webdriver_manager.chrome import ChromeDriverManager
+
+    return ChromeDriverManager().install()
+
+
+def crear_driver():
+    # selenium solo se importa cuando hace falta un navegador
+    from selenium import webdriver
+    from selenium.webdriver.chrome.service import Service
+
+    options = webdriver.ChromeOptions()
+    options.add_argument("--headless")
+    return webdriver.Chrome(
+        service=Service(chromedriver_path()),
+        options=options
+    )
+
+
+# Pool de navegadores compartido por todas las herramientas de scraping
+DRIVER_POOL = DriverPool(
+    factory=crear_driver,
+    size=int(os.getenv("DRIVER_POOL_SIZE", "2")),
+    max_pages=int(os.getenv("DRIVER_POOL_MAX_PAGES", "50")),
+    checkout_timeout=float(os.getenv("DRIVER_POOL_TIMEOUT", "30")),
+)
+
+# Almacén persistente de las filas OHLC ya vistas en las páginas de datos históricos
+HISTORIC_STORE = HistoricStore(os.getenv("HISTORIC_STORE_PATH", "historic_data.sqlite3"))
+
+
+def parse_ttl_overrides(valor: str) -> dict:
+    # Formato: "bitcoin=10,ethereum=20" (segundos por moneda)
+    overrides = {}
+    for par in filter(None, (p.strip() for p in valor.split(","))):
+        moneda, ttl = par.split("=")
+        overrides[moneda.strip().lower()] = float(ttl)
+    return overrides
+
+
+# Caché de precios al contado con TTL por moneda y desalojo LRU
+PRICE_CACHE = TTLCache(
+    ttl=float(os.getenv("PRICE_CACHE_TTL", "30")),
+    max_size=int(os.getenv("PRICE_CACHE_SIZE", "256")),
+    ttl_overrides=parse_ttl_overrides(os.getenv("PRICE_CACHE_TTL_OVERRIDES", "")),
+)
+
+
+def resistente(fuente) -> ResilientDataSource:
+    # El timeout configurado es el máximo: se acorta según la latencia observada (p95 x 2) de
+    # cada método por separado
+    return ResilientDataSource(
+        fuente,
+        breaker=CircuitBreaker(
+            f"{fuente.name} backend",
+            failure_threshold=int(os.getenv("BREAKER_FAILURES", "5")),
+            reset_timeout=float(os.getenv("BREAKER_RESET", "30")),
+        ),
+        latency_factory=lambda: LatencyTracker(default=fuente.timeout, maximum=fuente.timeout),
+    )
+
+
+def crear_fuente_datos() -> FallbackDataSource:
+    # Orden de los backends, del más rápido al más costoso: "http,selenium"
+    backends = {
+        "http": lambda: HttpDataSource(timeout=float(os.getenv("HTTP_TIMEOUT", "10"))),
+        "selenium": lambda: SeleniumDataSource(DRIVER_POOL, timeout=float(os.getenv("SELENIUM_TIMEOUT", "10"))),
+    }
+    nombres = os.getenv("DATA_SOURCES", "http,selenium").split(",")
+    return FallbackDataSource([resistente(backends[n.strip()]()) for n in nombres if n.strip()])
+
+
+# Fuente de datos de mercado: HTTP ligero y Selenium solo como respaldo
+DATA_SOURCE = crear_fuente_datos()
 
 
 @tool
 def get_actual_data(moneda: str) -> dict:
-    
 
-    class Scraper:
-        def __init__(self, moneda: str):
-            self.moneda = moneda
-            self.url = f"https://coinmarketcap.com/es/currencies/{self.moneda}/"
-            self.options = webdriver.ChromeOptions()
-            self.options.add_argument("--headless")
-        
-        def run(self) -> str:
-            driver = webdriver.Chrome(
-                service=Service(ChromeDriverManager().install()),
-                options=self.options
-            )
-            driver.get(self.url)
-            try:
-                # Se busca el elemento que contiene el precio
-                span = driver.find_element(By.CLASS_NAME, "sc-65e7f566-0.WXGwg.base-text")
-                resultado = span.text
-            except Exception as e:
-                resultado = f"Error: {e}"
-            driver.quit()
-            return resultado
-
-    resultado = Scraper(moneda).run()
-    if resultado.startswith("Error:"):
-        return {"error": resultado}
-    return {"Precio": resultado}
+    clave = moneda.strip().lower()
+    PREFETCHER.record("price", clave)
+    # Las peticiones concurrentes de la misma moneda comparten un único scraping; los fallos
+    # se propagan para que la herramienta reintente los transitorios y no se guardan en la caché
+    return PRICE_CACHE.get_or_compute(clave, lambda: {"Precio": DATA_SOURCE.spot_price(moneda)})
+
+
+def registrar_serie(moneda: str, inicio: str, fin: str) -> None:
+    # Solo se precargan periodos con fechas válidas que aún pueden cambiar: un periodo pasado
+    # ya guardado no se refresca nunca, y una fecha mal escrita fallaría en cada ciclo
+    try:
+        if date.fromisoformat(inicio) > date.fromisoformat(fin):
+            return
+        if date.fromisoformat(fin) < date.today() - timedelta(days=1):
+            return
+    except ValueError:
+        return
+    PREFETCHER.record("historic", (moneda.strip().lower(), inicio, fin))
 
 
 @tool
 def get_historic_data(moneda: str, fecha: str) -> dict:
-    
-    class Scraper:
-        def __init__(self, moneda: str, fecha: str):
-            self.moneda = moneda
-            self.fecha = fecha
-            self.url = f"https://coinmarketcap.com/es/currencies/{self.moneda}/historical-data/"
-            self.options = webdriver.ChromeOptions()
-            self.options.add_argument("--headless")
-        
-        def run(self) -> dict:
-            driver = webdriver.Chrome(
-                service=Service(ChromeDriverManager().install()),
-                options=self.options
-            )
-            driver.get(self.url)
-            wait = WebDriverWait(driver, 10)
-            try:
-                # Se localiza la fila que contiene la fecha indicada
-                fila = wait.until(
-                    EC.visibility_of_element_located(
-                        (By.XPATH, f"//tbody/tr[td[normalize-space(text())='{self.fecha}']]")
-                    )
-                )
-                columnas = fila.find_elements(By.TAG_NAME, "td")
-                resultado = {
-                    "Apertura": columnas[1].text,
-                    "Alza": columnas[2].text,
-                    "Baja": columnas[3].text,
-                    "MarketCap": columnas[6].text
-                }
-            except Exception as e:
-                resultado = {"error": str(e)}
-            driver.quit()
-            return resultado
-
-    return Scraper(moneda, fecha).run()
+
+    dia = normalize_date(fecha)
+    registrar_serie(moneda, dia, dia)
+    # Los datos históricos no cambian: se consulta primero el almacén local
+    resultado = HISTORIC_STORE.get(moneda, fecha)
+    set_attribute("store.hit", resultado is not None)
+    if resultado is not None:
+        return resultado
+
+    # Se guardan todas las filas cargadas, no solo la pedida
+    HISTORIC_STORE.put_rows(moneda, DATA_SOURCE.historic_rows(moneda))
+    return HISTORIC_STORE.get(moneda, fecha) or {
+        "error": f"No hay datos de {moneda} para {fecha}"
+    }
 
 @tool
 def indicators_tool(moneda: str, fecha: str, Apertura: str, Alza: str, Baja: str, MarketCap: str):
@@ -129,13 +198,305 @@ def indicators_tool(moneda: str, fecha: str, Apertura: str, Alza: str, Baja: str
     }
 
 
+def cargar_serie(moneda: str, inicio: str, fin: str, inicio_carga: str | None = None) -> None:
+    # Si el almacén local no cubre el periodo se carga de una vez desde `inicio_carga`
+    ayer = (date.today() - timedelta(days=1)).isoformat()
+    fin_cubierto = min(fin, ayer)
+    serie = HISTORIC_STORE.get_range(moneda, inicio, fin_cubierto)
+    dias = (date.fromisoformat(fin_cubierto) - date.fromisoformat(inicio)).days + 1
+    set_attribute("store.hit", len(serie["Fecha"]) >= dias)
+    if len(serie["Fecha"]) < dias:
+        filas = DATA_SOURCE.historic_range(moneda, inicio_carga or inicio, fin)
+        HISTORIC_STORE.put_rows(moneda, filas)
+
+
+@tool
+def get_historic_range(moneda: str, fecha_inicio: str, fecha_fin: str) -> dict:
+    """
+    Devuelve los datos históricos de una moneda para todos los días entre fecha_inicio y
+    fecha_fin (ambos incluidos) con una sola carga de página.
+
+    Recibe los siguientes parámetros:
+      - moneda: la moneda (ej. "ethereum")
+      - fecha_inicio: primer día del periodo (ej. "Jan 12, 2024")
+      - fecha_fin: último día del periodo (ej. "Jan 19, 2024")
+
+    Retorna una tabla por columnas, del día más antiguo al más reciente:
+      {"Fecha": [...], "Apertura": [...], "Alza": [...], "Baja": [...], "Cierre": [...], "Volumen": [...], "MarketCap": [...]}
+    """
+    inicio = normalize_date(fecha_inicio)
+    fin = normalize_date(fecha_fin)
+    registrar_serie(moneda, inicio, fin)
+    cargar_serie(moneda, inicio, fin)
+    serie = HISTORIC_STORE.get_range(moneda, inicio, fin)
+    if not serie["Fecha"]:
+        return {"error": f"No hay datos de {moneda} entre {fecha_inicio} y {fecha_fin}"}
+    return serie
+
+
+@tool
+def indicators_batch_tool(monedas: list[str], fecha_inicio: str, fecha_fin: str, ventanas: list[int] = (7, 30)):
+    """
+    Calcula los indicadores de indicators_tool para varias monedas y todos los días de un
+    periodo en una sola llamada, usando la serie histórica de cada moneda.
+
+    Recibe los siguientes parámetros:
+      - monedas: lista de monedas (ej. ["bitcoin", "ethereum"])
+      - fecha_inicio: primer día del periodo (ej. "Jan 12, 2024")
+      - fecha_fin: último día del periodo (ej. "Apr 12, 2024")
+      - ventanas: lista de días de las volatilidades móviles (ej. [7, 30])
+
+    Retorna, por cada moneda, una tabla por columnas con:
+      - fecha, volatilidad, potencial_ganancia, potencial_perdida,
+        ratio_riesgo_beneficio, indice_riesgo_simple (mismas fórmulas que indicators_tool)
+      - volatilidad_<N>d: desviación típica de los rendimientos diarios en los últimos N días
+      - resumen: volatilidad media y máxima del periodo y volatilidad de los rendimientos diarios
+    """
+    from utils import indicators
+
+    inicio = normalize_date(fecha_inicio)
+    fin = normalize_date(fecha_fin)
+    # El validador ya convierte a lista; los elementos pueden llegar como texto ("7")
+    lista_ventanas = list(ventanas)
+    # Se cargan días previos al periodo para que las ventanas móviles estén completas
+    inicio_extendido = (
+        date.fromisoformat(inicio) - timedelta(days=max(lista_ventanas, default=0))
+    ).isoformat()
+
+    resultado = {}
+    for moneda in filter(None, (str(m).strip().lower() for m in monedas)):
+        registrar_serie(moneda, inicio_extendido, fin)
+        try:
+            cargar_serie(moneda, inicio, fin, inicio_carga=inicio_extendido)
+        except Exception as e:
+            resultado[moneda] = {"error": str(e)}
+            continue
+        serie = HISTORIC_STORE.get_range(moneda, inicio_extendido, fin)
+        # Posición del primer día del periodo pedido dentro de la serie extendida
+        desde = next((i for i, f in enumerate(serie["Fecha"]) if f >= inicio), len(serie["Fecha"]))
+        if desde == len(serie["Fecha"]):
+            resultado[moneda] = {"error": f"No hay datos de {moneda} entre {fecha_inicio} y {fecha_fin}"}
+            continue
+
+        cierre = indicators.parse_amounts(serie["Cierre"])
+        valores = indicators.compute_indicators(
+            indicators.parse_amounts(serie["Apertura"]),
+            indicators.parse_amounts(serie["Alza"]),
+            indicators.parse_amounts(serie["Baja"]),
+            indicators.parse_amounts(serie["MarketCap"]),
+        )
+        for ventana in lista_ventanas:
+            valores[f"volatilidad_{ventana}d"] = indicators.rolling_volatility(cierre, ventana)
+
+        tabla = {"fecha": serie["Fecha"][desde:]}
+        tabla.update({k: indicators.to_list(v[desde:]) for k, v in valores.items()})
+        tabla["resumen"] = indicators.period_summary(valores["volatilidad"][desde:], cierre[desde:])
+        resultado[moneda] = tabla
+    return resultado
+
+
+def refrescar_precio(moneda: str) -> None:
+    # Se guarda en la misma caché que consulta get_actual_data, reiniciando su TTL
+    PRICE_CACHE.set(moneda, {"Precio": DATA_SOURCE.spot_price(moneda)})
+
+
+# Último día cerrado con el que se descargó cada periodo refrescado en segundo plano
+SERIES_REFRESCADAS: dict[tuple[str, str, str], str] = {}
+
+
+def refrescar_serie(clave: tuple[str, str, str]) -> None:
+    # Solo descarga si al almacén le faltan días del periodo (p. ej. el día que acaba de cerrar).
+    # Un periodo con huecos en la fuente no se vuelve a descargar hasta que cierre un día nuevo
+    # que caiga dentro de él: la fuente no puede devolver nada más antes
+    moneda, inicio, fin = clave
+    ayer = (date.today() - timedelta(days=1)).isoformat()
+    if SERIES_REFRESCADAS.get(clave, "") >= min(fin, ayer):
+        return
+    cargar_serie(moneda, inicio, fin)
+    SERIES_REFRESCADAS[clave] = ayer
+
+
+def crear_prefetcher() -> Prefetcher:
+    # Por defecto se refresca a mitad del TTL para que las monedas populares nunca caduquen
+    prefetcher = Prefetcher(
+        interval=float(os.getenv("PREFETCH_INTERVAL", str(PRICE_CACHE.ttl / 2))),
+        jitter=float(os.getenv("PREFETCH_JITTER", "0.2")),
+        max_concurrency=int(os.getenv("PREFETCH_CONCURRENCY", "2")),
+        top=int(os.getenv("PREFETCH_TOP", "10")),
+        min_score=float(os.getenv("PREFETCH_MIN_REQUESTS", "2")),
+    )
+    prefetcher.register("price", refrescar_precio)
+    prefetcher.register("historic", refrescar_serie)
+    # Monedas que se mantienen calientes desde el arranque: "bitcoin,ethereum"
+    prefetcher.pin("price", [m.strip().lower() for m in os.getenv("PREFETCH_COINS", "").split(",") if m.strip()])
+    return prefetcher
+
+
+# Refresco en segundo plano de los precios y periodos más consultados
+PREFETCHER = crear_prefetcher()
+
+
+# Caché de respuestas del modelo: las preguntas repetidas no vuelven a llamar al LLM
+COMPLETION_CACHE = CompletionCache(
+    ttl=float(os.getenv("COMPLETION_CACHE_TTL", "3600")),
+    max_size=int(os.getenv("COMPLETION_CACHE_SIZE", "1024")),
+    path=os.getenv("COMPLETION_CACHE_PATH") or None,
+)
+
+
+def crear_tracer() -> Tracer:
+    # La consola es un destino más: TRACE_CONSOLE=0 la desactiva en producción
+    exporters = []
+    if os.getenv("TRACE_CONSOLE", "1") != "0":
+        exporters.append(ConsoleExporter())
+    if os.getenv("TRACE_FILE"):
+        exporters.append(JsonLinesExporter(os.environ["TRACE_FILE"]))
+    if os.getenv("TRACE_OTLP_FILE"):
+        exporters.append(OTLPJsonExporter(os.environ["TRACE_OTLP_FILE"]))
+    return Tracer(exporters)
+
+
+# Trazas de cada ejecución, ronda, llamada al LLM y herramienta
+TRACER = crear_tracer()
+
+# Las preguntas simples de precio o de un día se responden sin pasar por el LLM
+ROUTER = FastPathRouter(today=fecha_formateada) if os.getenv("FAST_PATH", "1") != "0" else None
+
+def con_reintentos(herramienta):
+    # Reintentos con backoff y un circuit breaker por herramienta; el error llega resumido al LLM
+    return ResilientTool(
+        herramienta,
+        breaker=CircuitBreaker(
+            herramienta.name,
+            failure_threshold=int(os.getenv("BREAKER_FAILURES", "5")),
+            reset_timeout=float(os.getenv("BREAKER_RESET", "30")),
+        ),
+        attempts=int(os.getenv("TOOL_ATTEMPTS", "3")),
+        deadline=float(os.getenv("TOOL_RETRY_DEADLINE", "30")),
+    )
+
 
 agent = ReactAgent(
     model="llama-3.3-70b-versatile",
-    tools=[get_historic_data, get_actual_data, indicators_tool]
+    completion_cache=COMPLETION_CACHE,
+    tracer=TRACER,
+    router=ROUTER,
+    tools=[
+        con_reintentos(get_historic_data),
+        con_reintentos(get_historic_range),
+        con_reintentos(get_actual_data),
+        indicators_tool,
+        indicators_batch_tool,
+    ]
 )
 
+def ejecutar_lote(entrada: str, salida: str, concurrencia: int) -> None:
+    # Todas las preguntas comparten el agente, las cachés y el pool de navegadores
+    import sys
+    from batch import read_questions
+    from batch import run_batch
+    from batch import write_results
+
+    # En lote la consola solo mostraría trazas entremezcladas de varias preguntas
+    TRACER.exporters = [e for e in TRACER.exporters if not isinstance(e, ConsoleExporter)]
+    fin = sys.stdin if entrada == "-" else open(entrada, encoding="utf-8")
+    fout = sys.stdout if salida == "-" else open(salida, "w", encoding="utf-8")
+    try:
+        write_results(run_batch(agent, read_questions(fin), concurrency=concurrencia), fout)
+    finally:
+        if fin is not sys.stdin:
+            fin.close()
+        if fout is not sys.stdout:
+            fout.close()
+
+
+def crear_sesiones() -> SessionStore:
+    # Las conversaciones inactivas se guardan en disco y se recuperan en su siguiente pregunta
+    return SessionStore(
+        directory=os.getenv("SESSIONS_DIR", "sessions"),
+        idle_timeout=float(os.getenv("SESSION_IDLE_TIMEOUT", "900")),
+        # Dentro de una sesión el precio al contado caduca igual que en la caché de precios
+        memo_ttl={"get_actual_data": PRICE_CACHE.ttl},
+    )
+
+
+def servir(host: str, puerto: int, max_inflight: int, max_cola: int) -> None:
+    # El agente, las cachés y los navegadores se mantienen calientes entre preguntas
+    from server import AgentServer
+
+    TRACER.exporters = [e for e in TRACER.exporters if not isinstance(e, ConsoleExporter)]
+    servidor = AgentServer(
+        agent,
+        host=host,
+        port=puerto,
+        max_inflight=max_inflight,
+        max_queue=max_cola,
+        queue_timeout=float(os.getenv("SERVER_QUEUE_TIMEOUT", "30")),
+        metrics_sources={
+            "price_cache": lambda: PRICE_CACHE.stats,
+            "completion_cache": lambda: COMPLETION_CACHE.memory.stats,
+            "driver_pool": lambda: DRIVER_POOL.stats,
+            "prefetch": lambda: PREFETCHER.stats,
+            "circuit_breakers": lambda: breaker_stats(
+                [fuente.breaker for fuente in DATA_SOURCE.sources]
+                + [t.breaker for t in agent.tools if isinstance(t, ResilientTool)]
+            ),
+            "data_source_timeout_seconds": lambda: {
+                f"{fuente.name}_{metodo}": latencia.timeout()
+                for fuente in DATA_SOURCE.sources
+                for metodo, latencia in list(fuente.latencies.items())
+            },
+        },
+        sessions=crear_sesiones(),
+    )
+    print(f"Escuchando en http://{host}:{puerto}")
+    try:
+        servidor.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        servidor.shutdown()
+
+
 if __name__ == "__main__":
-    user_msg = input("¿Qué datos de crypto quieres? ")
-    output = agent.run(user_msg)
-    print(output)
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Agente ReAct de datos de criptomonedas")
+    parser.add_argument("--batch", metavar="FICHERO",
+                        help="preguntas en JSONL ('-' para leerlas de la entrada estándar)")
+    parser.add_argument("--output", default="-", help="fichero JSONL de respuestas ('-' para la salida estándar)")
+    parser.add_argument("--concurrency", type=int, default=4, help="preguntas respondidas a la vez")
+    parser.add_argument("--serve", action="store_true", help="atiende preguntas por HTTP en /ask")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--max-inflight", type=int, default=4,
+                        help="preguntas atendidas a la vez en modo servidor")
+    parser.add_argument("--max-queue", type=int, default=16,
+                        help="preguntas en espera antes de responder 503")
+    args = parser.parse_args()
+
+    # Si Selenium es el primer backend, los navegadores arrancan en segundo plano mientras el
+    # usuario escribe; como respaldo se crean solo cuando hace falta el primero
+    if DATA_SOURCE.sources and DATA_SOURCE.sources[0].name == "selenium":
+        threading.Thread(target=DRIVER_POOL.warm_up, daemon=True).start()
+    # PREFETCH=0 desactiva el refresco en segundo plano
+    if os.getenv("PREFETCH", "1") != "0":
+        PREFETCHER.start()
+    try:
+        if args.serve:
+            servir(args.host, args.port, args.max_inflight, args.max_queue)
+        elif args.batch:
+            ejecutar_lote(args.batch, args.output, args.concurrency)
+        else:
+            # Las preguntas de seguimiento continúan la misma conversación; una línea vacía termina
+            sesion = Session(memo_ttl={"get_actual_data": PRICE_CACHE.ttl})
+            user_msg = input("¿Qué datos de crypto quieres? ")
+            while user_msg.strip():
+                # La respuesta se muestra a medida que el modelo la genera
+                for fragmento in agent.stream(user_msg, session=sesion):
+                    print(fragmento, end="", flush=True)
+                print()
+                user_msg = input("\n¿Algo más? ")
+    finally:
+        PREFETCHER.stop()
+        DRIVER_POOL.close()
@@ -0,0 +1,322 @@
+"""
+Server mode: a long-running process that keeps the agent, its tools, caches and browsers warm
+and answers questions over a local HTTP API.
+
+    POST /ask      {"question": "...", "stream": false, "max_rounds": 10, "session_id": null}
+                   -> {"answer": "...", "stats": {...}}, or the answer as chunked plain text
+                      when "stream" is true. With "session_id" (or "session": true to start
+                      one) the question continues that conversation; its id is returned in
+                      "session_id" and in the X-Session-Id header.
+    GET  /health   -> {"status": "ok", "inflight": 1, "queued": 0, ...}
+    GET  /metrics  -> counters and gauges in the Prometheus text format.
+
+At most `max_inflight` questions are answered at the same time and at most `max_queue` wait
+for a slot; beyond that, or after waiting `queue_timeout` seconds, requests are rejected with
+503 and a Retry-After header, so an overload never turns into unbounded work or browsers.
+"""
+import json
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler
+from http.server import ThreadingHTTPServer
+from typing import Callable
+
+from agent import ReactAgent
+from batch import question_stats
+from utils.sessions import Session
+from utils.sessions import SessionStore
+from utils.tracing import InMemoryExporter
+
+MAX_BODY_BYTES = 64 * 1024
+MAX_ROUNDS = 30
+
+
+class Overloaded(Exception):
+    """Raised when a request cannot be admitted because the server is at capacity."""
+
+
+class Admission:
+    """
+    Bounded admission control: a fixed number of slots for requests being answered and a
+    bounded number of requests waiting for one.
+
+    Attributes:
+        max_inflight (int): Requests answered at the same time.
+        max_queue (int): Requests allowed to wait for a slot.
+        timeout (float): Seconds a request waits for a slot before being rejected.
+        inflight (int): Requests currently being answered.
+        queued (int): Requests currently waiting.
+        rejected (int): Requests rejected so far.
+    """
+
+    def __init__(self, max_inflight: int = 4, max_queue: int = 16, timeout: float = 30.0) -> None:
+        self.max_inflight = max_inflight
+        self.max_queue = max_queue
+        self.timeout = timeout
+        self.inflight = 0
+        self.queued = 0
+        self.rejected = 0
+        self._slots = threading.BoundedSemaphore(max_inflight)
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def slot(self):
+        """
+        Context manager that holds a slot while the request is answered.
+
+        Raises:
+            Overloaded: If the queue is full or no slot frees up within `timeout`.
+        """
+        with self._lock:
+            if self.queued >= self.max_queue:
+                self.rejected += 1
+                raise Overloaded("Too many requests waiting")
+            self.queued += 1
+        acquired = self._slots.acquire(timeout=self.timeout)
+        with self._lock:
+            self.queued -= 1
+            if acquired:
+                self.inflight += 1
+            else:
+                self.rejected += 1
+        if not acquired:
+            raise Overloaded(f"No slot available within {self.timeout} seconds")
+        try:
+            yield
+        finally:
+            with self._lock:
+                self.inflight -= 1
+            self._slots.release()
+
+
+class AgentServer:
+    """
+    Serves a `ReactAgent` over HTTP.
+
+    Attributes:
+        agent (ReactAgent): The agent shared by all requests.
+        admission (Admission): The bounds on concurrent and waiting requests.
+        max_rounds (int): Default maximum number of ReAct rounds per question. Requests may
+            ask for other values, which are clamped between 1 and `MAX_ROUNDS`.
+        metrics_sources (dict): Callables returning dicts of numbers (e.g. the `stats` of a
+            cache or of the driver pool) that are published by /metrics under their name.
+        metrics (dict): Request counters: 'requests', 'errors', 'seconds' (total time answering).
+        sessions (SessionStore): The conversations; idle ones are moved to disk every
+            `eviction_interval` seconds.
+    """
+
+    def __init__(
+        self,
+        agent: ReactAgent,
+        host: str = "127.0.0.1",
+        port: int = 8000,
+        max_inflight: int = 4,
+        max_queue: int = 16,
+        queue_timeout: float = 30.0,
+        max_rounds: int = 10,
+        metrics_sources: dict[str, Callable[[], dict]] | None = None,
+        sessions: SessionStore | None = None,
+        eviction_interval: float = 60.0,
+    ) -> None:
+        self.agent = agent
+        self.admission = Admission(max_inflight, max_queue, queue_timeout)
+        self.max_rounds = max_rounds
+        self.metrics_sources = dict(metrics_sources or {})
+        self.metrics = {"requests": 0, "errors": 0, "seconds": 0.0}
+        self.sessions = sessions if sessions is not None else SessionStore()
+        self.eviction_interval = eviction_interval
+        self._stopped = threading.Event()
+        self.started_at = time.monotonic()
+        self.spans = InMemoryExporter()
+        self.agent.tracer.add_exporter(self.spans)
+        self._lock = threading.Lock()
+        self.httpd = ThreadingHTTPServer((host, port), _Handler)
+        self.httpd.daemon_threads = True
+        self.httpd.app = self
+
+    @property
+    def address(self) -> tuple[str, int]:
+        """The host and port the server listens on."""
+        return self.httpd.server_address[:2]
+
+    def serve_forever(self) -> None:
+        threading.Thread(target=self._evict_sessions, name="session-eviction", daemon=True).start()
+        self.httpd.serve_forever()
+
+    def shutdown(self) -> None:
+        """Stops accepting requests, closes the listening socket and saves the sessions."""
+        self._stopped.set()
+        self.httpd.shutdown()
+        self.httpd.server_close()
+        self.agent.tracer.exporters.remove(self.spans)
+        self.sessions.close()
+
+    def _evict_sessions(self) -> None:
+        while not self._stopped.wait(self.eviction_interval):
+            self.sessions.evict_idle()
+
+    def record(self, seconds: float, error: bool) -> None:
+        with self._lock:
+            self.metrics["requests"] += 1
+            self.metrics["errors"] += int(error)
+            self.metrics["seconds"] += seconds
+
+    def health(self) -> dict:
+        return {
+            "status": "ok",
+            "uptime_seconds": round(time.monotonic() - self.started_at, 1),
+            "inflight": self.admission.inflight,
+            "queued": self.admission.queued,
+            "max_inflight": self.admission.max_inflight,
+            "max_queue": self.admission.max_queue,
+            "sessions": len(self.sessions),
+        }
+
+    def render_metrics(self) -> str:
+        """Returns the metrics in the Prometheus text exposition format."""
+        with self._lock:
+            metrics = dict(self.metrics)
+        lines = [
+            "# TYPE agent_requests_total counter",
+            f"agent_requests_total {metrics['requests']}",
+            "# TYPE agent_request_errors_total counter",
+            f"agent_request_errors_total {metrics['errors']}",
+            "# TYPE agent_request_seconds_total counter",
+            f"agent_request_seconds_total {metrics['seconds']:.6f}",
+            "# TYPE agent_requests_rejected_total counter",
+            f"agent_requests_rejected_total {self.admission.rejected}",
+            "# TYPE agent_requests_inflight gauge",
+            f"agent_requests_inflight {self.admission.inflight}",
+            "# TYPE agent_requests_queued gauge",
+            f"agent_requests_queued {self.admission.queued}",
+            "# TYPE agent_sessions gauge",
+            f"agent_sessions {len(self.sessions)}",
+        ]
+        for source, stats in self.metrics_sources.items():
+            for name, value in stats().items():
+                if isinstance(value, (int, float)):
+                    lines.append(f"agent_{source}_{name} {value}")
+        return "\n".join(lines) + "\n"
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server_version = "CryptoAgent/1.0"
+
+    @property
+    def app(self) -> AgentServer:
+        return self.server.app
+
+    def log_message(self, format, *args) -> None:
+        # Los accesos no se escriben en la consola: las métricas ya los cuentan
+        pass
+
+    def send_json(self, status: int, payload: dict, headers: dict | None = None) -> None:
+        body = json.dumps(payload, ensure_ascii=False, default=str).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self) -> None:
+        if self.path == "/health":
+            self.send_json(200, self.app.health())
+        elif self.path == "/metrics":
+            body = self.app.render_metrics().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        else:
+            self.send_json(404, {"error": f"Unknown path {self.path}"})
+
+    def do_POST(self) -> None:
+        if self.path != "/ask":
+            self.send_json(404, {"error": f"Unknown path {self.path}"})
+            return
+        length = int(self.headers.get("Content-Length") or 0)
+        if length > MAX_BODY_BYTES:
+            self.send_json(413, {"error": f"Body larger than {MAX_BODY_BYTES} bytes"})
+            return
+        try:
+            request = json.loads(self.rfile.read(length) or b"{}")
+            question = request["question"]
+        except (ValueError, KeyError, TypeError):
+            self.send_json(400, {"error": "Expected a JSON object with a 'question'"})
+            return
+        try:
+            max_rounds = int(request.get("max_rounds", self.app.max_rounds))
+        except (ValueError, TypeError, OverflowError):
+            self.send_json(400, {"error": "'max_rounds' must be an integer"})
+            return
+        max_rounds = min(MAX_ROUNDS, max(1, max_rounds))
+        session = None
+        if request.get("session_id") or request.get("session"):
+            try:
+                session = self.app.sessions.get(request.get("session_id"))
+            except ValueError as e:
+                self.send_json(400, {"error": str(e)})
+                return
+
+        stream = bool(request.get("stream"))
+        try:
+            with self.app.admission.slot():
+                start = time.perf_counter()
+                error = False
+                try:
+                    if stream:
+                        self.stream_answer(question, max_rounds, session)
+                    else:
+                        self.answer(question, max_rounds, session)
+                except Exception as e:
+                    error = True
+                    if stream:
+                        # Las cabeceras ya se enviaron: solo queda cortar la conexión
+                        self.close_connection = True
+                    else:
+                        self.send_json(500, {"error": f"{type(e).__name__}: {e}"})
+                finally:
+                    self.app.record(time.perf_counter() - start, error)
+        except Overloaded as e:
+            self.send_json(503, {"error": str(e)}, headers={"Retry-After": "1"})
+
+    def answer(self, question: str, max_rounds: int, session: Session | None) -> None:
+        try:
+            with self.app.agent.tracer.span("server.request", path=self.path) as span:
+                answer = self.app.agent.run(question, max_rounds=max_rounds, session=session)
+        finally:
+            spans = self.app.spans.pop_trace(span.trace_id)
+        payload = {"answer": answer, "stats": question_stats(spans)}
+        headers = {}
+        if session is not None:
+            payload["session_id"] = headers["X-Session-Id"] = session.session_id
+        self.send_json(200, payload, headers=headers)
+
+    def stream_answer(self, question: str, max_rounds: int, session: Session | None) -> None:
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; charset=utf-8")
+        self.send_header("Transfer-Encoding", "chunked")
+        if session is not None:
+            self.send_header("X-Session-Id", session.session_id)
+        self.end_headers()
+        try:
+            with self.app.agent.tracer.span("server.request", path=self.path, stream=True) as span:
+                chunks = self.app.agent.stream(question, max_rounds=max_rounds, session=session)
+                try:
+                    for chunk in chunks:
+                        data = chunk.encode("utf-8")
+                        self.wfile.write(f"{len(data):X}\r\n".encode("ascii") + data + b"\r\n")
+                        self.wfile.flush()
+                    self.wfile.write(b"0\r\n\r\n")
+                except (BrokenPipeError, ConnectionResetError):
+                    # El cliente se ha ido: se deja de generar la respuesta
+                    self.close_connection = True
+                finally:
+                    chunks.close()
+        finally:
+            self.app.spans.pop_trace(span.trace_id)
@@ -0,0 +1,272 @@
+"""
+Tests of the ReAct agent with a fake local LLM client (`bench.fakes.ScriptedGroqClient`):
+the async path, the per-tool concurrency limits and the tool timeouts.
+"""
+import asyncio
+import threading
+import time
+
+from agent import ReactAgent
+from bench.fakes import ScriptedGroqClient
+from tool import tool
+from utils.completions import update_chat_history
+from utils.sessions import Session
+
+SCRIPT = [
+    '<thought>I need both prices</thought>\n'
+    '<tool_call>{"name": "get_actual_data", "arguments": {"moneda": "bitcoin"}, "id": 0}</tool_call>\n'
+    '<tool_call>{"name": "get_actual_data", "arguments": {"moneda": "ethereum"}, "id": 1}</tool_call>',
+    "<response>Bitcoin is at $1 and Ethereum at $2.</response>",
+]
+
+
+class Concurrency:
+    """Records how many calls of a fake tool run at the same time."""
+
+    def __init__(self) -> None:
+        self.current = 0
+        self.peak = 0
+        self._lock = threading.Lock()
+
+    def __enter__(self):
+        with self._lock:
+            self.current += 1
+            self.peak = max(self.peak, self.current)
+
+    def __exit__(self, *exc):
+        with self._lock:
+            self.current -= 1
+
+
+def price_tool(latency: float = 0.0, concurrency: Concurrency | None = None):
+    def get_actual_data(moneda: str) -> dict:
+        with concurrency or Concurrency():
+            time.sleep(latency)
+        return {"Precio": {"bitcoin": "$1", "ethereum": "$2"}.get(moneda, "$0")}
+
+    return tool(get_actual_data)
+
+
+def make_agent(tools, latency: float = 0.0, **kwargs) -> tuple[ReactAgent, ScriptedGroqClient]:
+    client = ScriptedGroqClient(SCRIPT, latency=latency)
+    agent = ReactAgent(tools=tools, client=client, async_client=client.as_async(), **kwargs)
+    return agent, client
+
+
+def calls(n: int) -> list[dict]:
+    return [{"name": "get_actual_data", "arguments": {"moneda": "bitcoin"}, "id": i} for i in range(n)]
+
+
+def test_arun_answers_with_tool_results():
+    agent, client = make_agent([price_tool()])
+
+    answer = asyncio.run(agent.arun("Compare bitcoin and ethereum"))
+
+    assert answer == "Bitcoin is at $1 and Ethereum at $2."
+    assert len(client.calls) == 2
+
+
+def test_arun_observations_reach_the_model():
+    agent, client = make_agent([price_tool()])
+    seen = []
+    create = client.as_async().chat.completions.create
+
+    async def spy(messages, model):
+        seen.append([msg["content"] for msg in messages])
+        return await create(messages=messages, model=model)
+
+    agent.async_client.chat.completions.create = spy
+    asyncio.run(agent.arun("Compare bitcoin and ethereum"))
+
+    assert seen[-1][-1] == "<observation>{0: {'Precio': '$1'}, 1: {'Precio': '$2'}}</observation>"
+
+
+def test_arun_drives_conversations_concurrently():
+    agent, _ = make_agent([price_tool(latency=0.05)], latency=0.05)
+
+    async def main():
+        return await asyncio.gather(*(agent.arun(f"question {i}") for i in range(20)))
+
+    start = time.perf_counter()
+    answers = asyncio.run(main())
+    elapsed = time.perf_counter() - start
+
+    assert answers == ["Bitcoin is at $1 and Ethereum at $2."] * 20
+    # Two LLM calls and one round of tools per conversation: ~0.15 s if they overlap, 3 s if not
+    assert elapsed < 1.0
+
+
+def test_tool_limit_bounds_sync_calls():
+    concurrency = Concurrency()
+    agent, _ = make_agent([price_tool(0.05, concurrency)], tool_concurrency={"get_actual_data": 2})
+
+    results = agent.process_tool_calls(calls(6))
+
+    assert all(result == {"Precio": "$1"} for result in results.values())
+    assert concurrency.peak == 2
+
+
+def test_tool_limit_bounds_async_calls():
+    concurrency = Concurrency()
+    agent, _ = make_agent([price_tool(0.05, concurrency)], tool_concurrency={"get_actual_data": 1})
+
+    results = asyncio.run(agent.aprocess_tool_calls(calls(4)))
+
+    assert all(result == {"Precio": "$1"} for result in results.values())
+    assert concurrency.peak == 1
+
+
+def test_sync_timeout_reports_an_error():
+    agent, _ = make_agent([price_tool(latency=1.0)], tool_timeout=0.1)
+
+    start = time.perf_counter()
+    results = agent.process_tool_calls(calls(1))
+
+    assert "Timeout" in results[0]["error"]
+    assert time.perf_counter() - start < 0.5
+
+
+def test_async_timeout_reports_an_error():
+    agent, _ = make_agent([price_tool(latency=1.0)], tool_timeout=0.1)
+
+    async def main():
+        start = time.perf_counter()
+        results = await agent.aprocess_tool_calls(calls(1))
+        return results, time.perf_counter() - start
+
+    # asyncio.run still waits for the abandoned worker thread when it closes the loop
+    results, elapsed = asyncio.run(main())
+
+    assert "Timeout" in results[0]["error"]
+    assert elapsed < 0.5
+
+
+def test_waiting_for_a_worker_does_not_count_towards_the_timeout():
+    # Six calls of 0.1 s on two workers take 0.3 s, more than the timeout of each call
+    agent, _ = make_agent(
+        [price_tool(latency=0.1)], max_workers=2, tool_timeout=0.25, tool_queue_timeout=1.0
+    )
+
+    results = agent.process_tool_calls(calls(6))
+
+    assert all(result == {"Precio": "$1"} for result in results.values())
+
+
+def test_hung_calls_holding_the_workers_do_not_stall_the_next_round():
+    concurrency = Concurrency()
+    agent, _ = make_agent(
+        [price_tool(latency=1.0, concurrency=concurrency)], max_workers=2, tool_timeout=0.2
+    )
+    agent.process_tool_calls(calls(2))
+
+    start = time.perf_counter()
+    results = agent.process_tool_calls(calls(1))
+    elapsed = time.perf_counter() - start
+
+    assert "no worker" in results[0]["error"]
+    assert elapsed < 0.5
+    time.sleep(1.0)
+    # La llamada abandonada no llega a ejecutarse cuando por fin queda un hilo libre
+    assert concurrency.peak == 2 and concurrency.current == 0
+
+
+def test_waiting_for_the_tool_limit_does_not_count_towards_the_async_timeout():
+    agent, _ = make_agent(
+        [price_tool(latency=0.1)], tool_timeout=0.25, tool_concurrency={"get_actual_data": 1}
+    )
+
+    results = asyncio.run(agent.aprocess_tool_calls(calls(4)))
+
+    assert all(result == {"Precio": "$1"} for result in results.values())
+
+
+def test_cancelling_an_arun_waiting_for_its_session_does_not_leave_it_locked():
+    agent, _ = make_agent([price_tool()])
+    session = Session()
+    session.lock.acquire()  # una pregunta anterior de la sesión sigue en curso
+
+    async def main():
+        try:
+            await asyncio.wait_for(agent.arun("bitcoin and ethereum?", session=session), 0.1)
+        except asyncio.TimeoutError:
+            pass
+        else:
+            raise AssertionError("arun should have timed out waiting for the session")
+        session.lock.release()
+        await asyncio.sleep(0.1)
+        return await agent.arun("bitcoin and ethereum?", session=session)
+
+    assert asyncio.run(main()) == "Bitcoin is at $1 and Ethereum at $2."
+    assert not session.lock.locked()
+
+
+def test_session_compaction_keeps_the_current_question():
+    agent, _ = make_agent([price_tool()])
+    session = Session(history_max_tokens=400)
+    for turn in range(3):
+        agent.start_chat_history(f"old question {turn} " + "x" * 400, session)
+        agent.end_turn(session.history, "old answer", session)
+
+    history = agent.start_chat_history("bitcoin and ethereum?", session)
+    for _ in range(3):
+        update_chat_history(history, "<thought>thinking</thought>" + "y" * 400, "assistant")
+        update_chat_history(history, "<observation>" + "z" * 400 + "</observation>", "user")
+
+    assert history[0]["role"] == "system"
+    assert "<question>bitcoin and ethereum?</question>" in history[history.anchor]["content"]
+    assert Session.from_dict(session.to_dict()).history.anchor == history.anchor
+
+
+def test_stream_starts_tool_calls_before_the_completion_ends():
+    started = []
+    client = ScriptedGroqClient(SCRIPT, chunk_size=4)
+    chunks = client._chunks
+
+    def slow_chunks(completion):
+        for chunk in chunks(completion):
+            time.sleep(0.002)
+            yield chunk
+        started.append(("end", time.perf_counter()))
+
+    client._chunks = slow_chunks
+
+    def get_actual_data(moneda: str) -> dict:
+        started.append(("tool", time.perf_counter()))
+        return {"Precio": "$1"}
+
+    agent = ReactAgent(tools=[tool(get_actual_data)], client=client)
+    answer = "".join(agent.stream("bitcoin and ethereum?"))
+
+    assert answer == "Bitcoin is at $1 and Ethereum at $2."
+    first_tool = min(at for kind, at in started if kind == "tool")
+    first_end = min(at for kind, at in started if kind == "end")
+    assert first_tool < first_end
+
+
+def test_stream_yields_the_end_of_an_unterminated_response():
+    client = ScriptedGroqClient(["<response>It is $1 </resp"], chunk_size=3)
+    agent = ReactAgent(tools=[price_tool()], client=client)
+
+    assert "".join(agent.stream("bitcoin?")) == "It is $1 </resp"
+
+
+def test_invalid_and_repeated_tool_call_ids_do_not_break_the_round():
+    completion = (
+        '<tool_call>{"name": "get_actual_data", "arguments": {"moneda": "bitcoin"}, "id": [0]}</tool_call>'
+        '<tool_call>{"name": "get_actual_data", "arguments": {"moneda": "bitcoin"}, "id": 1}</tool_call>'
+        '<tool_call>{"name": "get_actual_data", "arguments": {"moneda": "ethereum"}, "id": 1}</tool_call>'
+    )
+    client = ScriptedGroqClient([completion, SCRIPT[-1]])
+    seen = []
+    create = client.chat.completions.create
+
+    def spy(messages, model, **kwargs):
+        seen.append(messages[-1]["content"])
+        return create(messages=messages, model=model, **kwargs)
+
+    client.chat.completions.create = spy
+    agent = ReactAgent(tools=[price_tool()], client=client)
+
+    assert agent.run("bitcoin and ethereum?") == "Bitcoin is at $1 and Ethereum at $2."
+    assert "1: {'Precio': '$1'}, '1_1': {'Precio': '$2'}" in seen[-1]
+    assert "'invalid_0'" in seen[-1] and "must be a string or a number" in seen[-1]
@@ -0,0 +1,41 @@
+"""Tests of the batch runner with a fake local LLM client."""
+import io
+import json
+
+from agent import ReactAgent
+from batch import read_questions
+from batch import run_batch
+from batch import write_results
+from bench.fakes import ScriptedGroqClient
+from bench.fakes import make_fake_tools
+
+
+def test_malformed_lines_are_reported_and_the_batch_goes_on():
+    agent = ReactAgent(tools=make_fake_tools(0.0), client=ScriptedGroqClient())
+    lines = ['{"question": "q1"}', "{bad json", "", '{"id": "x"}', '"q2"']
+    out = io.StringIO()
+
+    assert write_results(run_batch(agent, read_questions(lines)), out) == 4
+
+    results = {r["id"]: r for r in map(json.loads, out.getvalue().splitlines())}
+    assert results[0]["error"] is None and results[0]["answer"]
+    assert results[4]["error"] is None and results[4]["answer"]
+    assert "Line 2 is not valid JSON" in results[1]["error"]
+    assert "Line 4 has no 'question'" in results[3]["error"]
+    assert results[3]["stats"]["llm_calls"] == 0
+
+
+def test_questions_are_read_as_answers_are_written():
+    agent = ReactAgent(tools=make_fake_tools(0.0), client=ScriptedGroqClient())
+    read = []
+
+    def questions():
+        for number in range(100):
+            read.append(number)
+            yield {"id": number, "question": f"q{number}"}
+
+    results = run_batch(agent, questions(), concurrency=2)
+    next(results)
+
+    assert len(read) <= 5
+    assert len([next(results)] + list(results)) == 99 and len(read) == 100
@@ -0,0 +1,92 @@
+"""Tests of the in-process TTL cache used for prices and tool results."""
+import threading
+import time
+
+import pytest
+
+from utils.cache import TTLCache
+
+
+def test_concurrent_misses_compute_once():
+    cache = TTLCache()
+    calls = []
+
+    def scrape():
+        calls.append(1)
+        time.sleep(0.1)
+        return {"Precio": "$1"}
+
+    results = []
+    threads = [
+        threading.Thread(target=lambda: results.append(cache.get_or_compute("bitcoin", scrape)))
+        for _ in range(8)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(calls) == 1 and results == [{"Precio": "$1"}] * 8
+    assert cache.stats["coalesced"] == 7 and cache.stats["misses"] == 8
+
+
+def test_ttl_overrides_take_precedence():
+    cache = TTLCache(ttl=60, ttl_overrides={"bitcoin": 0.05})
+    cache.set("bitcoin", 1)
+    cache.set("ethereum", 2)
+    time.sleep(0.1)
+
+    assert cache.get("bitcoin") is None and cache.get("ethereum") == 2
+    assert cache.stats == {"hits": 1, "misses": 1, "stale": 1, "coalesced": 0, "evictions": 0}
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = TTLCache(max_size=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+
+    assert "a" in cache and "b" not in cache and "c" in cache
+    assert cache.stats["evictions"] == 1
+
+
+def test_errors_reach_every_waiting_caller_and_are_not_cached():
+    cache = TTLCache()
+    release = threading.Event()
+    calls = []
+
+    def scrape():
+        calls.append(1)
+        release.wait()
+        raise TimeoutError("site down")
+
+    errors = []
+
+    def caller():
+        try:
+            cache.get_or_compute("bitcoin", scrape)
+        except TimeoutError as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=caller) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    while cache.stats["coalesced"] < 3:
+        time.sleep(0.01)
+    release.set()
+    for thread in threads:
+        thread.join()
+
+    assert len(calls) == 1 and len(errors) == 4
+    assert "bitcoin" not in cache
+    release.set()
+    with pytest.raises(TimeoutError):
+        cache.get_or_compute("bitcoin", scrape)
+    assert len(calls) == 2
+
+
+def test_cache_if_skips_error_results():
+    cache = TTLCache()
+    assert cache.get_or_compute("x", lambda: {"error": "no data"}, cache_if=lambda v: "error" not in v)
+    assert "x" not in cache
@@ -0,0 +1,217 @@
+"""
+Tests of the data sources against saved CoinMarketCap pages served by a local HTTP stand-in.
+"""
+import os
+import threading
+from http.server import BaseHTTPRequestHandler
+from http.server import ThreadingHTTPServer
+from urllib.parse import parse_qs
+from urllib.parse import urlparse
+
+import pytest
+import requests
+
+from utils.data_sources import DataSourceError
+from utils.data_sources import FallbackDataSource
+from utils.data_sources import HttpDataSource
+from utils.data_sources import SeleniumDataSource
+from utils.data_sources import TransientDataSourceError
+from utils.driver_pool import DriverPool
+
+FIXTURES = os.path.join(os.path.dirname(__file__), "fixtures", "coinmarketcap")
+
+# Rutas del sitio y del API de datos servidas por el doble local
+PAGES = {
+    "/es/currencies/bitcoin/": "bitcoin.html",
+    "/es/currencies/ethereum/": "ethereum.html",
+    "/es/currencies/solana/": "solana.html",
+    "/es/currencies/bitcoin/historical-data/": "bitcoin-historical-data.html",
+    "/es/currencies/ethereum/historical-data/": "ethereum-historical-data.html",
+}
+API_QUOTES = {"1027": "historical-1027.json"}
+
+
+class StandIn(BaseHTTPRequestHandler):
+    def do_GET(self):
+        url = urlparse(self.path)
+        self.server.requests.append((url.path, parse_qs(url.query)))
+        if url.path == "/data-api/v3/cryptocurrency/historical":
+            name = API_QUOTES.get(parse_qs(url.query).get("id", [""])[0], "historical-empty.json")
+            content_type = "application/json"
+        elif url.path in PAGES:
+            name, content_type = PAGES[url.path], "text/html; charset=utf-8"
+        else:
+            self.send_error(404)
+            return
+        with open(os.path.join(FIXTURES, name), "rb") as f:
+            body = f.read()
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture(scope="module")
+def server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StandIn)
+    server.requests = []
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def stand_in(server):
+    server.requests.clear()
+    return server
+
+
+@pytest.fixture
+def source(stand_in):
+    url = f"http://127.0.0.1:{stand_in.server_address[1]}"
+    return HttpDataSource(base_url=url, api_url=url, timeout=5)
+
+
+def test_spot_price_from_next_data(source):
+    assert source.spot_price("ethereum") == "$2,704.12"
+
+
+def test_spot_price_skips_unrelated_statistics(source):
+    # globalMetrics.statistics comes first and has no price
+    assert source.spot_price("bitcoin") == "$96,065.33"
+
+
+def test_spot_price_from_price_span(source):
+    assert source.spot_price("solana") == "$196.40"
+
+
+def test_unknown_coin_raises(source):
+    with pytest.raises(DataSourceError, match="404"):
+        source.spot_price("not-a-coin")
+
+
+def test_historic_rows_from_table(source):
+    rows = source.historic_rows("bitcoin")
+
+    # Only the rows of the historical table: the related-coins table is ignored
+    assert rows == [
+        ["Feb 09, 2025", "$96,509.18", "$97,328.41", "$94,745.34", "$96,629.07", "$30,253,481,521", "$1,914,861,420,613"],
+        ["Feb 08, 2025", "$96,462.75", "$96,880.83", "$95,688.58", "$96,500.09", "$14,120,907,054", "$1,912,335,612,180"],
+        ["Feb 07, 2025", "$96,581.32", "$100,137.99", "$95,620.34", "$96,554.35", "$45,934,769,602", "$1,913,436,104,775"],
+    ]
+
+
+def test_historic_rows_from_api_when_table_is_empty(source, stand_in):
+    rows = source.historic_rows("ethereum")
+
+    assert rows == [
+        ["Jan 13, 2024", "$2,525.06", "$2,608.32", "$2,514.21", "$2,577.50", "$10,301,345,123", "$309,744,991,874"],
+        ["Jan 12, 2024", "$2,616.50", "$2,715.22", "$2,512.13", "$2,525.12", "$21,544,336,087", "$303,449,317,470"],
+    ]
+    path, params = stand_in.requests[-1]
+    assert path == "/data-api/v3/cryptocurrency/historical"
+    assert params["id"] == ["1027"] and params["convertId"] == ["2781"]
+
+
+def test_historic_range_asks_the_api_for_the_window(source, stand_in):
+    rows = source.historic_range("ethereum", "2024-01-12", "2024-01-13")
+
+    assert [row[0] for row in rows] == ["Jan 13, 2024", "Jan 12, 2024"]
+    path, params = stand_in.requests[-1]
+    # One day of margin on each side of the window
+    assert params["timeStart"] == ["1704931200"] and params["timeEnd"] == ["1705190400"]
+
+
+def test_historic_range_reads_the_coin_id_once(source, stand_in):
+    source.historic_range("ethereum", "2024-01-12", "2024-01-13")
+    source.historic_range("ethereum", "2024-01-12", "2024-01-13")
+
+    pages = [path for path, _ in stand_in.requests if path.startswith("/es/")]
+    assert pages == ["/es/currencies/ethereum/"]
+
+
+def test_api_without_quotes_raises(source):
+    with pytest.raises(DataSourceError, match="no quotes"):
+        source.historic_range("solana", "2024-01-12", "2024-01-13")
+
+
+def test_not_found_is_not_transient(source):
+    with pytest.raises(DataSourceError) as error:
+        source.spot_price("not-a-coin")
+    assert not isinstance(error.value, TransientDataSourceError)
+
+
+@pytest.mark.parametrize("status, transient", [(503, True), (429, True), (404, False)])
+def test_http_errors_are_classified_by_status(status, transient):
+    class Session:
+        def get(self, url, params=None, timeout=None):
+            response = requests.Response()
+            response.status_code, response.url = status, url
+            return response
+
+    with pytest.raises(DataSourceError) as error:
+        HttpDataSource(session=Session()).spot_price("bitcoin")
+    assert isinstance(error.value, TransientDataSourceError) == transient
+
+
+def test_fallback_uses_the_next_backend(source):
+    class Broken(HttpDataSource):
+        name = "broken"
+
+        def spot_price(self, moneda):
+            raise DataSourceError("down")
+
+    fallback = FallbackDataSource([Broken(), source])
+    assert fallback.spot_price("ethereum") == "$2,704.12"
+
+
+def test_fallback_reports_every_backend(source):
+    fallback = FallbackDataSource([source, source])
+    with pytest.raises(DataSourceError, match="http: .*; http: "):
+        fallback.spot_price("not-a-coin")
+
+
+class FakeDriver:
+    current_url = "about:blank"
+
+    def __init__(self):
+        self.page_load_timeouts = []
+
+    def set_page_load_timeout(self, timeout):
+        self.page_load_timeouts.append(timeout)
+
+    def get(self, url):
+        pass
+
+    def find_element(self, by, value):
+        raise Exception("no such element")
+
+    def quit(self):
+        pass
+
+
+def test_selenium_page_errors_keep_the_driver():
+    pool = DriverPool(FakeDriver, size=1)
+    source = SeleniumDataSource(pool)
+
+    for _ in range(3):
+        with pytest.raises(DataSourceError, match="no such element"):
+            source.spot_price("bitcoin")
+
+    assert pool.stats["created"] == 1 and pool.stats["recycled"] == 0
+
+
+def test_selenium_limits_the_page_load_to_the_call_timeout():
+    pool = DriverPool(FakeDriver, size=1)
+    source = SeleniumDataSource(pool, timeout=10)
+
+    with pytest.raises(DataSourceError):
+        source.spot_price("bitcoin", timeout=2.5)
+    with pool.driver() as driver:
+        assert driver.page_load_timeouts == [2.5]
@@ -0,0 +1,87 @@
+"""Tests of the parsing of completions: tags, tool calls and the incremental stream parser."""
+import pytest
+
+from utils.extraction import IncrementalTagParser
+from utils.extraction import parse_completion
+
+COMPLETION = (
+    "<thought>I need the price</thought>\n"
+    '<tool_call>{"name": "get_actual_data", "arguments": {"moneda": "bitcoin"}, "id": 0}</tool_call>\n'
+    "<response>Bitcoin is at $1.</response>"
+)
+
+
+def feed_in_chunks(text: str, size: int) -> list:
+    parser = IncrementalTagParser()
+    events = []
+    for i in range(0, len(text), size):
+        events.extend(parser.feed(text[i:i + size]))
+    return events + parser.close()
+
+
+@pytest.mark.parametrize("size", [1, 2, 3, 5, 7, 11, len(COMPLETION)])
+def test_tags_split_across_chunks_are_parsed(size):
+    events = feed_in_chunks(COMPLETION, size)
+
+    closed = [(event.tag, event.text) for event in events if event.closed]
+    assert closed == [
+        ("thought", "I need the price"),
+        ("tool_call", '{"name": "get_actual_data", "arguments": {"moneda": "bitcoin"}, "id": 0}'),
+        ("response", "Bitcoin is at $1."),
+    ]
+    streamed = "".join(event.text for event in events if event.tag == "response" and not event.closed)
+    assert streamed == "Bitcoin is at $1."
+
+
+def test_tool_call_is_emitted_before_the_completion_ends():
+    parser = IncrementalTagParser()
+    events = parser.feed(COMPLETION[: COMPLETION.index("<response>")])
+
+    assert [event.tag for event in events if event.closed] == ["thought", "tool_call"]
+
+
+def test_unterminated_response_keeps_its_held_back_fragment():
+    parser = IncrementalTagParser()
+    events = parser.feed("<response>It costs $1 </resp")
+    assert "".join(event.text for event in events) == "It costs $1 "
+
+    closing = parser.close()
+    assert [event.text for event in closing if not event.closed] == ["</resp"]
+    assert closing[-1].closed and closing[-1].text == "It costs $1 </resp"
+
+
+def test_unterminated_tags_run_until_the_next_tag():
+    parsed = parse_completion("<thought>check<response>Done")
+
+    assert parsed.thoughts == ["check"] and parsed.response == "Done"
+
+
+@pytest.mark.parametrize(
+    "content, message",
+    [
+        ('{"name": "get_actual_data", "arguments": {}', "Expecting"),
+        ('["get_actual_data"]', "'name'"),
+        ('{"name": "get_actual_data", "arguments": [1]}', "'arguments'"),
+        ('{"name": "get_actual_data", "id": [0]}', "'id'"),
+        ('{"name": "get_actual_data", "id": {"n": 0}}', "'id'"),
+        ('{"name": "get_actual_data", "id": true}', "'id'"),
+    ],
+)
+def test_malformed_tool_calls_are_reported(content, message):
+    parsed = parse_completion(f"<tool_call>{content}</tool_call>")
+
+    assert parsed.tool_calls == [] and len(parsed.errors) == 1
+    assert message in parsed.errors[0]
+
+
+def test_partial_tool_call_is_decoded_up_to_the_end_of_the_text():
+    parsed = parse_completion('<tool_call>{"name": "get_actual_data", "arguments": {"moneda": "btc"}}')
+
+    assert parsed.tool_calls == [{"name": "get_actual_data", "arguments": {"moneda": "btc"}, "id": 0}]
+
+
+def test_repeated_ids_are_made_unique():
+    call = '<tool_call>{"name": "get_actual_data", "arguments": {}, "id": 0}</tool_call>'
+    parsed = parse_completion(call * 3 + '<tool_call>{"name": "get_actual_data"}</tool_call>')
+
+    assert [tool_call["id"] for tool_call in parsed.tool_calls] == [0, "0_1", "0_2", 3]
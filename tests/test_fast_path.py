@@ -0,0 +1,56 @@
+"""Tests of the classification of the fast-path router."""
+from datetime import date
+
+import pytest
+
+from utils.fast_path import FastPathQuery
+from utils.fast_path import FastPathRouter
+
+router = FastPathRouter(today=lambda: "2026-10-17")
+
+
+@pytest.mark.parametrize(
+    "question, expected",
+    [
+        ("What is the price of bitcoin?", FastPathQuery("price", "bitcoin", None, "en")),
+        ("precio de bitcoin hoy", FastPathQuery("price", "bitcoin", None, "es")),
+        ("How much is ETH worth in USD?", FastPathQuery("price", "ethereum", None, "en")),
+        ("bitcoin price 2 weeks ago", FastPathQuery("historic", "bitcoin", date(2026, 10, 3), "en")),
+        ("datos de solana ayer", FastPathQuery("historic", "solana", date(2026, 10, 16), "es")),
+        (
+            "precio de ethereum el 5 de marzo de 2024",
+            FastPathQuery("historic", "ethereum", date(2024, 3, 5), "es"),
+        ),
+        (
+            "What was the price of bitcoin on March 5, 2024?",
+            FastPathQuery("historic", "bitcoin", date(2024, 3, 5), "en"),
+        ),
+        ("¿Cuánto valía bitcoin ayer?", FastPathQuery("historic", "bitcoin", date(2026, 10, 16), "es")),
+    ],
+)
+def test_simple_questions_are_classified(question, expected):
+    assert router.classify(question) == expected
+
+
+@pytest.mark.parametrize(
+    "question",
+    [
+        "bitcoin price a year ago",
+        "price of bitcoin last month",
+        "cual era el precio de bitcoin el mes pasado",
+        "precio de bitcoin hace un año",
+        "precio de bitcoin en 2021",
+        "What will the price of bitcoin be tomorrow?",
+        "precio de bitcoin mañana",
+        "How much are 5 bitcoin worth?",
+        "price of bitcoin in euros",
+        "What was the price of bitcoin in March?",
+        "¿Cuánto valía bitcoin en marzo?",
+        "precio de bitcoin el lunes",
+        "What was the price of bitcoin on Friday?",
+        "btc price at christmas",
+        "Is bitcoin price going up?",
+    ],
+)
+def test_unresolved_dates_quantities_and_currencies_go_to_the_loop(question):
+    assert router.classify(question) is None
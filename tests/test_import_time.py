@@ -0,0 +1,13 @@
+"""Import-time budget of the CLI entry point, measured in fresh interpreters."""
+import statistics
+
+from bench.import_time import BUDGET_MS
+from bench.import_time import heavy_modules
+from bench.import_time import measure
+
+
+def test_main_imports_no_heavy_module_and_within_budget():
+    runs = [measure("main") for _ in range(3)]
+
+    assert heavy_modules(runs) == []
+    assert statistics.median(run["ms"] for run in runs) <= BUDGET_MS
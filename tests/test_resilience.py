@@ -0,0 +1,125 @@
+"""Tests of the retries, circuit breakers and adaptive timeouts around tools and backends."""
+import time
+
+import pytest
+
+from tool import tool
+from utils.data_sources import DataSource
+from utils.data_sources import DataSourceError
+from utils.data_sources import TransientDataSourceError
+from utils.resilience import CircuitBreaker
+from utils.resilience import LatencyTracker
+from utils.resilience import ResilientDataSource
+from utils.resilience import ResilientTool
+
+
+def failing_tool(error: Exception, calls: list):
+    def get_historic_data(moneda: str, fecha: str) -> dict:
+        calls.append(fecha)
+        raise error
+
+    return tool(get_historic_data)
+
+
+@pytest.mark.parametrize(
+    "error",
+    [ValueError("Invalid isoformat string: 'last week'"), DataSourceError("GET /es/currencies/x/ failed: 404")],
+)
+def test_input_and_not_found_errors_go_back_at_once(error):
+    calls = []
+    breaker = CircuitBreaker("get_historic_data", failure_threshold=1)
+    wrapped = ResilientTool(failing_tool(error, calls), breaker, attempts=3, base_delay=0)
+
+    result = wrapped.run(moneda="bitcoin", fecha="last week")
+
+    assert result["error"].startswith(type(error).__name__) and len(calls) == 1
+    assert breaker.stats["failures"] == 0
+    breaker.before_call()
+
+
+def test_transient_errors_are_retried_and_counted_once():
+    calls = []
+    breaker = CircuitBreaker("get_historic_data")
+    wrapped = ResilientTool(
+        failing_tool(TransientDataSourceError("HTTP 503"), calls), breaker, attempts=3, base_delay=0
+    )
+
+    assert "TransientDataSourceError" in wrapped.run(moneda="bitcoin", fecha="2024-01-12")["error"]
+    assert len(calls) == 3 and breaker.stats["failures"] == 1
+
+
+class Backend(DataSource):
+    name = "fake"
+    timeout = 10.0
+
+    def __init__(self, error: Exception | None = None) -> None:
+        self.error = error
+        self.timeouts = []
+
+    def spot_price(self, moneda: str, timeout: float | None = None) -> str:
+        self.timeouts.append(timeout)
+        if self.error is not None:
+            raise self.error
+        return "$1.00"
+
+    def historic_range(self, moneda: str, inicio: str, fin: str, timeout: float | None = None) -> dict:
+        self.timeouts.append(timeout)
+        return {}
+
+
+def test_backend_timeout_is_passed_per_call():
+    backend = Backend()
+    source = ResilientDataSource(backend, latency_factory=lambda: LatencyTracker(default=4.0))
+
+    source.spot_price("bitcoin")
+    source.spot_price("bitcoin", timeout=1.5)
+
+    assert backend.timeouts == [4.0, 1.5] and backend.timeout == 10.0
+
+
+def test_backend_latency_is_tracked_per_method():
+    source = ResilientDataSource(
+        Backend(), latency_factory=lambda: LatencyTracker(default=4.0, min_samples=1)
+    )
+    for _ in range(3):
+        source.spot_price("bitcoin")
+    source.historic_range("bitcoin", "Jan 01, 2024", "Jan 31, 2024")
+
+    assert set(source.latencies) == {"spot_price", "historic_range"}
+    assert len(source.latencies["spot_price"]._samples) == 3
+    assert len(source.latencies["historic_range"]._samples) == 1
+
+
+def test_calls_that_time_out_raise_the_timeout():
+    class Slow(Backend):
+        def spot_price(self, moneda: str, timeout: float | None = None) -> str:
+            self.timeouts.append(timeout)
+            time.sleep(timeout)
+            raise TimeoutError("read timed out")
+
+    backend = Slow()
+    source = ResilientDataSource(
+        backend,
+        CircuitBreaker("slow backend", failure_threshold=100),
+        latency_factory=lambda: LatencyTracker(default=0.01, minimum=0.01, min_samples=2),
+    )
+    for _ in range(4):
+        with pytest.raises(TimeoutError):
+            source.spot_price("bitcoin")
+
+    assert len(source.latencies["spot_price"]._samples) == 4
+    assert backend.timeouts[-1] > backend.timeouts[0]
+
+
+def test_backend_breaker_counts_only_transient_errors():
+    breaker = CircuitBreaker("fake backend", failure_threshold=1)
+    not_found = ResilientDataSource(Backend(DataSourceError("404")), breaker)
+    for _ in range(3):
+        with pytest.raises(DataSourceError):
+            not_found.spot_price("not-a-coin")
+    assert breaker.stats["failures"] == 0 and not breaker.stats["open"]
+
+    down = ResilientDataSource(Backend(TransientDataSourceError("timed out")), breaker)
+    with pytest.raises(TransientDataSourceError):
+        down.spot_price("bitcoin")
+    assert breaker.stats["open"]
@@ -0,0 +1,67 @@
+"""Tests of the HTTP server with a fake local LLM client."""
+import contextvars
+import json
+import threading
+import urllib.error
+import urllib.request
+
+import pytest
+
+from agent import ReactAgent
+from bench.fakes import ScriptedGroqClient
+from bench.fakes import make_fake_tools
+from server import MAX_ROUNDS
+from server import AgentServer
+from utils.sessions import SessionStore
+from utils.tracing import InMemoryExporter
+from utils.tracing import Tracer
+
+
+@pytest.fixture
+def server(tmp_path):
+    agent = ReactAgent(tools=make_fake_tools(0.0), client=ScriptedGroqClient())
+    app = AgentServer(agent, port=0, sessions=SessionStore(directory=str(tmp_path)))
+    threading.Thread(target=app.serve_forever, daemon=True).start()
+    yield app
+    app.shutdown()
+
+
+def ask(server: AgentServer, body: dict) -> tuple[int, dict]:
+    host, port = server.address
+    request = urllib.request.Request(f"http://{host}:{port}/ask", data=json.dumps(body).encode())
+    try:
+        with urllib.request.urlopen(request, timeout=5) as response:
+            return response.status, json.loads(response.read())
+    except urllib.error.HTTPError as e:
+        return e.code, json.loads(e.read())
+
+
+def test_max_rounds_is_validated_and_clamped(server):
+    status, payload = ask(server, {"question": "bitcoin?", "max_rounds": "abc"})
+    assert status == 400 and "max_rounds" in payload["error"]
+
+    rounds = []
+    run = server.agent.run
+    server.agent.run = lambda question, max_rounds, session: rounds.append(max_rounds) or run(
+        question, max_rounds=max_rounds, session=session
+    )
+    assert ask(server, {"question": "bitcoin?", "max_rounds": 10**6})[0] == 200
+    assert ask(server, {"question": "bitcoin?", "max_rounds": -3})[0] == 200
+    assert rounds == [MAX_ROUNDS, 1]
+
+
+def test_spans_finishing_after_their_trace_was_popped_are_dropped():
+    tracer = Tracer()
+    exporter = InMemoryExporter()
+    tracer.add_exporter(exporter)
+
+    def abandoned_tool_call():
+        with tracer.span("tool.execute"):
+            pass
+
+    with tracer.span("server.request") as request:
+        context = contextvars.copy_context()
+    assert [span.name for span in exporter.pop_trace(request.trace_id)] == ["server.request"]
+
+    context.run(abandoned_tool_call)
+    assert exporter.spans == []
@@ -0,0 +1,61 @@
+"""Tests of the argument validators compiled for each tool."""
+import json
+from datetime import date
+from typing import Literal
+from typing import Optional
+
+import pytest
+
+from tool import tool
+
+
+@tool
+def sample(
+    moneda: str,
+    ventanas: list[int] = (7, 30),
+    fecha: date | None = None,
+    nota: Optional[str] = None,
+    modo: Literal["rapido", "completo"] = "rapido",
+    detalle: bool = False,
+):
+    """A tool with one parameter of each kind of annotation."""
+
+
+def validate(**arguments) -> dict:
+    return sample.validate({"name": "sample", "arguments": arguments})["arguments"]
+
+
+def test_list_elements_are_converted():
+    assert validate(moneda="btc", ventanas="7")["ventanas"] == [7]
+    assert validate(moneda="btc", ventanas="7, 30")["ventanas"] == [7, 30]
+    assert validate(moneda="btc", ventanas='["7", 30]')["ventanas"] == [7, 30]
+    with pytest.raises(ValueError):
+        validate(moneda="btc", ventanas=["siete"])
+
+
+def test_optional_values_are_unwrapped_and_converted():
+    arguments = validate(moneda="btc", fecha="Jan 12, 2024", nota=5)
+    assert arguments["fecha"] == date(2024, 1, 12) and arguments["nota"] == "5"
+    assert validate(moneda="btc", fecha=None)["fecha"] is None
+    with pytest.raises(ValueError):
+        validate(moneda="btc", fecha="not a date")
+
+
+def test_scalars_literals_and_missing_or_unknown_arguments():
+    assert validate(moneda="btc", detalle="false", modo="completo") == {
+        "moneda": "btc", "detalle": False, "modo": "completo"
+    }
+    with pytest.raises(ValueError, match="no es uno de"):
+        validate(moneda="btc", modo="lento")
+    with pytest.raises(ValueError, match="Faltan"):
+        validate()
+    with pytest.raises(ValueError, match="desconocidos"):
+        validate(moneda="btc", otra=1)
+
+
+def test_signature_describes_element_and_optional_types():
+    properties = json.loads(sample.fn_signature)["parameters"]["properties"]
+
+    assert properties["ventanas"] == {"type": "list", "items": {"type": "int"}}
+    assert properties["fecha"] == {"type": "date", "format": "Jan 12, 2024", "nullable": True}
+    assert properties["nota"] == {"type": "str", "nullable": True}
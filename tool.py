@@ -1,7 +1,102 @@
+import inspect
 import json
+import types
+import typing
+from datetime import date
+from enum import Enum
+from typing import Any
 from typing import Callable
+from utils.historic_store import normalize_date
 # --- Utilidades para definir herramientas (tools) ---
 
+def _bool(value) -> bool:
+    # bool("false") es True: las cadenas se interpretan por su contenido
+    if isinstance(value, str):
+        valor = value.strip().lower()
+        if valor in ("true", "1", "yes", "si", "sí"):
+            return True
+        if valor in ("false", "0", "no", ""):
+            return False
+        raise ValueError(f"'{value}' no es un booleano")
+    return bool(value)
+
+def _int(value) -> int:
+    if isinstance(value, str):
+        value = float(value.strip()) if "." in value else value
+    if isinstance(value, float) and not value.is_integer():
+        raise ValueError(f"'{value}' no es un entero")
+    return int(value)
+
+def _date(value) -> date:
+    if isinstance(value, date):
+        return value
+    return date.fromisoformat(normalize_date(str(value)))
+
+def _list(value) -> list:
+    if isinstance(value, str):
+        value = value.strip()
+        if value.startswith("["):
+            return json.loads(value)
+        return [v.strip() for v in value.split(",") if v.strip()]
+    return list(value)
+
+def _dict(value) -> dict:
+    return json.loads(value) if isinstance(value, str) else dict(value)
+
+# Conversores por nombre de tipo, construidos una sola vez
+TYPE_MAPPING: dict[str, Callable] = {
+    "int": _int,
+    "str": str,
+    "bool": _bool,
+    "float": float,
+    "date": _date,
+    "list": _list,
+    "dict": _dict,
+}
+
+# Tipos de Python con los que se comprueba si un valor ya es del tipo esperado
+PYTHON_TYPES: dict[str, type] = {
+    "int": int,
+    "str": str,
+    "bool": bool,
+    "float": float,
+    "date": date,
+    "list": list,
+    "dict": dict,
+}
+
+def _union_args(annotation) -> tuple | None:
+    """
+    Devuelve los tipos de una unión (`Optional[str]`, `int | None`...), o None si no lo es.
+    """
+    if typing.get_origin(annotation) in (typing.Union, types.UnionType):
+        return typing.get_args(annotation)
+    return None
+
+def _type_schema(annotation) -> dict:
+    """
+    Genera el esquema de un parámetro a partir de su anotación de tipo.
+    """
+    union = _union_args(annotation)
+    if union is not None:
+        tipos = [t for t in union if t is not type(None)]
+        esquema = _type_schema(tipos[0]) if len(tipos) == 1 else {"anyOf": [_type_schema(t) for t in tipos]}
+        return {**esquema, "nullable": True} if len(tipos) < len(union) else esquema
+    if typing.get_origin(annotation) is typing.Literal:
+        valores = list(typing.get_args(annotation))
+        return {"type": type(valores[0]).__name__, "enum": valores}
+    if isinstance(annotation, type) and issubclass(annotation, Enum):
+        valores = [m.value for m in annotation]
+        return {"type": type(valores[0]).__name__, "enum": valores}
+    if annotation is date:
+        return {"type": "date", "format": "Jan 12, 2024"}
+    origin = typing.get_origin(annotation)
+    if origin is list and typing.get_args(annotation):
+        return {"type": "list", "items": _type_schema(typing.get_args(annotation)[0])}
+    if origin is not None:
+        return {"type": origin.__name__}
+    return {"type": getattr(annotation, "__name__", str(annotation))}
+
 def get_fn_signature(fn: Callable) -> dict:
     """
     Genera la firma de una función, incluyendo nombre, descripción y tipos de parámetros.
@@ -12,7 +107,7 @@ def get_fn_signature(fn: Callable) -> dict:
         "parameters": {"properties": {}},
     }
     schema = {
-        k: {"type": v.__name__}
+        k: _type_schema(v)
         for k, v in fn.__annotations__.items()
         if k != "return"
     }
@@ -24,26 +119,117 @@ def validate_arguments(tool_call: dict, tool_signature: dict) -> dict:
     Valida y convierte los argumentos para que coincidan con los tipos esperados según la firma.
     """
     properties = tool_signature["parameters"]["properties"]
-    type_mapping = {
-        "int": int,
-        "str": str,
-        "bool": bool,
-        "float": float,
-    }
     for arg_name, arg_value in tool_call["arguments"].items():
         expected_type = properties[arg_name].get("type")
-        if not isinstance(arg_value, type_mapping[expected_type]):
-            tool_call["arguments"][arg_name] = type_mapping[expected_type](arg_value)
+        if not isinstance(arg_value, PYTHON_TYPES[expected_type]):
+            tool_call["arguments"][arg_name] = TYPE_MAPPING[expected_type](arg_value)
     return tool_call
 
+def _compile_converter(annotation) -> Callable[[Any], Any]:
+    """
+    Construye, una sola vez por parámetro, la función que valida y convierte su valor.
+    """
+    union = _union_args(annotation)
+    if union is not None:
+        admite_none = type(None) in union
+        conversores = [_compile_converter(t) for t in union if t is not type(None)]
+
+        def union_(value):
+            if value is None and admite_none:
+                return None
+            errores = []
+            # Se prueba cada tipo en el orden de la anotación
+            for convertir in conversores:
+                try:
+                    return convertir(value)
+                except (ValueError, TypeError) as e:
+                    errores.append(str(e))
+            raise ValueError(f"'{value}' no es de ninguno de los tipos esperados: {errores}")
+
+        return union_
+
+    if typing.get_origin(annotation) is list and typing.get_args(annotation):
+        elemento = _compile_converter(typing.get_args(annotation)[0])
+        return lambda value: [elemento(v) for v in (value if isinstance(value, list) else _list(value))]
+
+    if typing.get_origin(annotation) is typing.Literal:
+        valores = typing.get_args(annotation)
+        convertir = TYPE_MAPPING.get(type(valores[0]).__name__, lambda v: v)
+
+        def literal(value):
+            value = convertir(value)
+            if value not in valores:
+                raise ValueError(f"'{value}' no es uno de {list(valores)}")
+            return value
+
+        return literal
+
+    if isinstance(annotation, type) and issubclass(annotation, Enum):
+
+        def enum(value):
+            if isinstance(value, annotation):
+                return value
+            try:
+                return annotation(value)
+            except ValueError:
+                try:
+                    return annotation[str(value)]
+                except KeyError:
+                    raise ValueError(
+                        f"'{value}' no es uno de {[m.value for m in annotation]}"
+                    ) from None
+
+        return enum
+
+    nombre = _type_schema(annotation)["type"]
+    if nombre not in TYPE_MAPPING:
+        return lambda value: value
+    tipo, convertir = PYTHON_TYPES[nombre], TYPE_MAPPING[nombre]
+    # bool es subclase de int: un booleano nunca se acepta como entero tal cual
+    if tipo is int:
+        return lambda value: value if type(value) is int else convertir(value)
+    return lambda value: value if isinstance(value, tipo) else convertir(value)
+
+def compile_validator(fn: Callable) -> Callable[[dict], dict]:
+    """
+    Construye el validador de los argumentos de una función: comprueba que no falten
+    argumentos obligatorios ni sobren desconocidos y convierte cada valor a su tipo.
+    """
+    parametros = inspect.signature(fn).parameters
+    conversores = {
+        nombre: _compile_converter(fn.__annotations__.get(nombre, Any))
+        for nombre in parametros
+    }
+    obligatorios = frozenset(
+        nombre for nombre, p in parametros.items() if p.default is inspect.Parameter.empty
+    )
+
+    def validator(tool_call: dict) -> dict:
+        argumentos = tool_call.get("arguments", {})
+        desconocidos = argumentos.keys() - conversores.keys()
+        if desconocidos:
+            raise ValueError(f"Argumentos desconocidos para {fn.__name__}: {sorted(desconocidos)}")
+        faltan = obligatorios - argumentos.keys()
+        if faltan:
+            raise ValueError(f"Faltan argumentos para {fn.__name__}: {sorted(faltan)}")
+        tool_call["arguments"] = {
+            nombre: conversores[nombre](valor) for nombre, valor in argumentos.items()
+        }
+        return tool_call
+
+    return validator
+
 class Tool:
     """
     Representa una herramienta que envuelve una función y su firma.
+
+    El validador de argumentos (`validate`) se compila al crear la herramienta.
     """
     def __init__(self, name: str, fn: Callable, fn_signature: str):
         self.name = name
         self.fn = fn
         self.fn_signature = fn_signature
+        self.validate = compile_validator(fn)
 
     def __str__(self):
         return self.fn_signature
@@ -51,6 +237,17 @@ class Tool:
     def run(self, **kwargs):
         return self.fn(**kwargs)
 
+    async def arun(self, **kwargs):
+        """
+        Ejecuta la herramienta desde código asíncrono. Las funciones síncronas se ejecutan
+        en un hilo aparte para no bloquear el bucle de eventos.
+        """
+        import asyncio
+
+        if inspect.iscoroutinefunction(self.fn):
+            return await self.fn(**kwargs)
+        return await asyncio.to_thread(self.fn, **kwargs)
+
 def tool(fn: Callable):
     """
     Decorador que convierte una función en una herramienta (Tool).
@@ -63,4 +260,3 @@ def tool(fn: Callable):
             fn_signature=json.dumps(fn_signature)
         )
     return wrapper()
-
@@ -0,0 +1,164 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any
+from typing import Callable
+
+from utils.tracing import set_attribute
+
+
+class _Flight:
+    """A computation in progress that concurrent callers of the same key wait on."""
+
+    def __init__(self) -> None:
+        self.event = threading.Event()
+        self.result: Any = None
+        self.error: BaseException | None = None
+
+
+class TTLCache:
+    """
+    A thread-safe in-process cache with per-key time-to-live and LRU eviction.
+
+    `get_or_compute` coalesces concurrent misses ("single flight"): when several threads
+    miss the same key at once only one of them runs the computation and the rest wait for
+    its result.
+
+    Attributes:
+        ttl (float): Default time-to-live of an entry, in seconds.
+        max_size (int): Maximum number of entries before the least recently used is evicted.
+        ttl_overrides (dict): Per-key time-to-live that takes precedence over `ttl`.
+        stats (dict): Counters of 'hits', 'misses', 'stale' (expired entries found), 'coalesced'
+            (callers that waited on another caller's computation) and 'evictions'.
+    """
+
+    def __init__(
+        self,
+        ttl: float = 60.0,
+        max_size: int = 256,
+        ttl_overrides: dict | None = None,
+    ) -> None:
+        self.ttl = ttl
+        self.max_size = max_size
+        self.ttl_overrides = dict(ttl_overrides or {})
+        self._data: OrderedDict = OrderedDict()
+        self._flights: dict = {}
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0, "stale": 0, "coalesced": 0, "evictions": 0}
+
+    def ttl_for(self, key) -> float:
+        """Returns the time-to-live that applies to `key`."""
+        return self.ttl_overrides.get(key, self.ttl)
+
+    def _lookup(self, key) -> tuple[bool, Any]:
+        """Looks `key` up, updating counters and LRU order. Must be called with the lock held."""
+        entry = self._data.get(key)
+        if entry is None:
+            self.stats["misses"] += 1
+            return False, None
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            del self._data[key]
+            self.stats["stale"] += 1
+            self.stats["misses"] += 1
+            return False, None
+        self._data.move_to_end(key)
+        self.stats["hits"] += 1
+        return True, value
+
+    def _store(self, key, value, ttl: float | None) -> None:
+        """Stores `value` evicting the LRU entry if needed. Must be called with the lock held."""
+        ttl = self.ttl_for(key) if ttl is None else ttl
+        self._data[key] = (time.monotonic() + ttl, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.max_size:
+            self._data.popitem(last=False)
+            self.stats["evictions"] += 1
+
+    def get(self, key, default=None):
+        """
+        Returns the cached value of `key`, or `default` if it is missing or expired.
+        """
+        with self._lock:
+            found, value = self._lookup(key)
+        return value if found else default
+
+    def set(self, key, value, ttl: float | None = None) -> None:
+        """
+        Stores `value` under `key`.
+
+        Args:
+            key: The cache key.
+            value: The value to store.
+            ttl (float | None): Time-to-live in seconds. Defaults to `ttl_for(key)`.
+        """
+        with self._lock:
+            self._store(key, value, ttl)
+
+    def invalidate(self, key) -> None:
+        """Removes `key` from the cache if present."""
+        with self._lock:
+            self._data.pop(key, None)
+
+    def get_or_compute(
+        self,
+        key,
+        compute: Callable[[], Any],
+        ttl: float | None = None,
+        cache_if: Callable[[Any], bool] | None = None,
+    ):
+        """
+        Returns the cached value of `key`, computing it on a miss. Concurrent misses of the
+        same key run `compute` exactly once and all callers receive its result (or exception).
+        Whether the value came from the cache is recorded as `cache.hit` on the active span.
+
+        Args:
+            key: The cache key.
+            compute (Callable): Zero-argument callable that produces the value.
+            ttl (float | None): Time-to-live of the computed value. Defaults to `ttl_for(key)`.
+            cache_if (Callable | None): Predicate deciding whether a computed value is stored,
+                e.g. to avoid caching error results. All values are stored by default.
+
+        Returns:
+            The cached or freshly computed value.
+        """
+        with self._lock:
+            found, value = self._lookup(key)
+            if found:
+                set_attribute("cache.hit", True)
+                return value
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+            else:
+                self.stats["coalesced"] += 1
+        set_attribute("cache.hit", False)
+
+        if not leader:
+            flight.event.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.result
+
+        try:
+            flight.result = compute()
+        except BaseException as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                if flight.error is None and (cache_if is None or cache_if(flight.result)):
+                    self._store(key, flight.result, ttl)
+                del self._flights[key]
+            flight.event.set()
+        return flight.result
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._data)
+
+    def __contains__(self, key) -> bool:
+        with self._lock:
+            entry = self._data.get(key)
+            return entry is not None and entry[0] > time.monotonic()
@@ -1,4 +1,90 @@
-def completions_create(client, messages: list, model: str) -> str:
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from typing import Iterator
+
+from utils.cache import TTLCache
+from utils.tracing import set_attribute
+
+
+class CompletionCache:
+    """
+    A cache of model completions keyed by a hash of the model and the messages, so that
+    repeated questions skip the LLM entirely.
+
+    Entries live in a size-bounded in-memory TTL cache and, if `path` is given, also in an
+    SQLite file that survives restarts. The file is opened on first use.
+
+    Attributes:
+        ttl (float): Time-to-live of an entry, in seconds.
+        max_size (int): Maximum number of entries kept in memory and on disk.
+        path (str | None): Location of the on-disk backend, or None to keep entries in memory only.
+    """
+
+    def __init__(self, ttl: float = 3600.0, max_size: int = 1024, path: str | None = None):
+        self.ttl = ttl
+        self.max_size = max_size
+        self.path = path
+        self.memory = TTLCache(ttl=ttl, max_size=max_size)
+        self._lock = threading.Lock()
+        self._conn = None
+
+    def _connection(self) -> sqlite3.Connection:
+        """Opens the on-disk backend on first use. Must be called with the lock held."""
+        if self._conn is None:
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS completions "
+                "(key TEXT PRIMARY KEY, completion TEXT NOT NULL, expires_at REAL NOT NULL)"
+            )
+            self._conn.commit()
+        return self._conn
+
+    @staticmethod
+    def key(model: str, messages: list) -> str:
+        """Returns the cache key of a request: a SHA-256 of the model and the messages."""
+        payload = json.dumps([model, list(messages)], ensure_ascii=False, sort_keys=True)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> str | None:
+        """Returns the cached completion of `key`, or None if it is missing or expired."""
+        completion = self.memory.get(key)
+        if completion is not None or self.path is None:
+            return completion
+        with self._lock:
+            row = self._connection().execute(
+                "SELECT completion, expires_at FROM completions WHERE key = ?", (key,)
+            ).fetchone()
+        if row is None or row[1] <= time.time():
+            return None
+        self.memory.set(key, row[0], ttl=row[1] - time.time())
+        return row[0]
+
+    def set(self, key: str, completion: str) -> None:
+        """Stores a completion, evicting expired and least recent entries on disk."""
+        self.memory.set(key, completion)
+        if self.path is None:
+            return
+        with self._lock:
+            conn = self._connection()
+            conn.execute(
+                "INSERT OR REPLACE INTO completions VALUES (?, ?, ?)",
+                (key, completion, time.time() + self.ttl),
+            )
+            conn.execute("DELETE FROM completions WHERE expires_at <= ?", (time.time(),))
+            conn.execute(
+                "DELETE FROM completions WHERE key NOT IN "
+                "(SELECT key FROM completions ORDER BY expires_at DESC LIMIT ?)",
+                (self.max_size,),
+            )
+            conn.commit()
+
+
+def completions_create(
+    client, messages: list, model: str, stream: bool = False, cache: CompletionCache | None = None
+) -> str | Iterator[str]:
     """
     Sends a request to the client's `completions.create` method to interact with the language model.
 
@@ -6,12 +92,88 @@ def completions_create(client, messages: list, model: str) -> str:
         client (Groq): The Groq client object
         messages (list[dict]): A list of message objects containing chat history for the model.
         model (str): The model to use for generating tool calls and responses.
+        stream (bool): If True, return an iterator over the chunks of text as they are generated.
+        cache (CompletionCache | None): If given, identical requests are answered from the cache.
 
     Returns:
-        str: The content of the model's response.
+        str | Iterator[str]: The content of the model's response, or an iterator over its chunks when streaming.
     """
+    key = cache.key(model, messages) if cache is not None else None
+    cached = cache.get(key) if cache is not None else None
+    if cache is not None:
+        set_attribute("cache.hit", cached is not None)
+    if stream:
+        if cached is not None:
+            return iter([cached])
+        chunks = _stream_content(
+            client.chat.completions.create(messages=messages, model=model, stream=True)
+        )
+        return chunks if cache is None else _store_stream(chunks, cache, key)
+    if cached is not None:
+        return cached
     response = client.chat.completions.create(messages=messages, model=model)
-    return str(response.choices[0].message.content)
+    _record_usage(response)
+    completion = str(response.choices[0].message.content)
+    if cache is not None:
+        cache.set(key, completion)
+    return completion
+
+
+def _record_usage(response) -> None:
+    """Records the token counts reported by the API, if any, on the active span."""
+    usage = getattr(response, "usage", None)
+    if usage is None:
+        return
+    set_attribute("llm.prompt_tokens", usage.prompt_tokens)
+    set_attribute("llm.completion_tokens", usage.completion_tokens)
+
+
+def _store_stream(chunks: Iterator[str], cache: CompletionCache, key: str) -> Iterator[str]:
+    """Yields the chunks of a streamed completion and caches it once it is complete."""
+    received = []
+    for chunk in chunks:
+        received.append(chunk)
+        yield chunk
+    cache.set(key, "".join(received))
+
+
+def _stream_content(chunks) -> Iterator[str]:
+    """Yields the non-empty text deltas of a streamed chat completion."""
+    for chunk in chunks:
+        if not chunk.choices:
+            continue
+        delta = chunk.choices[0].delta.content
+        if delta:
+            yield delta
+
+
+async def acompletions_create(
+    client, messages: list, model: str, cache: CompletionCache | None = None
+) -> str:
+    """
+    Async counterpart of `completions_create`, awaiting the client's `completions.create` method.
+
+    Args:
+        client (AsyncGroq): The async Groq client object
+        messages (list[dict]): A list of message objects containing chat history for the model.
+        model (str): The model to use for generating tool calls and responses.
+        cache (CompletionCache | None): If given, identical requests are answered from the cache.
+
+    Returns:
+        str: The content of the model's response.
+    """
+    if cache is not None:
+        key = cache.key(model, messages)
+        cached = cache.get(key)
+        set_attribute("cache.hit", cached is not None)
+        if cached is not None:
+            return cached
+    response = await client.chat.completions.create(messages=messages, model=model)
+    _record_usage(response)
+    completion = str(response.choices[0].message.content)
+    if cache is not None:
+        cache.set(key, completion)
+    return completion
 
 
 def build_prompt_structure(prompt: str, role: str, tag: str = "") -> dict:
@@ -85,4 +247,102 @@ class FixedFirstChatHistory(ChatHistory):
         """
         if len(self) == self.total_length:
             self.pop(1)
-        super().append(msg)
\ No newline at end of file
+        super().append(msg)
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Estimates the number of tokens of a message. Uses the usual approximation of four
+    characters per token plus a small per-message overhead. It is O(1), so it is not cached:
+    a cache keyed on the text would be slower and keep whole messages alive.
+
+    Args:
+        text (str): The content of the message.
+
+    Returns:
+        int: The estimated number of tokens.
+    """
+    return len(text) // 4 + 4
+
+
+class TokenBudgetChatHistory(FixedFirstChatHistory):
+    def __init__(
+        self,
+        messages: list | None = None,
+        max_tokens: int = 8000,
+        pinned: int = 1,
+        keep_last: int = 2,
+        summary_chars: int = 300,
+        total_length: int = -1,
+        anchor: int | None = None,
+    ):
+        """Initialise the queue with a token budget.
+
+        Once the estimated size of the history exceeds `max_tokens`, the oldest observations
+        are compacted into short summaries and, if that is not enough, the oldest unpinned
+        messages are dropped, so the prompt sent each round stays bounded.
+
+        Args:
+            messages (list | None): A list of initial messages
+            max_tokens (int): The token budget of the whole history.
+            pinned (int): Number of leading messages (e.g. the system prompt) never compacted or dropped.
+            keep_last (int): Number of trailing messages never compacted or dropped.
+            summary_chars (int): Characters of an observation kept in its summary.
+            total_length (int): The maximum number of messages the chat history can hold.
+            anchor (int | None): Index of one more message never compacted or dropped, e.g. the
+                current question of a conversation, whose leading messages are older turns.
+        """
+        super().__init__(messages, total_length)
+        self.max_tokens = max_tokens
+        self.pinned = pinned
+        self.keep_last = keep_last
+        self.summary_chars = summary_chars
+        self.anchor = anchor
+        self.compact()
+
+    def tokens(self) -> int:
+        """Returns the estimated number of tokens of the whole history."""
+        return sum(estimate_tokens(msg["content"]) for msg in self)
+
+    def append(self, msg: dict):
+        """Add a message to the queue, compacting the history if it exceeds the budget.
+
+        Args:
+            msg (dict): The message to be added to the queue
+        """
+        super().append(msg)
+        self.compact()
+
+    def summarize(self, content: str) -> str:
+        """Returns the compacted form of an observation message."""
+        body = content[len("<observation>"):-len("</observation>")]
+        if len(body) > self.summary_chars:
+            body = body[: self.summary_chars] + "..."
+        return f"<observation>[summary] {body}</observation>"
+
+    def compact(self):
+        """Compacts old observations, then drops old messages, until the history fits the budget."""
+        total = self.tokens()
+        if total <= self.max_tokens:
+            return
+
+        for i in range(self.pinned, len(self) - self.keep_last):
+            content = self[i]["content"]
+            if (
+                content.startswith("<observation>")
+                and content.endswith("</observation>")
+                and not content.startswith("<observation>[summary]")
+            ):
+                summary = self.summarize(content)
+                total += estimate_tokens(summary) - estimate_tokens(content)
+                self[i] = {**self[i], "content": summary}
+                if total <= self.max_tokens:
+                    return
+
+        while total > self.max_tokens:
+            index = self.pinned + (self.anchor == self.pinned)
+            if index >= len(self) - self.keep_last:
+                break
+            total -= estimate_tokens(self.pop(index)["content"])
+            if self.anchor is not None and index < self.anchor:
+                self.anchor -= 1
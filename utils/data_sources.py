@@ -0,0 +1,525 @@
+import json
+import re
+from contextlib import contextmanager
+from datetime import datetime
+from datetime import timezone
+from html.parser import HTMLParser
+from typing import Any
+from typing import Callable
+
+from utils.historic_store import normalize_date
+
+BASE_URL = "https://coinmarketcap.com"
+API_URL = "https://api.coinmarketcap.com"
+
+# Identificador de CoinMarketCap para cotizar en USD
+USD_CONVERT_ID = 2781
+
+# Clase del elemento que muestra el precio en la página de cada moneda
+PRICE_CLASS = "sc-65e7f566-0.WXGwg.base-text"
+
+# Botón que añade filas más antiguas a la tabla de datos históricos
+LOAD_MORE_XPATH = "//button[contains(., 'Cargar más') or contains(., 'Load More')]"
+
+# Lee de una vez el texto de todas las celdas de la tabla de datos históricos
+READ_ROWS_JS = """
+return Array.from(document.querySelectorAll('tbody tr')).map(
+    tr => Array.from(tr.querySelectorAll('td')).map(td => td.innerText.trim())
+);
+"""
+
+NEXT_DATA_PATTERN = re.compile(
+    r'<script\b[^>]*\bid="__NEXT_DATA__"[^>]*>(.*?)</script>', re.DOTALL
+)
+PRICE_SPAN_PATTERN = re.compile(
+    r'<span[^>]*class="' + re.escape(PRICE_CLASS.replace(".", " ")) + r'"[^>]*>([^<]+)</span>'
+)
+
+
+ISO_DATE_PATTERN = re.compile(r"\d{4}-\d{2}-\d{2}")
+
+
+class DataSourceError(Exception):
+    """
+    Raised when a data source cannot provide the requested data, e.g. because the coin or the
+    page does not exist. Retrying the same call would fail the same way.
+    """
+
+
+class TransientDataSourceError(DataSourceError):
+    """
+    Raised when a backend fails in a way that may go away on retry: a connection error, a
+    timeout or a 5xx (or 429) response.
+    """
+
+
+class CircuitOpenError(TransientDataSourceError):
+    """Raised instead of calling a backend or tool whose circuit breaker is open."""
+
+
+def format_usd(value: float, decimals: int = 2) -> str:
+    """
+    Formats a number the way CoinMarketCap shows it (e.g. '$96,065.33').
+
+    Args:
+        value (float): The amount in USD.
+        decimals (int): Decimal places. Amounts below one dollar keep six.
+
+    Returns:
+        str: The formatted amount.
+    """
+    if 0 < abs(value) < 1:
+        decimals = max(decimals, 6)
+    return f"${value:,.{decimals}f}"
+
+
+def _find_dict(obj, key: str, where: Callable[[Any], bool] | None = None):
+    """
+    Returns the first nested dict of `obj` that contains `key`, depth first. With `where`,
+    only a dict whose value for `key` satisfies it is returned.
+    """
+    if isinstance(obj, dict):
+        if key in obj and (where is None or where(obj[key])):
+            return obj
+        children = obj.values()
+    elif isinstance(obj, list):
+        children = obj
+    else:
+        return None
+    for child in children:
+        found = _find_dict(child, key, where)
+        if found is not None:
+            return found
+    return None
+
+
+def history_rows(rows: list[list[str]]) -> list[list[str]]:
+    """
+    Keeps the rows of the historical-data table among the rows of every table of a page:
+    those with at least seven cells whose first cell is a date. Rows of other tables (e.g.
+    related coins) are dropped.
+    """
+    return [
+        row[:7] for row in rows
+        if len(row) >= 7 and ISO_DATE_PATTERN.fullmatch(normalize_date(row[0]))
+    ]
+
+
+def _has_id(value) -> bool:
+    return isinstance(value, dict) and "id" in value
+
+
+class _TableParser(HTMLParser):
+    """Collects the text of every cell of the `<tbody>` rows of an HTML page."""
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.rows: list[list[str]] = []
+        self._in_body = False
+        self._cell: list[str] | None = None
+
+    def handle_starttag(self, tag, attrs):
+        if tag == "tbody":
+            self._in_body = True
+        elif self._in_body and tag == "tr":
+            self.rows.append([])
+        elif self._in_body and tag == "td" and self.rows:
+            self._cell = []
+
+    def handle_endtag(self, tag):
+        if tag == "tbody":
+            self._in_body = False
+        elif tag == "td" and self._cell is not None:
+            self.rows[-1].append(" ".join("".join(self._cell).split()))
+            self._cell = None
+
+    def handle_data(self, data):
+        if self._cell is not None:
+            self._cell.append(data)
+
+
+class DataSource:
+    """
+    Base class of the backends that provide market data to the tools.
+
+    Subclasses implement `spot_price` and `historic_rows` and raise `DataSourceError`
+    when they cannot provide the data, or `TransientDataSourceError` when a retry may
+    succeed. Every method takes an optional `timeout` in seconds for that call; None means
+    the timeout the backend was configured with.
+    """
+
+    name = "base"
+
+    def spot_price(self, moneda: str, timeout: float | None = None) -> str:
+        """
+        Returns the current price of a coin.
+
+        Args:
+            moneda (str): The coin slug used by CoinMarketCap (e.g. 'bitcoin').
+            timeout (float | None): Seconds to wait for the backend.
+
+        Returns:
+            str: The price formatted as shown on the site (e.g. '$96,065.33').
+        """
+        raise NotImplementedError
+
+    def historic_rows(self, moneda: str, timeout: float | None = None) -> list[list[str]]:
+        """
+        Returns the rows of the historical-data table of a coin.
+
+        Args:
+            moneda (str): The coin slug used by CoinMarketCap (e.g. 'ethereum').
+            timeout (float | None): Seconds to wait for the backend.
+
+        Returns:
+            list[list[str]]: Rows as lists of cell texts in `utils.historic_store.COLUMNS` order.
+        """
+        raise NotImplementedError
+
+    def historic_range(
+        self, moneda: str, inicio: str, fin: str, timeout: float | None = None
+    ) -> list[list[str]]:
+        """
+        Returns the rows of the historical-data table of a coin covering a date window, with a
+        single page load. Backends may return extra rows outside the window.
+
+        Args:
+            moneda (str): The coin slug used by CoinMarketCap (e.g. 'ethereum').
+            inicio (str): First date of the window, in ISO format.
+            fin (str): Last date of the window, in ISO format.
+            timeout (float | None): Seconds to wait for the backend.
+
+        Returns:
+            list[list[str]]: Rows as lists of cell texts in `utils.historic_store.COLUMNS` order.
+        """
+        return self.historic_rows(moneda, timeout)
+
+
+class HttpDataSource(DataSource):
+    """
+    A lightweight backend that downloads pages over pooled HTTP connections and reads the
+    data from the JSON embedded in them (or their HTML) without starting a browser.
+
+    Attributes:
+        base_url (str): Root of the CoinMarketCap site.
+        api_url (str): Root of the CoinMarketCap data API used for historical quotes.
+        timeout (float): Seconds to wait for each HTTP response, unless a call passes its own.
+    """
+
+    name = "http"
+
+    def __init__(
+        self,
+        base_url: str = BASE_URL,
+        api_url: str = API_URL,
+        timeout: float = 10.0,
+        pool_size: int = 10,
+        session=None,
+    ) -> None:
+        self.base_url = base_url.rstrip("/")
+        self.api_url = api_url.rstrip("/")
+        self.timeout = timeout
+        self.pool_size = pool_size
+        self._session = session
+        self._coin_ids: dict[str, int] = {}
+
+    @property
+    def session(self):
+        """The shared `requests.Session`, created on first use with a connection pool."""
+        if self._session is None:
+            import requests
+            from requests.adapters import HTTPAdapter
+
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=self.pool_size, pool_maxsize=self.pool_size)
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            session.headers["User-Agent"] = "Mozilla/5.0 (X11; Linux x86_64)"
+            self._session = session
+        return self._session
+
+    def _get(self, url: str, timeout: float | None = None, **params):
+        try:
+            response = self.session.get(
+                url, params=params or None, timeout=self.timeout if timeout is None else timeout
+            )
+        except Exception as e:
+            raise TransientDataSourceError(f"GET {url} failed: {e}") from e
+        try:
+            response.raise_for_status()
+        except Exception as e:
+            # Un 404 no cambia al reintentar; un 5xx o un 429 sí pueden
+            transient = response.status_code >= 500 or response.status_code == 429
+            raise (TransientDataSourceError if transient else DataSourceError)(
+                f"GET {url} failed: {e}"
+            ) from e
+        return response
+
+    @staticmethod
+    def _next_data(html: str) -> dict | None:
+        match = NEXT_DATA_PATTERN.search(html)
+        if match is None:
+            return None
+        try:
+            return json.loads(match.group(1))
+        except ValueError:
+            return None
+
+    def spot_price(self, moneda: str, timeout: float | None = None) -> str:
+        html = self._get(f"{self.base_url}/es/currencies/{moneda}/", timeout).text
+        statistics = _find_dict(
+            self._next_data(html), "statistics",
+            where=lambda value: isinstance(value, dict) and value.get("price") is not None,
+        )
+        if statistics is not None:
+            return format_usd(float(statistics["statistics"]["price"]))
+        match = PRICE_SPAN_PATTERN.search(html)
+        if match is not None:
+            return match.group(1).strip()
+        raise DataSourceError(f"No price found in the page of {moneda}")
+
+    def historic_rows(self, moneda: str, timeout: float | None = None) -> list[list[str]]:
+        html = self._get(f"{self.base_url}/es/currencies/{moneda}/historical-data/", timeout).text
+        parser = _TableParser()
+        parser.feed(html)
+        rows = history_rows(parser.rows)
+        if rows:
+            return rows
+
+        # La tabla se rellena en el navegador: se piden las cotizaciones al API de datos
+        found = _find_dict(self._next_data(html), "detail", where=_has_id)
+        if found is None:
+            raise DataSourceError(f"No historical data found in the page of {moneda}")
+        return self._api_rows(found["detail"]["id"], timeout)
+
+    def _coin_id(self, moneda: str, timeout: float | None = None) -> int:
+        """Returns the CoinMarketCap id of a coin, reading its page only the first time."""
+        if moneda not in self._coin_ids:
+            html = self._get(f"{self.base_url}/es/currencies/{moneda}/", timeout).text
+            found = _find_dict(self._next_data(html), "detail", where=_has_id)
+            if found is None:
+                raise DataSourceError(f"No coin id found in the page of {moneda}")
+            self._coin_ids[moneda] = found["detail"]["id"]
+        return self._coin_ids[moneda]
+
+    def historic_range(
+        self, moneda: str, inicio: str, fin: str, timeout: float | None = None
+    ) -> list[list[str]]:
+        # El API devuelve todo el periodo de una vez; se pide con un día de margen
+        start = datetime.fromisoformat(inicio).replace(tzinfo=timezone.utc).timestamp()
+        end = datetime.fromisoformat(fin).replace(tzinfo=timezone.utc).timestamp()
+        return self._api_rows(
+            self._coin_id(moneda, timeout), timeout,
+            timeStart=int(start) - 86400, timeEnd=int(end) + 86400,
+        )
+
+    def _api_rows(self, coin_id: int, timeout: float | None = None, **params) -> list[list[str]]:
+        payload = self._get(
+            f"{self.api_url}/data-api/v3/cryptocurrency/historical",
+            timeout,
+            id=coin_id,
+            convertId=USD_CONVERT_ID,
+            **params,
+        ).json()
+        quotes = (payload.get("data") or {}).get("quotes") or []
+        rows = []
+        for item in quotes:
+            quote = item["quote"]
+            fecha = datetime.fromisoformat(item["timeOpen"].replace("Z", "+00:00"))
+            rows.append([
+                fecha.strftime("%b %d, %Y"),
+                format_usd(quote["open"]),
+                format_usd(quote["high"]),
+                format_usd(quote["low"]),
+                format_usd(quote["close"]),
+                format_usd(quote["volume"], 0),
+                format_usd(quote["marketCap"], 0),
+            ])
+        if not rows:
+            raise DataSourceError(f"The data API returned no quotes for coin id {coin_id}")
+        # Mismo orden que la tabla de la página: de la fecha más reciente a la más antigua
+        rows.reverse()
+        return rows
+
+
+def _page_error(error: Exception) -> DataSourceError:
+    """
+    Wraps an error reading a rendered page: waiting too long for it is transient, a missing
+    element is not.
+    """
+    from selenium.common.exceptions import TimeoutException
+
+    transient = isinstance(error, TimeoutException)
+    return (TransientDataSourceError if transient else DataSourceError)(str(error))
+
+
+class SeleniumDataSource(DataSource):
+    """
+    A backend that renders the pages in a headless browser borrowed from a `DriverPool`.
+    It is slow and memory hungry, so it is meant to be used as a fallback.
+
+    Attributes:
+        pool (DriverPool): The pool the browsers are borrowed from.
+        base_url (str): Root of the CoinMarketCap site.
+        timeout (float): Seconds to wait for a page to load and for the historical-data table
+            to render, unless a call passes its own.
+        max_pages (int): Maximum number of times the table is extended with older rows.
+    """
+
+    name = "selenium"
+
+    def __init__(
+        self, pool, base_url: str = BASE_URL, timeout: float = 10.0, max_pages: int = 20
+    ) -> None:
+        self.pool = pool
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+        self.max_pages = max_pages
+
+    @contextmanager
+    def _page(self, url: str, timeout: float):
+        """
+        Borrows a driver and loads `url` in it. Errors of the browser itself, including a page
+        that does not load in `timeout` seconds, are raised as `TransientDataSourceError`
+        after the pool has replaced the driver.
+        """
+        try:
+            with self.pool.driver() as driver:
+                driver.set_page_load_timeout(timeout)
+                driver.get(url)
+                yield driver
+        except DataSourceError:
+            raise
+        except Exception as e:
+            raise TransientDataSourceError(f"GET {url} failed: {e}") from e
+
+    def spot_price(self, moneda: str, timeout: float | None = None) -> str:
+        from selenium.webdriver.common.by import By
+
+        timeout = self.timeout if timeout is None else timeout
+        # Un dato que no aparece en la página no rompe el navegador: el error se lanza
+        # después de devolverlo al pool para que no se recicle
+        error = None
+        with self._page(f"{self.base_url}/es/currencies/{moneda}/", timeout) as driver:
+            try:
+                # Se busca el elemento que contiene el precio
+                span = driver.find_element(By.CLASS_NAME, PRICE_CLASS)
+                return span.text
+            except Exception as e:
+                error = e
+        raise _page_error(error) from error
+
+    def historic_rows(self, moneda: str, timeout: float | None = None) -> list[list[str]]:
+        from selenium.webdriver.common.by import By
+        from selenium.webdriver.support import expected_conditions as EC
+        from selenium.webdriver.support.ui import WebDriverWait
+
+        timeout = self.timeout if timeout is None else timeout
+        error = None
+        with self._page(f"{self.base_url}/es/currencies/{moneda}/historical-data/", timeout) as driver:
+            try:
+                # Se espera a que la tabla tenga filas y se leen todas de una vez
+                WebDriverWait(driver, timeout).until(
+                    EC.visibility_of_element_located((By.XPATH, "//tbody/tr[td]"))
+                )
+                return history_rows(driver.execute_script(READ_ROWS_JS))
+            except Exception as e:
+                error = e
+        raise _page_error(error) from error
+
+    def historic_range(
+        self, moneda: str, inicio: str, fin: str, timeout: float | None = None
+    ) -> list[list[str]]:
+        from selenium.webdriver.common.by import By
+        from selenium.webdriver.support import expected_conditions as EC
+        from selenium.webdriver.support.ui import WebDriverWait
+
+        timeout = self.timeout if timeout is None else timeout
+        error = None
+        with self._page(f"{self.base_url}/es/currencies/{moneda}/historical-data/", timeout) as driver:
+            try:
+                WebDriverWait(driver, timeout).until(
+                    EC.visibility_of_element_located((By.XPATH, "//tbody/tr[td]"))
+                )
+                rows = driver.execute_script(READ_ROWS_JS)
+            except Exception as e:
+                error = e
+            else:
+                return history_rows(self._load_older_rows(driver, rows, inicio, timeout))
+        raise _page_error(error) from error
+
+    def _load_older_rows(
+        self, driver, rows: list[list[str]], inicio: str, timeout: float
+    ) -> list[list[str]]:
+        """Extends the historical-data table with older rows until it covers `inicio`."""
+        from selenium.webdriver.common.by import By
+        from selenium.webdriver.support.ui import WebDriverWait
+
+        count_js = "return document.querySelectorAll('tbody tr').length;"
+        # Se piden filas más antiguas hasta cubrir el inicio del periodo
+        for _ in range(self.max_pages):
+            fechas = [normalize_date(row[0]) for row in history_rows(rows)]
+            if not fechas or min(fechas) <= inicio:
+                break
+            buttons = driver.find_elements(By.XPATH, LOAD_MORE_XPATH)
+            if not buttons:
+                break
+            try:
+                driver.execute_script("arguments[0].click();", buttons[0])
+                WebDriverWait(driver, timeout).until(
+                    lambda d: d.execute_script(count_js) > len(rows)
+                )
+            except Exception:
+                break
+            rows = driver.execute_script(READ_ROWS_JS)
+        return rows
+
+
+class FallbackDataSource(DataSource):
+    """
+    Tries a list of backends in order and returns the first successful answer.
+
+    Attributes:
+        sources (list[DataSource]): The backends, fastest first.
+    """
+
+    name = "fallback"
+
+    def __init__(self, sources: list[DataSource]) -> None:
+        self.sources = sources
+
+    def _first(self, method: str, *args, timeout: float | None = None):
+        # El timeout solo se pasa si se ha pedido uno, para no exigirlo a cualquier backend
+        kwargs = {} if timeout is None else {"timeout": timeout}
+        errors = []
+        kinds = set()
+        for source in self.sources:
+            try:
+                return getattr(source, method)(*args, **kwargs)
+            except Exception as e:
+                errors.append(f"{source.name}: {e}")
+                kinds.add(
+                    CircuitOpenError if isinstance(e, CircuitOpenError)
+                    else TransientDataSourceError if isinstance(e, TransientDataSourceError)
+                    else DataSourceError
+                )
+        # Si algún backend responde que el dato no existe, reintentar no sirve; si todos están
+        # cortados, tampoco tiene sentido reintentar enseguida
+        if DataSourceError in kinds or not kinds:
+            error = DataSourceError
+        elif kinds == {CircuitOpenError}:
+            error = CircuitOpenError
+        else:
+            error = TransientDataSourceError
+        raise error("; ".join(errors))
+
+    def spot_price(self, moneda: str, timeout: float | None = None) -> str:
+        return self._first("spot_price", moneda, timeout=timeout)
+
+    def historic_rows(self, moneda: str, timeout: float | None = None) -> list[list[str]]:
+        return self._first("historic_rows", moneda, timeout=timeout)
+
+    def historic_range(
+        self, moneda: str, inicio: str, fin: str, timeout: float | None = None
+    ) -> list[list[str]]:
+        return self._first("historic_range", moneda, inicio, fin, timeout=timeout)
@@ -0,0 +1,208 @@
+import queue
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable
+
+
+class DriverPoolTimeout(TimeoutError):
+    """Raised when no driver could be checked out of the pool in time."""
+
+
+class PooledDriver:
+    """
+    A browser driver owned by a `DriverPool`, together with the bookkeeping the pool
+    needs to decide when it must be recycled.
+
+    Attributes:
+        driver: The underlying driver object (e.g. a selenium `webdriver.Chrome`).
+        pages (int): Number of pages served since the driver was created.
+        created_at (float): Monotonic timestamp of the driver creation.
+        broken (bool): Set when the driver crashed while checked out.
+    """
+
+    def __init__(self, driver) -> None:
+        self.driver = driver
+        self.pages = 0
+        self.created_at = time.monotonic()
+        self.broken = False
+
+
+class DriverPool:
+    """
+    A thread-safe pool of reusable browser drivers.
+
+    Drivers are created through `factory` until `size` of them exist, then recycled after
+    `max_pages` page loads or as soon as they crash or fail a health check, so the cost of
+    starting a browser is paid at warm-up instead of on every tool call.
+
+    Attributes:
+        factory (Callable): Zero-argument callable that starts a new driver.
+        size (int): Maximum number of drivers alive at the same time.
+        max_pages (int): Number of page loads after which a driver is replaced.
+        checkout_timeout (float): Default seconds to wait for a free driver.
+    """
+
+    def __init__(
+        self,
+        factory: Callable,
+        size: int = 2,
+        max_pages: int = 50,
+        checkout_timeout: float = 30.0,
+        health_check: Callable | None = None,
+    ) -> None:
+        self.factory = factory
+        self.size = size
+        self.max_pages = max_pages
+        self.checkout_timeout = checkout_timeout
+        self.health_check = health_check or self._default_health_check
+        self._idle: queue.LifoQueue = queue.LifoQueue()
+        self._lock = threading.Lock()
+        self._alive = 0
+        self._closed = False
+        self.stats = {"created": 0, "recycled": 0, "checkouts": 0, "timeouts": 0}
+
+    @staticmethod
+    def _default_health_check(driver) -> bool:
+        """A driver is healthy when its session still answers a trivial command."""
+        try:
+            driver.current_url
+            return True
+        except Exception:
+            return False
+
+    def _create(self) -> PooledDriver:
+        pooled = PooledDriver(self.factory())
+        with self._lock:
+            self.stats["created"] += 1
+        return pooled
+
+    def _destroy(self, pooled: PooledDriver) -> None:
+        try:
+            pooled.driver.quit()
+        except Exception:
+            pass
+        with self._lock:
+            self._alive -= 1
+            self.stats["recycled"] += 1
+
+    def _reserve_slot(self) -> bool:
+        """Reserve room for a new driver if the pool has not reached its size."""
+        with self._lock:
+            if self._alive < self.size:
+                self._alive += 1
+                return True
+        return False
+
+    def warm_up(self, count: int | None = None) -> None:
+        """
+        Starts drivers ahead of time so that later checkouts never pay browser startup.
+
+        Args:
+            count (int | None): Number of drivers to start. Defaults to the pool size.
+        """
+        count = self.size if count is None else min(count, self.size)
+        started = 0
+        while started < count and self._reserve_slot():
+            try:
+                pooled = self._create()
+            except Exception:
+                with self._lock:
+                    self._alive -= 1
+                raise
+            if self._closed:
+                self._destroy(pooled)
+                return
+            self._idle.put(pooled)
+            started += 1
+
+    def checkout(self, timeout: float | None = None) -> PooledDriver:
+        """
+        Borrows a healthy driver from the pool, starting one only if the pool is not full.
+
+        Args:
+            timeout (float | None): Seconds to wait for a free driver. Defaults to `checkout_timeout`.
+
+        Returns:
+            PooledDriver: The borrowed driver. It must be given back with `checkin`.
+
+        Raises:
+            DriverPoolTimeout: If no driver becomes available before the timeout.
+        """
+        if self._closed:
+            raise RuntimeError("DriverPool is closed")
+        timeout = self.checkout_timeout if timeout is None else timeout
+        deadline = time.monotonic() + timeout
+        while True:
+            try:
+                pooled = self._idle.get_nowait()
+            except queue.Empty:
+                if self._reserve_slot():
+                    try:
+                        pooled = self._create()
+                    except Exception:
+                        with self._lock:
+                            self._alive -= 1
+                        raise
+                else:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        with self._lock:
+                            self.stats["timeouts"] += 1
+                        raise DriverPoolTimeout(
+                            f"No driver available after {timeout} seconds"
+                        )
+                    try:
+                        pooled = self._idle.get(timeout=remaining)
+                    except queue.Empty:
+                        continue
+
+            if self.health_check(pooled.driver):
+                with self._lock:
+                    self.stats["checkouts"] += 1
+                return pooled
+            self._destroy(pooled)
+
+    def checkin(self, pooled: PooledDriver) -> None:
+        """
+        Gives a driver back to the pool, recycling it if it crashed or served too many pages.
+
+        Args:
+            pooled (PooledDriver): The driver obtained from `checkout`.
+        """
+        pooled.pages += 1
+        if self._closed or pooled.broken or pooled.pages >= self.max_pages:
+            self._destroy(pooled)
+            return
+        self._idle.put(pooled)
+
+    @contextmanager
+    def driver(self, timeout: float | None = None):
+        """
+        Context manager around `checkout`/`checkin`. Any exception raised inside the block
+        marks the driver as broken so that it is replaced instead of reused.
+
+        Args:
+            timeout (float | None): Seconds to wait for a free driver.
+
+        Yields:
+            The underlying driver object.
+        """
+        pooled = self.checkout(timeout)
+        try:
+            yield pooled.driver
+        except BaseException:
+            pooled.broken = True
+            raise
+        finally:
+            self.checkin(pooled)
+
+    def close(self) -> None:
+        """Quits every idle driver. Drivers still checked out are quit on checkin."""
+        self._closed = True
+        while True:
+            try:
+                pooled = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            self._destroy(pooled)
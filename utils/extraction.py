@@ -1,5 +1,8 @@
+import json
 import re
 from dataclasses import dataclass
+from dataclasses import field
+from functools import lru_cache
 
 
 @dataclass
@@ -16,6 +19,12 @@ class TagContentResult:
     found: bool
 
 
+@lru_cache(maxsize=None)
+def _tag_pattern(tag: str) -> re.Pattern:
+    """Compiles (once per tag) the regex that finds multiple occurrences of the tag."""
+    return re.compile(rf"<{re.escape(tag)}>(.*?)</{re.escape(tag)}>", re.DOTALL)
+
+
 def extract_tag_content(text: str, tag: str) -> TagContentResult:
     """
     Extracts all content enclosed by specified tags (e.g., <thought>, <response>, etc.).
@@ -29,14 +38,247 @@ def extract_tag_content(text: str, tag: str) -> TagContentResult:
             - 'content' (list): A list of strings containing the content found between the specified tags.
             - 'found' (bool): A flag indicating whether any content was found for the given tag.
     """
-    # Build the regex pattern dynamically to find multiple occurrences of the tag
-    tag_pattern = rf"<{tag}>(.*?)</{tag}>"
-
     # Use findall to capture all content between the specified tag
-    matched_contents = re.findall(tag_pattern, text, re.DOTALL)
+    matched_contents = _tag_pattern(tag).findall(text)
 
     # Return the dataclass instance with the result
     return TagContentResult(
         content=[content.strip() for content in matched_contents],
         found=bool(matched_contents),
-    )
\ No newline at end of file
+    )
+
+COMPLETION_TAGS = ("response", "thought", "tool_call")
+
+_OPEN_TAG_PATTERN = re.compile("<(" + "|".join(COMPLETION_TAGS) + ")>")
+_CLOSING_TAGS = {tag: f"</{tag}>" for tag in COMPLETION_TAGS}
+
+
+@dataclass
+class ParsedCompletion:
+    """
+    A data class with everything the ReAct loop needs from a completion.
+
+    Attributes:
+        response (str | None): The content of the first <response> tag, if any.
+        thoughts (list[str]): The contents of the <thought> tags.
+        tool_calls (list[dict]): The decoded and validated tool calls.
+        errors (list[str]): Descriptions of the tool calls that could not be decoded.
+    """
+
+    response: str | None = None
+    thoughts: list[str] = field(default_factory=list)
+    tool_calls: list[dict] = field(default_factory=list)
+    errors: list[str] = field(default_factory=list)
+
+    @property
+    def thought(self) -> str:
+        """The first thought, or an empty string."""
+        return self.thoughts[0] if self.thoughts else ""
+
+
+def decode_tool_call(content: str, index: int = 0) -> dict:
+    """
+    Decodes and validates the JSON content of a <tool_call> tag.
+
+    Args:
+        content (str): The content of the tag.
+        index (int): Position of the call in the completion, used as id when the call has none.
+
+    Returns:
+        dict: The tool call with a 'name' string, an 'arguments' dict and an 'id' (a string or
+            a number).
+
+    Raises:
+        ValueError: If the content is not a valid tool call.
+    """
+    tool_call = json.loads(content)
+    if not isinstance(tool_call, dict) or not isinstance(tool_call.get("name"), str):
+        raise ValueError("a tool call must be a JSON object with a 'name'")
+    arguments = tool_call.get("arguments", {})
+    if isinstance(arguments, str):
+        arguments = json.loads(arguments) if arguments.strip() else {}
+    if not isinstance(arguments, dict):
+        raise ValueError("the 'arguments' of a tool call must be a JSON object")
+    tool_call["arguments"] = arguments
+    tool_call.setdefault("id", index)
+    if isinstance(tool_call["id"], bool) or not isinstance(tool_call["id"], (str, int, float)):
+        raise ValueError("the 'id' of a tool call must be a string or a number")
+    return tool_call
+
+
+def unique_call_id(tool_call: dict, taken) -> str | int | float:
+    """
+    Renames the id of a tool call that repeats one of `taken` (e.g. two calls with 'id': 0
+    in the same round) so that no result overwrites another, and returns it.
+
+    Args:
+        tool_call (dict): The decoded tool call. Its 'id' is updated in place.
+        taken: The ids already used in the round (any container supporting `in`).
+
+    Returns:
+        str | int | float: The unique id.
+    """
+    call_id = tool_call["id"]
+    suffix = 1
+    while call_id in taken:
+        call_id = f"{tool_call['id']}_{suffix}"
+        suffix += 1
+    tool_call["id"] = call_id
+    return call_id
+
+
+def parse_completion(text: str) -> ParsedCompletion:
+    """
+    Extracts the response, thoughts and tool calls of a completion in a single pass.
+
+    Parameters:
+        text (str): The completion generated by the model.
+
+    Returns:
+        ParsedCompletion: The parsed completion. Malformed tool calls are reported in `errors`
+            instead of raising.
+    """
+    parsed = ParsedCompletion()
+    match = _OPEN_TAG_PATTERN.search(text)
+    while match is not None:
+        tag, start = match.group(1), match.end()
+        end = text.find(_CLOSING_TAGS[tag], start)
+        if end == -1:
+            # An unterminated tag runs until the next opening tag or the end of the text
+            match = _OPEN_TAG_PATTERN.search(text, start)
+            content = text[start: match.start() if match else len(text)].strip()
+        else:
+            content = text[start:end].strip()
+            match = _OPEN_TAG_PATTERN.search(text, end + len(_CLOSING_TAGS[tag]))
+
+        if tag == "response":
+            if parsed.response is None:
+                parsed.response = content
+        elif tag == "thought":
+            parsed.thoughts.append(content)
+        else:
+            try:
+                tool_call = decode_tool_call(content, len(parsed.tool_calls))
+                unique_call_id(tool_call, {call["id"] for call in parsed.tool_calls})
+                parsed.tool_calls.append(tool_call)
+            except ValueError as e:
+                parsed.errors.append(f"Invalid tool call {content!r}: {e}")
+    return parsed
+
+
+@dataclass
+class TagEvent:
+    """
+    An event emitted by `IncrementalTagParser` while a completion is being streamed.
+
+    Attributes:
+        tag (str): The name of the tag the event belongs to (e.g. 'response', 'tool_call').
+        text (str): For closed events the full stripped content of the tag, otherwise the new
+            chunk of content received since the previous event of the same tag.
+        closed (bool): Whether the closing tag has been received.
+    """
+
+    tag: str
+    text: str
+    closed: bool
+
+
+class IncrementalTagParser:
+    """
+    Parses a completion chunk by chunk, emitting each tag as soon as its closing tag arrives,
+    so that tool calls can start while the model is still generating. The content of the
+    tags listed in `stream_tags` is also emitted incrementally as it arrives.
+
+    Attributes:
+        tags (tuple[str]): The tags to recognise. Text outside these tags is discarded.
+        stream_tags (tuple[str]): The tags whose content is emitted incrementally.
+    """
+
+    def __init__(
+        self,
+        tags: tuple[str, ...] = ("response", "thought", "tool_call"),
+        stream_tags: tuple[str, ...] = ("response",),
+    ) -> None:
+        self.tags = tags
+        self.stream_tags = stream_tags
+        self._open_pattern = re.compile("<(" + "|".join(map(re.escape, tags)) + ")>")
+        self._max_open_length = max(len(tag) for tag in tags) + 2
+        self._buffer = ""
+        self._current: str | None = None
+        self._content: list[str] = []
+        self._started = False
+
+    def _emit_partial(self, text: str, events: list[TagEvent]) -> None:
+        """Accumulates `text` in the open tag and emits it if the tag is streamed."""
+        if not self._started:
+            text = text.lstrip()
+            self._started = bool(text)
+        self._content.append(text)
+        if text and self._current in self.stream_tags:
+            events.append(TagEvent(self._current, text, False))
+
+    def feed(self, chunk: str) -> list[TagEvent]:
+        """
+        Consumes a new chunk of the completion.
+
+        Args:
+            chunk (str): The text received since the previous call.
+
+        Returns:
+            list[TagEvent]: The events triggered by this chunk, in order.
+        """
+        self._buffer += chunk
+        events: list[TagEvent] = []
+        while self._buffer:
+            if self._current is None:
+                match = self._open_pattern.search(self._buffer)
+                if match:
+                    self._current = match.group(1)
+                    self._content = []
+                    self._started = False
+                    self._buffer = self._buffer[match.end():]
+                    continue
+                # Keep a trailing '<...' that may still become an opening tag
+                start = self._buffer.rfind("<")
+                if start == -1 or len(self._buffer) - start >= self._max_open_length:
+                    self._buffer = ""
+                else:
+                    self._buffer = self._buffer[start:]
+                break
+
+            closing = f"</{self._current}>"
+            end = self._buffer.find(closing)
+            if end != -1:
+                self._emit_partial(self._buffer[:end], events)
+                events.append(
+                    TagEvent(self._current, "".join(self._content).strip(), True)
+                )
+                self._buffer = self._buffer[end + len(closing):]
+                self._current = None
+                continue
+
+            # Hold back a trailing prefix of the closing tag split across chunks
+            keep = next(
+                (k for k in range(len(closing) - 1, 0, -1) if self._buffer.endswith(closing[:k])),
+                0,
+            )
+            self._emit_partial(self._buffer[: len(self._buffer) - keep], events)
+            self._buffer = self._buffer[len(self._buffer) - keep:]
+            break
+        return events
+
+    def close(self) -> list[TagEvent]:
+        """
+        Signals the end of the completion. A tag left open is closed with the content received.
+
+        Returns:
+            list[TagEvent]: The closing event of the unterminated tag, if any.
+        """
+        events: list[TagEvent] = []
+        if self._current is not None:
+            self._emit_partial(self._buffer, events)
+            events.append(TagEvent(self._current, "".join(self._content).strip(), True))
+        self._buffer = ""
+        self._current = None
+        self._content = []
+        return events
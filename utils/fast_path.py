@@ -0,0 +1,312 @@
+import calendar
+import re
+from dataclasses import dataclass
+from datetime import date
+from datetime import timedelta
+from typing import Any
+from typing import Callable
+
+from utils.historic_store import normalize_date
+
+# Nombres y tickers reconocidos, con el identificador que usan las herramientas
+COIN_ALIASES = {
+    "bitcoin": "bitcoin", "btc": "bitcoin",
+    "ethereum": "ethereum", "ether": "ethereum", "eth": "ethereum",
+    "solana": "solana", "sol": "solana",
+    "cardano": "cardano", "ada": "cardano",
+    "dogecoin": "dogecoin", "doge": "dogecoin",
+    "xrp": "xrp", "ripple": "xrp",
+    "bnb": "bnb",
+    "litecoin": "litecoin", "ltc": "litecoin",
+    "tron": "tron", "trx": "tron",
+    "polkadot": "polkadot",
+    "avalanche": "avalanche", "avax": "avalanche",
+    "chainlink": "chainlink",
+    "tether": "tether", "usdt": "tether",
+}
+
+MONTHS = {
+    "enero": 1, "febrero": 2, "marzo": 3, "abril": 4, "mayo": 5, "junio": 6, "julio": 7,
+    "agosto": 8, "septiembre": 9, "setiembre": 9, "octubre": 10, "noviembre": 11, "diciembre": 12,
+    "january": 1, "february": 2, "march": 3, "april": 4, "may": 5, "june": 6, "july": 7,
+    "august": 8, "september": 9, "october": 10, "november": 11, "december": 12,
+    "jan": 1, "feb": 2, "mar": 3, "apr": 4, "jun": 6, "jul": 7, "aug": 8, "sep": 9, "sept": 9,
+    "oct": 10, "nov": 11, "dec": 12,
+}
+MESES = ("enero", "febrero", "marzo", "abril", "mayo", "junio", "julio", "agosto",
+         "septiembre", "octubre", "noviembre", "diciembre")
+
+_MONTH = "|".join(sorted(MONTHS, key=len, reverse=True))
+_WORD = re.compile(r"[a-záéíóúñü0-9]+")
+_SPANISH = re.compile(r"\b(precio|cu[aá]nto|vale|cuesta|cotiza\w*|datos|indicadores|volatilidad|riesgo|hoy|ayer|anteayer|hace|de|del|el)\b")
+_INDICATORS = re.compile(r"\b(indicador(es)?|indicators?|volatilidad|volatility|riesgo|risk)\b")
+_HISTORIC = re.compile(r"\b(datos|data|apertura|open(ed|ing)?|m[aá]ximo|m[ií]nimo|high|low|market ?cap|capitalizaci[oó]n)\b")
+_PRICE = re.compile(r"\b(precio|price|vale|val[ií]a|cuesta|costaba|cotiza\w*|worth|cost|value|valor)\b|cu[aá]nto|how much")
+# Preguntas sobre periodos, comparaciones o explicaciones: necesitan el bucle completo
+_UNSUPPORTED = re.compile(
+    r"\b(entre|between|desde|since|hasta|until|semana pasada|last week|compar\w*|vs|versus|"
+    r"media|promedio|average|rango|range|evoluci[oó]n|tendencia|trend|por qu[eé]|why|"
+    r"predic\w*|forecast|deber[ií]a|should)\b"
+)
+
+# Restos que quedan al quitar las fechas reconocidas: periodos, fechas futuras, años sueltos,
+# cantidades, divisas, meses, festivos o tendencias que las plantillas no responderían bien
+_UNRESOLVED = re.compile(
+    r"\b(years?|a[nñ]os?|last|previous|[uú]ltim[oa]s?|pasad[oa]s?|anterior(es)?|ago|hace|"
+    r"tomorrow|ma[nñ]ana|next|pr[oó]xim[oa]s?|que viene|will|ser[aá]|valdr[aá]|costar[aá]|"
+    r"euros?|eur|pesos?|yen(es)?|jpy|libras?|pounds?|gbp|mxn|ars|cop|yuan|cny|francos?|chf|"
+    r"reales|brl|rublos?|rub|going|va a|sube|subir[aá]|bajar[aá]?|"
+    r"christmas|navidad|nochevieja|new year'?s?|a[nñ]o nuevo|easter|semana santa|halloween|"
+    rf"thanksgiving|black friday|{_MONTH})\b|€|£|¥|\d"
+)
+# Sin fecha reconocida, un verbo en pasado o un día de la semana apuntan a un día que no se
+# ha entendido: no es el precio actual
+_UNRESOLVED_PAST = re.compile(
+    r"\b(was|were|fue|era|estaba|val[ií]a|costaba|cotizaba|"
+    r"lunes|martes|mi[eé]rcoles|jueves|viernes|s[aá]bado|domingo|fin de semana|"
+    r"monday|tuesday|wednesday|thursday|friday|saturday|sunday|weekend)\b"
+)
+
+_RELATIVE_DATES = (
+    (re.compile(r"\b(anteayer|antier|day before yesterday)\b"), timedelta(days=2)),
+    (re.compile(r"\b(ayer|(?<!before )yesterday)\b"), timedelta(days=1)),
+    (re.compile(r"\bhace (una|un|\d+) (d[ií]as?|semanas?|mes(es)?)\b"), None),
+    (re.compile(r"\b(a|an|one|\d+) (days?|weeks?|months?) ago\b"), None),
+)
+_ABSOLUTE_DATES = (
+    re.compile(r"\b\d{4}-\d{2}-\d{2}\b"),
+    re.compile(r"\b\d{1,2}[/-]\d{1,2}[/-]\d{4}\b"),
+    re.compile(rf"\b(?P<day>\d{{1,2}})(?: de)? (?P<month>{_MONTH})\.?(?:,? (?:de |del )?(?P<year>\d{{4}}))?\b"),
+    re.compile(rf"\b(?P<month>{_MONTH})\.? (?P<day>\d{{1,2}})(?:st|nd|rd|th)?(?:,? (?P<year>\d{{4}}))?\b"),
+)
+
+
+def _months_ago(today: date, months: int) -> date:
+    """Subtracts calendar months, clamping the day to the length of the target month."""
+    month = today.month - 1 - months
+    year, month = today.year + month // 12, month % 12 + 1
+    return date(year, month, min(today.day, calendar.monthrange(year, month)[1]))
+
+
+def _relative_offset(match: re.Match, today: date) -> date:
+    cantidad, unidad = match.group(1), match.group(2)
+    n = 1 if cantidad in ("una", "un", "a", "an", "one") else int(cantidad)
+    if unidad.startswith(("mes", "month")):
+        return _months_ago(today, n)
+    if unidad.startswith(("semana", "week")):
+        return today - timedelta(weeks=n)
+    return today - timedelta(days=n)
+
+
+def extract_date(text: str, today: date) -> date | None | bool:
+    """
+    Finds the date a question refers to, resolving relative dates against `today`.
+
+    Args:
+        text (str): The lowercased question.
+        today (date): The current date.
+
+    Returns:
+        date | None | bool: The date, None if the question mentions no date, or False if it
+            mentions one that cannot be resolved or more than one.
+    """
+    found = []
+    for pattern, offset in _RELATIVE_DATES:
+        for match in pattern.finditer(text):
+            found.append(today - offset if offset else _relative_offset(match, today))
+    if re.search(r"\b(hoy|today|ahora|now|actual(mente)?|current(ly)?)\b", text):
+        found.append(today)
+    for pattern in _ABSOLUTE_DATES:
+        for match in pattern.finditer(text):
+            if "month" in pattern.groupindex:
+                year = int(match["year"]) if match["year"] else today.year
+                try:
+                    found.append(date(year, MONTHS[match["month"]], int(match["day"])))
+                except ValueError:
+                    return False
+                continue
+            try:
+                found.append(date.fromisoformat(normalize_date(match.group(0))))
+            except ValueError:
+                return False
+    if not found:
+        return None
+    return found[0] if len(set(found)) == 1 else False
+
+
+def strip_dates(text: str) -> str:
+    """Removes the dates `extract_date` recognises from a lowercased question."""
+    for pattern in (*(pattern for pattern, _ in _RELATIVE_DATES), *_ABSOLUTE_DATES):
+        text = pattern.sub(" ", text)
+    return text
+
+
+@dataclass(frozen=True)
+class FastPathQuery:
+    """
+    A question the router can answer without the LLM.
+
+    Attributes:
+        intent (str): 'price' (current price), 'historic' (OHLC of a day) or 'indicators'.
+        moneda (str): The coin, as the tools expect it (e.g. 'bitcoin').
+        fecha (date | None): The day asked about; None for the current price.
+        lang (str): 'es' or 'en', the language of the answer.
+    """
+
+    intent: str
+    moneda: str
+    fecha: date | None
+    lang: str
+
+
+def coin_label(moneda: str) -> str:
+    return moneda.upper() if len(moneda) <= 3 else moneda.capitalize()
+
+
+def date_label(fecha: date, lang: str) -> str:
+    if lang == "es":
+        return f"{fecha.day} de {MESES[fecha.month - 1]} de {fecha.year}"
+    return fecha.strftime("%B %d, %Y").replace(" 0", " ")
+
+
+def _number(value: Any, suffix: str = "") -> str:
+    return "n/d" if value is None else f"{value:.2f}{suffix}"
+
+
+class FastPathRouter:
+    """
+    A deterministic pre-router for the most common questions: the current price of a coin,
+    its data on a given day and the indicators of a day. They are answered by calling the
+    tools directly and filling a template, which saves the two LLM round-trips of the ReAct
+    loop. Anything it cannot classify with confidence is left to the loop.
+
+    Attributes:
+        today (Callable[[], str]): Returns the current date in ISO format; relative dates
+            ('yesterday', 'hace una semana') are resolved against it.
+        coins (dict): Recognised coin names and tickers mapped to the tools' identifiers.
+    """
+
+    def __init__(self, today: Callable[[], str], coins: dict[str, str] | None = None) -> None:
+        self.today = today
+        self.coins = dict(COIN_ALIASES if coins is None else coins)
+
+    def classify(self, question: str) -> FastPathQuery | None:
+        """
+        Recognises a simple price, history or indicators question.
+
+        Args:
+            question (str): The user's question.
+
+        Returns:
+            FastPathQuery | None: The classified question, or None to use the ReAct loop.
+        """
+        text = " ".join(question.lower().split())
+        if _UNSUPPORTED.search(text):
+            return None
+        monedas = {self.coins[word] for word in _WORD.findall(text) if word in self.coins}
+        if len(monedas) != 1:
+            return None
+        moneda = monedas.pop()
+
+        today = date.fromisoformat(self.today())
+        fecha = extract_date(text, today)
+        if fecha is False or (fecha is not None and fecha > today):
+            return None
+        # Una fecha que no se ha entendido no puede tomarse por el precio actual
+        resto = strip_dates(text)
+        if _UNRESOLVED.search(resto) or (fecha is None and _UNRESOLVED_PAST.search(resto)):
+            return None
+        if fecha == today:
+            fecha = None
+
+        if _INDICATORS.search(text):
+            intent = "indicators"
+        elif _HISTORIC.search(text):
+            intent = "historic"
+        elif _PRICE.search(text):
+            intent = "price" if fecha is None else "historic"
+        else:
+            return None
+        # Los indicadores y los datos de un día necesitan una fecha pasada
+        if intent != "price" and fecha is None:
+            return None
+        lang = "es" if _SPANISH.search(text) else "en"
+        return FastPathQuery(intent=intent, moneda=moneda, fecha=fecha, lang=lang)
+
+    def answer(self, question: str, execute: Callable[[dict], Any], tools: dict) -> str | None:
+        """
+        Answers a question through the fast path.
+
+        Args:
+            question (str): The user's question.
+            execute (Callable[[dict], Any]): Runs a decoded tool call (e.g. the agent's
+                `execute_tool_call`) and returns its result.
+            tools (dict): The available tools by name.
+
+        Returns:
+            str | None: The answer, or None if the question was not classified, a needed tool
+                is not available or a tool failed; the ReAct loop should handle it then.
+        """
+        query = self.classify(question)
+        if query is None:
+            return None
+        needed = {
+            "price": ("get_actual_data",),
+            "historic": ("get_historic_data",),
+            "indicators": ("get_historic_data", "indicators_tool"),
+        }[query.intent]
+        if any(name not in tools for name in needed):
+            return None
+
+        moneda, lang = coin_label(query.moneda), query.lang
+        if query.intent == "price":
+            result = execute(_call("get_actual_data", moneda=query.moneda))
+            if not isinstance(result, dict) or "Precio" not in result:
+                return None
+            if lang == "es":
+                return f"El precio actual de {moneda} es {result['Precio']}."
+            return f"The current price of {moneda} is {result['Precio']}."
+
+        fecha = date_label(query.fecha, lang)
+        fila = execute(_call(
+            "get_historic_data", moneda=query.moneda, fecha=query.fecha.strftime("%b %d, %Y")
+        ))
+        if not isinstance(fila, dict) or "error" in fila:
+            return None
+        if query.intent == "historic":
+            if lang == "es":
+                return (
+                    f"El {fecha}, {moneda} abrió en {fila['Apertura']}, alcanzó un máximo de "
+                    f"{fila['Alza']} y un mínimo de {fila['Baja']}, con una capitalización de "
+                    f"mercado de {fila['MarketCap']}."
+                )
+            return (
+                f"On {fecha}, {moneda} opened at {fila['Apertura']}, reached a high of "
+                f"{fila['Alza']} and a low of {fila['Baja']}, with a market cap of {fila['MarketCap']}."
+            )
+
+        ind = execute(_call(
+            "indicators_tool", moneda=query.moneda, fecha=query.fecha.isoformat(),
+            Apertura=fila["Apertura"], Alza=fila["Alza"], Baja=fila["Baja"], MarketCap=fila["MarketCap"],
+        ))
+        if not isinstance(ind, dict) or "error" in ind:
+            return None
+        if lang == "es":
+            return (
+                f"Indicadores de {moneda} el {fecha}: volatilidad {_number(ind['volatilidad'], '%')}, "
+                f"potencial de ganancia {_number(ind['potencial_ganancia'], '%')}, potencial de "
+                f"pérdida {_number(ind['potencial_perdida'], '%')}, ratio riesgo/beneficio "
+                f"{_number(ind['ratio_riesgo_beneficio'])} e índice de riesgo simple "
+                f"{_number(ind['indice_riesgo_simple'])}."
+            )
+        return (
+            f"Indicators of {moneda} on {fecha}: volatility {_number(ind['volatilidad'], '%')}, "
+            f"potential gain {_number(ind['potencial_ganancia'], '%')}, potential loss "
+            f"{_number(ind['potencial_perdida'], '%')}, risk/reward ratio "
+            f"{_number(ind['ratio_riesgo_beneficio'])} and simple risk index "
+            f"{_number(ind['indice_riesgo_simple'])}."
+        )
+
+
+def _call(name: str, **arguments) -> dict:
+    return {"name": name, "arguments": arguments, "id": f"fast_{name}"}
@@ -0,0 +1,148 @@
+import sqlite3
+import threading
+from datetime import datetime
+
+# Formatos de fecha aceptados, empezando por el que usa la tabla de CoinMarketCap
+DATE_FORMATS = ("%b %d, %Y", "%Y-%m-%d", "%d-%m-%Y", "%d/%m/%Y")
+
+# Columnas de la tabla de datos históricos, en el orden en que aparecen en la página
+COLUMNS = ("Fecha", "Apertura", "Alza", "Baja", "Cierre", "Volumen", "MarketCap")
+
+
+def normalize_date(fecha: str) -> str:
+    """
+    Converts a date in any of the accepted formats to ISO format (YYYY-MM-DD).
+
+    Args:
+        fecha (str): The date to normalize (e.g. 'Jan 12, 2024').
+
+    Returns:
+        str: The ISO date, or the stripped input if it matches no known format.
+    """
+    fecha = " ".join(fecha.split())
+    for fmt in DATE_FORMATS:
+        try:
+            return datetime.strptime(fecha, fmt).date().isoformat()
+        except ValueError:
+            continue
+    return fecha
+
+
+class HistoricStore:
+    """
+    A persistent SQLite store of historical OHLC rows indexed by coin and date.
+
+    Historical rows never change once the day is closed, so every row seen on a page load
+    is kept and later queries for any of those dates are answered without a browser.
+    The database is opened on first use, so creating the store has no side effects.
+
+    Attributes:
+        path (str): Location of the SQLite database (':memory:' for a volatile store).
+    """
+
+    def __init__(self, path: str = ":memory:") -> None:
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = None
+
+    def _connection(self) -> sqlite3.Connection:
+        """Opens the database on first use. Must be called with the lock held."""
+        if self._conn is not None:
+            return self._conn
+        conn = sqlite3.connect(self.path, check_same_thread=False)
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS ohlc (
+                moneda TEXT NOT NULL,
+                fecha TEXT NOT NULL,
+                etiqueta TEXT NOT NULL,
+                apertura TEXT,
+                alza TEXT,
+                baja TEXT,
+                cierre TEXT,
+                volumen TEXT,
+                marketcap TEXT,
+                PRIMARY KEY (moneda, fecha)
+            ) WITHOUT ROWID
+            """
+        )
+        conn.commit()
+        self._conn = conn
+        return conn
+
+    def put_rows(self, moneda: str, rows: list[list[str]]) -> int:
+        """
+        Stores the rows of a historical-data table.
+
+        Args:
+            moneda (str): The coin the rows belong to.
+            rows (list[list[str]]): Table rows as lists of cell texts, in `COLUMNS` order.
+
+        Returns:
+            int: The number of rows stored.
+        """
+        records = [
+            (moneda.lower(), normalize_date(row[0]), row[0], *row[1:7])
+            for row in rows
+            if len(row) >= len(COLUMNS)
+        ]
+        with self._lock:
+            conn = self._connection()
+            conn.executemany(
+                "INSERT OR REPLACE INTO ohlc VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", records
+            )
+            conn.commit()
+        return len(records)
+
+    def get(self, moneda: str, fecha: str) -> dict | None:
+        """
+        Looks up the row of a coin for a given date.
+
+        Args:
+            moneda (str): The coin (e.g. 'ethereum').
+            fecha (str): The date in any of the accepted formats.
+
+        Returns:
+            dict | None: The row with the keys returned by `get_historic_data`, or None if unknown.
+        """
+        with self._lock:
+            row = self._connection().execute(
+                "SELECT apertura, alza, baja, marketcap FROM ohlc WHERE moneda = ? AND fecha = ?",
+                (moneda.lower(), normalize_date(fecha)),
+            ).fetchone()
+        if row is None:
+            return None
+        return {"Apertura": row[0], "Alza": row[1], "Baja": row[2], "MarketCap": row[3]}
+
+    def get_range(self, moneda: str, start: str, end: str) -> dict[str, list[str]]:
+        """
+        Returns the rows of a coin between two dates (both included), oldest first, in
+        columnar form.
+
+        Args:
+            moneda (str): The coin (e.g. 'ethereum').
+            start (str): First date, in any of the accepted formats.
+            end (str): Last date, in any of the accepted formats.
+
+        Returns:
+            dict[str, list[str]]: One list per column of `COLUMNS`, with 'Fecha' in ISO format.
+        """
+        with self._lock:
+            rows = self._connection().execute(
+                """
+                SELECT fecha, apertura, alza, baja, cierre, volumen, marketcap FROM ohlc
+                WHERE moneda = ? AND fecha BETWEEN ? AND ? ORDER BY fecha
+                """,
+                (moneda.lower(), normalize_date(start), normalize_date(end)),
+            ).fetchall()
+        return {column: [row[i] for row in rows] for i, column in enumerate(COLUMNS)}
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._connection().execute("SELECT COUNT(*) FROM ohlc").fetchone()[0]
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
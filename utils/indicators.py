@@ -0,0 +1,111 @@
+import numpy as np
+
+
+def parse_amounts(values) -> np.ndarray:
+    """
+    Converts amounts formatted as on CoinMarketCap (e.g. '$11,353,366,736') to floats.
+
+    Args:
+        values: A sequence of formatted strings or numbers. Empty or None values become NaN.
+
+    Returns:
+        np.ndarray: The amounts as a float array.
+    """
+    cleaned = [
+        str(v).replace("$", "").replace(",", "").strip() if v is not None else ""
+        for v in values
+    ]
+    return np.array([float(v) if v else np.nan for v in cleaned], dtype=float)
+
+
+def compute_indicators(
+    apertura: np.ndarray, alza: np.ndarray, baja: np.ndarray, marketcap: np.ndarray
+) -> dict[str, np.ndarray]:
+    """
+    Vectorized version of the indicators computed by `indicators_tool` for a single day.
+
+    Args:
+        apertura (np.ndarray): Opening prices.
+        alza (np.ndarray): Daily highs.
+        baja (np.ndarray): Daily lows.
+        marketcap (np.ndarray): Market capitalisations.
+
+    Returns:
+        dict[str, np.ndarray]: One array per indicator. Undefined values are NaN.
+    """
+    with np.errstate(divide="ignore", invalid="ignore"):
+        volatilidad = (alza - baja) / apertura * 100
+        potencial_ganancia = (alza - apertura) / apertura * 100
+        potencial_perdida = (apertura - baja) / apertura * 100
+        ratio_riesgo_beneficio = np.where(
+            potencial_perdida != 0, potencial_ganancia / potencial_perdida, np.nan
+        )
+        indice_riesgo_simple = np.where(
+            marketcap > 0, volatilidad / np.log(marketcap), np.nan
+        )
+    return {
+        "volatilidad": volatilidad,
+        "potencial_ganancia": potencial_ganancia,
+        "potencial_perdida": potencial_perdida,
+        "ratio_riesgo_beneficio": ratio_riesgo_beneficio,
+        "indice_riesgo_simple": indice_riesgo_simple,
+    }
+
+
+def daily_returns(cierre: np.ndarray) -> np.ndarray:
+    """
+    Daily percentage returns of a series of closing prices, oldest first.
+    The first element is NaN because it has no previous close.
+    """
+    returns = np.full(cierre.shape, np.nan)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        returns[1:] = np.diff(cierre) / cierre[:-1] * 100
+    return returns
+
+
+def rolling_volatility(cierre: np.ndarray, window: int) -> np.ndarray:
+    """
+    Rolling volatility: the standard deviation of the daily returns over the last `window` days.
+
+    Args:
+        cierre (np.ndarray): Closing prices, oldest first.
+        window (int): Number of daily returns in each window (e.g. 7 or 30).
+
+    Returns:
+        np.ndarray: Array aligned with `cierre`; positions without a full window are NaN.
+    """
+    returns = daily_returns(cierre)
+    result = np.full(cierre.shape, np.nan)
+    if window < 2 or len(returns) <= window:
+        return result
+    windows = np.lib.stride_tricks.sliding_window_view(returns[1:], window)
+    result[window:] = windows.std(axis=1, ddof=1)
+    return result
+
+
+def period_summary(volatilidad: np.ndarray, cierre: np.ndarray) -> dict:
+    """
+    Summarises the volatility of a period.
+
+    Args:
+        volatilidad (np.ndarray): Daily intraday volatility of the period.
+        cierre (np.ndarray): Closing prices of the period, oldest first.
+
+    Returns:
+        dict: Mean and maximum daily volatility and the standard deviation of the daily returns.
+    """
+    returns = daily_returns(cierre)
+    returns = returns[np.isfinite(returns)]
+    volatilidad = volatilidad[np.isfinite(volatilidad)]
+    return {
+        "dias": int(len(cierre)),
+        "volatilidad_media": round(float(volatilidad.mean()), 4) if len(volatilidad) else None,
+        "volatilidad_maxima": round(float(volatilidad.max()), 4) if len(volatilidad) else None,
+        "volatilidad_rendimientos": round(float(returns.std(ddof=1)), 4) if len(returns) > 1 else None,
+    }
+
+
+def to_list(values: np.ndarray, decimals: int = 4) -> list:
+    """Rounds an array into a JSON-friendly list, replacing NaN and infinities by None."""
+    rounded = np.round(values.astype(float), decimals)
+    return [float(v) if np.isfinite(v) else None for v in rounded]
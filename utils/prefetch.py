@@ -0,0 +1,146 @@
+import random
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import wait
+from typing import Callable
+from typing import Hashable
+
+
+class Prefetcher:
+    """
+    A background scheduler that keeps the most requested data warm.
+
+    Tools report each request with `record(kind, key)` (e.g. ('price', 'bitcoin')). Every
+    `interval` seconds, give or take `jitter`, the most popular keys of each kind are refreshed
+    with the function registered for that kind, at most `max_concurrency` at a time. Popularity
+    decays on every cycle, so coins that stop being asked about stop being refreshed; pinned
+    keys are refreshed on every cycle regardless.
+
+    Attributes:
+        interval (float): Seconds between refresh cycles.
+        jitter (float): Fraction of `interval` by which each cycle is randomly advanced or
+            delayed, so that refreshes do not line up with request bursts or other processes.
+        max_concurrency (int): Maximum number of refreshes running at the same time.
+        top (int): Number of keys of each kind refreshed per cycle.
+        min_score (float): Popularity a key needs to be refreshed.
+        decay (float): Factor applied to every popularity score after each cycle.
+        stats (dict): Counters of 'cycles', 'refreshed' and 'errors'.
+    """
+
+    def __init__(
+        self,
+        interval: float = 30.0,
+        jitter: float = 0.2,
+        max_concurrency: int = 2,
+        top: int = 10,
+        min_score: float = 2.0,
+        decay: float = 0.8,
+    ) -> None:
+        self.interval = interval
+        self.jitter = jitter
+        self.max_concurrency = max_concurrency
+        self.top = top
+        self.min_score = min_score
+        self.decay = decay
+        self.stats = {"cycles": 0, "refreshed": 0, "errors": 0}
+        self._refreshers: dict[str, Callable[[Hashable], None]] = {}
+        self._scores: dict[str, dict[Hashable, float]] = {}
+        self._pinned: dict[str, list[Hashable]] = {}
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._thread: threading.Thread | None = None
+        self._executor: ThreadPoolExecutor | None = None
+
+    def register(self, kind: str, refresh: Callable[[Hashable], None]) -> None:
+        """
+        Registers the function that refreshes the keys of a kind, e.g. by fetching a price and
+        storing it in the cache the tools read from.
+        """
+        with self._lock:
+            self._refreshers[kind] = refresh
+            self._scores.setdefault(kind, {})
+            self._pinned.setdefault(kind, [])
+
+    def record(self, kind: str, key: Hashable, weight: float = 1.0) -> None:
+        """Counts a request for `key`. Requests of unregistered kinds are ignored."""
+        with self._lock:
+            scores = self._scores.get(kind)
+            if scores is not None:
+                scores[key] = scores.get(key, 0.0) + weight
+
+    def pin(self, kind: str, keys) -> None:
+        """Keeps keys warm however often they are requested, e.g. a configured list of coins."""
+        with self._lock:
+            pinned = self._pinned.get(kind)
+            if pinned is not None:
+                pinned.extend(key for key in keys if key not in pinned)
+
+    def hot(self, kind: str) -> list[Hashable]:
+        """
+        Returns the keys of a kind to refresh: the pinned ones, then up to `top` of the most
+        popular ones.
+        """
+        with self._lock:
+            scores = self._scores.get(kind, {})
+            pinned = self._pinned.get(kind, [])
+            ranked = sorted(scores, key=scores.get, reverse=True)
+            popular = [key for key in ranked if scores[key] >= self.min_score and key not in pinned]
+            return pinned + popular[: self.top]
+
+    def _refresh(self, kind: str, key: Hashable) -> None:
+        try:
+            self._refreshers[kind](key)
+        except Exception:
+            with self._lock:
+                self.stats["errors"] += 1
+        else:
+            with self._lock:
+                self.stats["refreshed"] += 1
+
+    def run_once(self) -> int:
+        """
+        Runs a refresh cycle: refreshes the hot keys of every kind and decays the scores.
+
+        Returns:
+            int: The number of keys refreshed (successfully or not).
+        """
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.max_concurrency, thread_name_prefix="prefetch"
+            )
+        with self._lock:
+            kinds = list(self._refreshers)
+        tasks = [(kind, key) for kind in kinds for key in self.hot(kind)]
+        wait([self._executor.submit(self._refresh, kind, key) for kind, key in tasks])
+
+        with self._lock:
+            self.stats["cycles"] += 1
+            for scores in self._scores.values():
+                for key in list(scores):
+                    scores[key] *= self.decay
+                    # Las claves que ya nadie pide se olvidan
+                    if scores[key] < self.min_score * 0.1:
+                        del scores[key]
+        return len(tasks)
+
+    def _loop(self) -> None:
+        while not self._stopped.wait(self.interval * random.uniform(1 - self.jitter, 1 + self.jitter)):
+            self.run_once()
+
+    def start(self) -> None:
+        """Starts the refresh cycles in a daemon thread."""
+        if self._thread is not None:
+            return
+        self._stopped.clear()
+        self._thread = threading.Thread(target=self._loop, name="prefetcher", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stops the refresh cycles, waiting for the running refreshes to finish."""
+        self._stopped.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
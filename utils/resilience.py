@@ -0,0 +1,329 @@
+import inspect
+import random
+import threading
+import time
+from collections import deque
+from typing import Callable
+from typing import Iterator
+from urllib.parse import urlparse
+
+from tool import Tool
+from utils.data_sources import CircuitOpenError
+from utils.data_sources import DataSource
+from utils.data_sources import TransientDataSourceError
+from utils.tracing import set_attribute
+
+
+def backoff_delays(
+    attempts: int, base_delay: float = 0.5, max_delay: float = 5.0
+) -> Iterator[float]:
+    """
+    Yields the waits between `attempts` tries: exponential backoff with full jitter, so that
+    concurrent callers retrying the same failure do not hit the site again in lockstep.
+    """
+    for attempt in range(attempts - 1):
+        yield random.uniform(0, min(max_delay, base_delay * 2 ** attempt))
+
+
+def is_transient(error: Exception) -> bool:
+    """
+    Whether an error may go away on retry: a transport error, a timeout or a 5xx response.
+    Errors of the input or of data that does not exist (e.g. a ValueError for an unknown
+    date, a 404) are not, and must neither be retried nor counted by a circuit breaker.
+    """
+    return isinstance(error, (TransientDataSourceError, TimeoutError, ConnectionError))
+
+
+class CircuitBreaker:
+    """
+    Fails fast while a dependency is down instead of waiting for each call to time out.
+
+    After `failure_threshold` consecutive failures the circuit opens and calls are rejected
+    for `reset_timeout` seconds. Then a single trial call is let through (half-open): it closes
+    the circuit if it succeeds and opens it again if it fails.
+
+    Attributes:
+        name (str): What the breaker protects (e.g. a tool or a host), used in error messages.
+        failure_threshold (int): Consecutive failures that open the circuit.
+        reset_timeout (float): Seconds the circuit stays open before a trial call.
+        stats (dict): Counters of 'failures', 'rejected' and 'opened', and whether it is 'open'.
+    """
+
+    def __init__(self, name: str, failure_threshold: int = 5, reset_timeout: float = 30.0) -> None:
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.stats = {"failures": 0, "rejected": 0, "opened": 0, "open": 0}
+        self._failures = 0
+        self._opened_at: float | None = None
+        self._trial = False
+        self._lock = threading.Lock()
+
+    def before_call(self) -> None:
+        """
+        Checks that a call may proceed.
+
+        Raises:
+            CircuitOpenError: If the circuit is open, or half-open with a trial call running.
+        """
+        with self._lock:
+            if self._opened_at is None:
+                return
+            if not self._trial and time.monotonic() >= self._opened_at + self.reset_timeout:
+                self._trial = True
+                return
+            self.stats["rejected"] += 1
+            retry_in = max(0.0, self._opened_at + self.reset_timeout - time.monotonic())
+        raise CircuitOpenError(f"{self.name} is unavailable, retry in {retry_in:.0f}s")
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._trial = False
+            self.stats["open"] = 0
+
+    def release(self) -> None:
+        """
+        Ends a call whose outcome says nothing about the dependency (e.g. invalid input)
+        without counting it; if it was the trial call, the next call becomes the trial.
+        """
+        with self._lock:
+            self._trial = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            self.stats["failures"] += 1
+            if self._trial or self._failures >= self.failure_threshold:
+                if self._opened_at is None or self._trial:
+                    self.stats["opened"] += 1
+                self._opened_at = time.monotonic()
+                self._trial = False
+                self.stats["open"] = 1
+
+
+class LatencyTracker:
+    """
+    Keeps the latencies of the last successful calls to derive a timeout from them.
+
+    Attributes:
+        default (float): Timeout used until `min_samples` latencies have been observed.
+        percentile (float): Percentile of the observed latencies the timeout is based on.
+        multiplier (float): Headroom applied to that percentile.
+        minimum (float): Lower bound of the timeout, in seconds.
+        maximum (float): Upper bound of the timeout, in seconds.
+    """
+
+    def __init__(
+        self,
+        default: float = 10.0,
+        percentile: float = 0.95,
+        multiplier: float = 2.0,
+        minimum: float = 1.0,
+        maximum: float = 30.0,
+        window: int = 100,
+        min_samples: int = 10,
+    ) -> None:
+        self.default = default
+        self.percentile = percentile
+        self.multiplier = multiplier
+        self.minimum = minimum
+        self.maximum = maximum
+        self.min_samples = min_samples
+        self._samples: deque[float] = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def record(self, seconds: float) -> None:
+        with self._lock:
+            self._samples.append(seconds)
+
+    def quantile(self, q: float) -> float | None:
+        """Returns the `q` quantile of the observed latencies, or None if there are none."""
+        with self._lock:
+            samples = sorted(self._samples)
+        if not samples:
+            return None
+        return samples[min(len(samples) - 1, int(q * len(samples)))]
+
+    def timeout(self) -> float:
+        """The timeout for the next call, in seconds."""
+        with self._lock:
+            enough = len(self._samples) >= self.min_samples
+        if not enough:
+            return self.default
+        adaptive = self.quantile(self.percentile) * self.multiplier
+        return min(self.maximum, max(self.minimum, adaptive))
+
+
+class ResilientDataSource(DataSource):
+    """
+    Wraps a backend with a circuit breaker for the host it scrapes and a timeout adapted to
+    the latencies observed on it: while the host is down the backend fails immediately (and
+    `FallbackDataSource` moves on to the next one), and a slow host cannot hold a call for
+    longer than a multiple of its usual tail latency. Only transient errors (see
+    `is_transient`) count as failures of the host.
+
+    Latencies are tracked per method, since a spot price and a range that pages through older
+    rows take very different times. A call that fails after using up its timeout is recorded
+    with that time, so that the timeout grows when the host becomes slower.
+
+    Attributes:
+        source (DataSource): The wrapped backend. The timeout is passed to each of its calls.
+        breaker (CircuitBreaker): The breaker of the backend's host.
+        latencies (dict[str, LatencyTracker]): The latencies of the backend, by method name.
+    """
+
+    def __init__(
+        self,
+        source: DataSource,
+        breaker: CircuitBreaker | None = None,
+        latency_factory: Callable[[], LatencyTracker] | None = None,
+    ) -> None:
+        self.source = source
+        self.name = source.name
+        host = urlparse(getattr(source, "base_url", "")).netloc or source.name
+        self.breaker = breaker or CircuitBreaker(f"{source.name} backend for {host}")
+        self.latency_factory = latency_factory or (
+            lambda: LatencyTracker(default=getattr(source, "timeout", 10.0))
+        )
+        self.latencies: dict[str, LatencyTracker] = {}
+        self._lock = threading.Lock()
+
+    def latency(self, method: str) -> LatencyTracker:
+        """Returns the latency tracker of a method, creating it on its first call."""
+        with self._lock:
+            if method not in self.latencies:
+                self.latencies[method] = self.latency_factory()
+            return self.latencies[method]
+
+    def _call(self, method: str, *args, timeout: float | None = None):
+        self.breaker.before_call()
+        latency = self.latency(method)
+        adaptive = latency.timeout()
+        timeout = adaptive if timeout is None else min(timeout, adaptive)
+        start = time.perf_counter()
+        try:
+            result = getattr(self.source, method)(*args, timeout=timeout)
+        except Exception as e:
+            if is_transient(e):
+                self.breaker.record_failure()
+                elapsed = time.perf_counter() - start
+                # Una llamada cortada por el timeout duró al menos eso: sin esta muestra el
+                # timeout nunca crecería aunque el host se haya vuelto más lento
+                if elapsed >= timeout:
+                    latency.record(elapsed)
+            else:
+                self.breaker.release()
+            raise
+        latency.record(time.perf_counter() - start)
+        self.breaker.record_success()
+        return result
+
+    def spot_price(self, moneda: str, timeout: float | None = None) -> str:
+        return self._call("spot_price", moneda, timeout=timeout)
+
+    def historic_rows(self, moneda: str, timeout: float | None = None) -> list[list[str]]:
+        return self._call("historic_rows", moneda, timeout=timeout)
+
+    def historic_range(
+        self, moneda: str, inicio: str, fin: str, timeout: float | None = None
+    ) -> list[list[str]]:
+        return self._call("historic_range", moneda, inicio, fin, timeout=timeout)
+
+
+class ResilientTool(Tool):
+    """
+    A tool whose runs are retried with exponential backoff when they raise a transient error
+    (see `is_transient`), guarded by a circuit breaker of its own.
+
+    Failures are returned as a short {'error': ...} result instead of raising, so that the
+    LLM gets a compact message, and once the breaker is open it learns right away that the
+    tool is unavailable instead of triggering more rounds that retry the same scrape. Other
+    exceptions (e.g. a date that cannot be parsed, a coin that does not exist) and error
+    results returned by the tool itself are not failures: they go back to the LLM at once,
+    neither retried nor counted by the breaker.
+
+    Attributes:
+        breaker (CircuitBreaker): The breaker of the tool.
+        attempts (int): Maximum number of runs per call.
+        base_delay (float): Wait before the first retry, doubled on each one.
+        max_delay (float): Upper bound of each wait.
+        deadline (float): Seconds after which no new retry is started.
+        max_error_chars (int): Length to which error messages are truncated.
+    """
+
+    def __init__(
+        self,
+        tool: Tool,
+        breaker: CircuitBreaker | None = None,
+        attempts: int = 3,
+        base_delay: float = 0.5,
+        max_delay: float = 5.0,
+        deadline: float = 30.0,
+        max_error_chars: int = 200,
+    ) -> None:
+        super().__init__(tool.name, tool.fn, tool.fn_signature)
+        self.breaker = breaker or CircuitBreaker(tool.name)
+        self.attempts = attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.deadline = deadline
+        self.max_error_chars = max_error_chars
+
+    def _error(self, e: Exception) -> dict:
+        message = " ".join(str(e).split())
+        if len(message) > self.max_error_chars:
+            message = message[: self.max_error_chars - 3] + "..."
+        return {"error": f"{type(e).__name__}: {message}"}
+
+    def run(self, **kwargs):
+        try:
+            self.breaker.before_call()
+        except CircuitOpenError as e:
+            set_attribute("circuit.open", True)
+            return self._error(e)
+
+        start = time.monotonic()
+        delays = backoff_delays(self.attempts, self.base_delay, self.max_delay)
+        attempt = 0
+        while True:
+            attempt += 1
+            set_attribute("tool.attempts", attempt)
+            try:
+                result = self.fn(**kwargs)
+            except Exception as e:
+                if not is_transient(e):
+                    # Un error de la entrada se repetiría igual: vuelve al LLM sin más
+                    self.breaker.release()
+                    return self._error(e)
+                delay = next(delays, None)
+                # No se reintenta si ya no da tiempo o si todos los backends están cortados
+                if (
+                    delay is None
+                    or isinstance(e, CircuitOpenError)
+                    or time.monotonic() - start + delay > self.deadline
+                ):
+                    # El breaker cuenta llamadas fallidas, no intentos
+                    self.breaker.record_failure()
+                    return self._error(e)
+                time.sleep(delay)
+                continue
+            self.breaker.record_success()
+            return result
+
+    async def arun(self, **kwargs):
+        import asyncio
+
+        if inspect.iscoroutinefunction(self.fn):
+            return await super().arun(**kwargs)
+        return await asyncio.to_thread(self.run, **kwargs)
+
+
+def breaker_stats(breakers: list[CircuitBreaker]) -> dict:
+    """Adds up the counters of several breakers, e.g. for a metrics endpoint."""
+    totals = {"failures": 0, "rejected": 0, "opened": 0, "open": 0}
+    for breaker in breakers:
+        for key in totals:
+            totals[key] += breaker.stats[key]
+    return totals
@@ -0,0 +1,222 @@
+import json
+import os
+import threading
+import time
+import uuid
+
+from utils.completions import TokenBudgetChatHistory
+from utils.historic_store import normalize_date
+
+
+def normalize_arguments(arguments: dict) -> str:
+    """
+    Returns a canonical form of the arguments of a tool call, so that calls that only differ
+    in key order, case, spacing or date format share the same memo entry.
+    """
+    def normalize(value):
+        if isinstance(value, str):
+            return normalize_date(" ".join(value.lower().split()))
+        if isinstance(value, dict):
+            return {k: normalize(v) for k, v in value.items()}
+        if isinstance(value, (list, tuple)):
+            return [normalize(v) for v in value]
+        return value
+
+    return json.dumps(normalize(arguments), sort_keys=True, ensure_ascii=False, default=str)
+
+
+class Session:
+    """
+    A multi-turn conversation: the chat history kept across questions and a memo of the
+    tool results already observed, so that follow-up questions neither start from scratch
+    nor fetch the same data again.
+
+    Attributes:
+        session_id (str): Identifier of the session.
+        history (TokenBudgetChatHistory): The messages of all the turns, starting with the
+            system prompt, which is pinned; the question being answered is kept as its anchor.
+        memo (dict): Tool results keyed by (tool name, normalized arguments), with the time
+            they were stored.
+        memo_ttl (dict): Seconds a memoized result of a tool stays valid (e.g. spot prices);
+            tools not listed never expire within the session.
+        turns (int): Number of questions answered.
+        last_used (float): Time of the last activity, as returned by `time.time()`.
+    """
+
+    def __init__(
+        self,
+        session_id: str | None = None,
+        history_max_tokens: int = 8000,
+        memo_ttl: dict[str, float] | None = None,
+    ) -> None:
+        self.session_id = session_id or uuid.uuid4().hex
+        self.history = TokenBudgetChatHistory(max_tokens=history_max_tokens, pinned=1)
+        self.memo: dict[tuple[str, str], tuple[float, object]] = {}
+        self.memo_ttl = dict(memo_ttl or {})
+        self.turns = 0
+        self.last_used = time.time()
+        # Las preguntas de una misma sesión se responden de una en una
+        self.lock = threading.Lock()
+        self._memo_lock = threading.Lock()
+
+    def recall(self, name: str, arguments: dict) -> tuple[bool, object]:
+        """
+        Looks a tool call up in the memo.
+
+        Returns:
+            tuple[bool, object]: Whether a valid result was found, and the result.
+        """
+        key = (name, normalize_arguments(arguments))
+        with self._memo_lock:
+            entry = self.memo.get(key)
+            if entry is None:
+                return False, None
+            stored_at, result = entry
+            ttl = self.memo_ttl.get(name)
+            if ttl is not None and time.time() - stored_at > ttl:
+                del self.memo[key]
+                return False, None
+            return True, result
+
+    def remember(self, name: str, arguments: dict, result) -> None:
+        """Stores the result of a tool call. Error results are not stored."""
+        if isinstance(result, dict) and "error" in result:
+            return
+        with self._memo_lock:
+            self.memo[(name, normalize_arguments(arguments))] = (time.time(), result)
+
+    def touch(self) -> None:
+        self.last_used = time.time()
+
+    def to_dict(self) -> dict:
+        """Returns a JSON-serializable snapshot of the session."""
+        with self._memo_lock:
+            memo = [[name, args, stored_at, result] for (name, args), (stored_at, result) in self.memo.items()]
+        return {
+            "session_id": self.session_id,
+            "turns": self.turns,
+            "last_used": self.last_used,
+            "memo_ttl": self.memo_ttl,
+            "history": {
+                "messages": list(self.history),
+                "max_tokens": self.history.max_tokens,
+                "pinned": self.history.pinned,
+                "keep_last": self.history.keep_last,
+                "summary_chars": self.history.summary_chars,
+                "anchor": self.history.anchor,
+            },
+            "memo": memo,
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "Session":
+        """Rebuilds a session from the output of `to_dict`."""
+        history = data["history"]
+        session = cls(data["session_id"], history["max_tokens"], data.get("memo_ttl"))
+        session.history = TokenBudgetChatHistory(
+            history["messages"],
+            max_tokens=history["max_tokens"],
+            pinned=history["pinned"],
+            keep_last=history["keep_last"],
+            summary_chars=history["summary_chars"],
+            anchor=history.get("anchor"),
+        )
+        session.memo = {(name, args): (stored_at, result) for name, args, stored_at, result in data["memo"]}
+        session.turns = data["turns"]
+        session.last_used = data["last_used"]
+        return session
+
+
+class SessionStore:
+    """
+    Keeps the active sessions in memory and moves the idle ones to disk, from where they are
+    restored transparently on their next question.
+
+    Attributes:
+        directory (str | None): Where idle sessions are written as JSON files; None to drop
+            them instead.
+        idle_timeout (float): Seconds without activity after which a session is evicted.
+        history_max_tokens (int): Token budget of the history of new sessions.
+        memo_ttl (dict): Validity of the memoized results of new sessions, per tool.
+    """
+
+    def __init__(
+        self,
+        directory: str | None = None,
+        idle_timeout: float = 900.0,
+        history_max_tokens: int = 8000,
+        memo_ttl: dict[str, float] | None = None,
+    ) -> None:
+        self.directory = directory
+        self.idle_timeout = idle_timeout
+        self.history_max_tokens = history_max_tokens
+        self.memo_ttl = dict(memo_ttl or {})
+        self._sessions: dict[str, Session] = {}
+        self._lock = threading.Lock()
+
+    def _path(self, session_id: str) -> str:
+        # El identificador llega del cliente: solo se aceptan caracteres seguros en un nombre de fichero
+        if not session_id or not all(c.isalnum() or c in "-_" for c in session_id):
+            raise ValueError(f"Invalid session id: {session_id!r}")
+        return os.path.join(self.directory, f"{session_id}.json")
+
+    def get(self, session_id: str | None = None) -> Session:
+        """
+        Returns the session with the given identifier, restoring it from disk if it was
+        evicted, or a new session if it does not exist (or no identifier is given).
+        """
+        with self._lock:
+            session = self._sessions.get(session_id) if session_id else None
+            if session is None and session_id and self.directory:
+                path = self._path(session_id)
+                if os.path.exists(path):
+                    with open(path, encoding="utf-8") as f:
+                        session = Session.from_dict(json.load(f))
+                    os.remove(path)
+            if session is None:
+                session = Session(session_id, self.history_max_tokens, self.memo_ttl)
+            self._sessions[session.session_id] = session
+            session.touch()
+            return session
+
+    def save(self, session: Session) -> None:
+        """Writes a session to disk."""
+        path = self._path(session.session_id)
+        os.makedirs(self.directory, exist_ok=True)
+        tmp = path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(session.to_dict(), f, ensure_ascii=False, default=str)
+        os.replace(tmp, path)
+
+    def evict_idle(self) -> int:
+        """
+        Moves the sessions idle for longer than `idle_timeout` out of memory.
+
+        Returns:
+            int: The number of sessions evicted.
+        """
+        limit = time.time() - self.idle_timeout
+        with self._lock:
+            idle = [
+                s for s in self._sessions.values()
+                if s.last_used < limit and not s.lock.locked()
+            ]
+            # Se escriben con el lock tomado para que `get` nunca vea una sesión a medio desalojar
+            for session in idle:
+                if self.directory:
+                    self.save(session)
+                del self._sessions[session.session_id]
+        return len(idle)
+
+    def close(self) -> None:
+        """Writes all the sessions in memory to disk."""
+        with self._lock:
+            sessions = list(self._sessions.values())
+            self._sessions.clear()
+        if self.directory:
+            for session in sessions:
+                self.save(session)
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._sessions)
@@ -0,0 +1,273 @@
+import json
+import random
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from dataclasses import field
+from typing import Any
+
+
+@dataclass
+class Span:
+    """
+    A timed operation (an agent run, a ReAct round, an LLM call, a tool execution...).
+
+    Attributes:
+        name (str): The kind of operation (e.g. 'agent.run', 'llm.call', 'tool.execute').
+        trace_id (str): Identifier shared by all the spans of the same trace (32 hex digits).
+        span_id (str): Identifier of this span (16 hex digits).
+        parent_id (str | None): Identifier of the enclosing span, if any.
+        start_time_ns (int): Start time in nanoseconds since the epoch.
+        end_time_ns (int | None): End time in nanoseconds since the epoch, once finished.
+        attributes (dict): Key/value data describing the operation.
+        status (str): 'ok' or 'error'.
+    """
+
+    name: str
+    trace_id: str
+    span_id: str
+    parent_id: str | None = None
+    start_time_ns: int = 0
+    end_time_ns: int | None = None
+    attributes: dict[str, Any] = field(default_factory=dict)
+    status: str = "ok"
+    _start_perf_ns: int = 0
+
+    @property
+    def duration_ms(self) -> float | None:
+        """Duration of the span in milliseconds, once finished."""
+        if self.end_time_ns is None:
+            return None
+        return (self.end_time_ns - self.start_time_ns) / 1e6
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        self.attributes[key] = value
+
+    def to_dict(self) -> dict:
+        return {
+            "name": self.name,
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "start_time_ns": self.start_time_ns,
+            "end_time_ns": self.end_time_ns,
+            "duration_ms": self.duration_ms,
+            "status": self.status,
+            "attributes": self.attributes,
+        }
+
+
+_current_span: ContextVar[Span | None] = ContextVar("current_span", default=None)
+
+
+def current_span() -> Span | None:
+    """Returns the span active in the current context, if any."""
+    return _current_span.get()
+
+
+def set_attribute(key: str, value: Any) -> None:
+    """Sets an attribute on the active span. Does nothing when no span is active."""
+    span = _current_span.get()
+    if span is not None:
+        span.attributes[key] = value
+
+
+class Tracer:
+    """
+    Creates spans and hands them to exporters when they finish.
+
+    Spans nest through a context variable, so spans opened inside another span (in the same
+    thread, an asyncio task or a context copied to a worker thread) become its children.
+
+    Attributes:
+        exporters (list): Objects with an `export(span)` method. With no exporters, spans are
+            still timed and nested but nothing is written anywhere.
+    """
+
+    def __init__(self, exporters: list | None = None) -> None:
+        self.exporters = list(exporters or [])
+
+    def add_exporter(self, exporter) -> None:
+        self.exporters.append(exporter)
+
+    @contextmanager
+    def span(self, name: str, **attributes):
+        """
+        Context manager that opens a span, makes it the active one and exports it on exit.
+        An exception escaping the block marks the span as failed and is re-raised.
+        The `error` attribute and `status` can also be set inside the block for handled failures.
+
+        Args:
+            name (str): The kind of operation.
+            **attributes: Initial attributes of the span.
+
+        Yields:
+            Span: The open span, to which more attributes can be added.
+        """
+        parent = _current_span.get()
+        span = Span(
+            name=name,
+            trace_id=parent.trace_id if parent else f"{random.getrandbits(128):032x}",
+            span_id=f"{random.getrandbits(64):016x}",
+            parent_id=parent.span_id if parent else None,
+            start_time_ns=time.time_ns(),
+            attributes=attributes,
+            _start_perf_ns=time.perf_counter_ns(),
+        )
+        token = _current_span.set(span)
+        try:
+            yield span
+        except GeneratorExit:
+            # A streaming generator closed early by its consumer is not a failure
+            raise
+        except BaseException as e:
+            span.status = "error"
+            span.attributes["error"] = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            try:
+                _current_span.reset(token)
+            except ValueError:
+                # A generator holding the span was closed from another context
+                pass
+            span.end_time_ns = span.start_time_ns + time.perf_counter_ns() - span._start_perf_ns
+            for exporter in self.exporters:
+                exporter.export(span)
+
+
+class InMemoryExporter:
+    """
+    Keeps the finished spans in a list, e.g. to compute statistics or in tests.
+
+    Spans that finish after their trace was popped (e.g. a tool call abandoned after a
+    timeout) are dropped, so that a long-running process does not accumulate them.
+
+    Attributes:
+        max_closed (int): Number of popped traces remembered to drop their late spans.
+    """
+
+    def __init__(self, max_closed: int = 10_000) -> None:
+        self.spans: list[Span] = []
+        self.max_closed = max_closed
+        self._closed: dict[str, None] = {}
+        self._lock = threading.Lock()
+
+    def export(self, span: Span) -> None:
+        with self._lock:
+            if span.trace_id not in self._closed:
+                self.spans.append(span)
+
+    def by_trace(self, trace_id: str) -> list[Span]:
+        """Returns the finished spans of a trace."""
+        with self._lock:
+            return [span for span in self.spans if span.trace_id == trace_id]
+
+    def pop_trace(self, trace_id: str) -> list[Span]:
+        """Removes and returns the finished spans of a trace; its later spans are dropped."""
+        with self._lock:
+            spans = [span for span in self.spans if span.trace_id == trace_id]
+            self.spans = [span for span in self.spans if span.trace_id != trace_id]
+            self._closed[trace_id] = None
+            if len(self._closed) > self.max_closed:
+                del self._closed[next(iter(self._closed))]
+            return spans
+
+    def clear(self) -> None:
+        with self._lock:
+            self.spans.clear()
+            self._closed.clear()
+
+
+class JsonLinesExporter:
+    """Appends each finished span as a JSON object on its own line."""
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self._lock = threading.Lock()
+        self._file = open(path, "a", encoding="utf-8")
+
+    def export(self, span: Span) -> None:
+        line = json.dumps(span.to_dict(), ensure_ascii=False, default=str)
+        with self._lock:
+            self._file.write(line + "\n")
+            self._file.flush()
+
+    def close(self) -> None:
+        with self._lock:
+            self._file.close()
+
+
+def _otlp_value(value: Any) -> dict:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    if isinstance(value, str):
+        return {"stringValue": value}
+    return {"stringValue": json.dumps(value, ensure_ascii=False, default=str)}
+
+
+class OTLPJsonExporter(JsonLinesExporter):
+    """
+    Writes each finished span as an OTLP/JSON `ExportTraceServiceRequest` on its own line,
+    the format read by the OpenTelemetry Collector file receiver.
+    """
+
+    def __init__(self, path: str, service_name: str = "crypto-react-agent") -> None:
+        super().__init__(path)
+        self.service_name = service_name
+
+    def export(self, span: Span) -> None:
+        otlp_span = {
+            "traceId": span.trace_id,
+            "spanId": span.span_id,
+            "name": span.name,
+            "kind": 1,
+            "startTimeUnixNano": str(span.start_time_ns),
+            "endTimeUnixNano": str(span.end_time_ns),
+            "attributes": [
+                {"key": key, "value": _otlp_value(value)} for key, value in span.attributes.items()
+            ],
+            "status": {"code": 2 if span.status == "error" else 1},
+        }
+        if span.parent_id:
+            otlp_span["parentSpanId"] = span.parent_id
+        request = {
+            "resourceSpans": [{
+                "resource": {
+                    "attributes": [
+                        {"key": "service.name", "value": {"stringValue": self.service_name}}
+                    ]
+                },
+                "scopeSpans": [{"scope": {"name": "utils.tracing"}, "spans": [otlp_span]}],
+            }]
+        }
+        line = json.dumps(request, ensure_ascii=False)
+        with self._lock:
+            self._file.write(line + "\n")
+            self._file.flush()
+
+
+class ConsoleExporter:
+    """
+    Prints the progress of the agent to the terminal with colours: the tools used with their
+    arguments and results, and the thought and observations of each round.
+    """
+
+    def export(self, span: Span) -> None:
+        from colorama import Fore
+
+        attributes = span.attributes
+        if span.name == "tool.execute":
+            print(Fore.GREEN + f"\nUsing Tool: {attributes.get('tool')}")
+            print(Fore.GREEN + f"\nTool call dict: \n{attributes.get('tool_call')}")
+            print(Fore.GREEN + f"\nTool result: \n{attributes.get('result')}")
+        elif span.name == "agent.round":
+            if "thought" in attributes:
+                print(Fore.MAGENTA + f"\nThought: {attributes['thought']}")
+            if "observations" in attributes:
+                print(Fore.BLUE + f"\nObservations: {attributes['observations']}")